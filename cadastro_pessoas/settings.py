@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 from decouple import config, Csv
+from celery.schedules import crontab
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -37,6 +38,7 @@ INSTALLED_APPS = [
     'publico',
     'empresa',
     'frequencia',
+    'enderecos',
 ]
 
 MIDDLEWARE = [
@@ -47,6 +49,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'enderecos.middleware.ContextoCepMiddleware',
 ]
 
 ROOT_URLCONF = 'cadastro_pessoas.urls'
@@ -161,6 +164,19 @@ CELERY_TASK_DEFAULT_QUEUE = 'default'
 CELERY_TASK_DEFAULT_EXCHANGE = 'default'
 CELERY_TASK_DEFAULT_ROUTING_KEY = 'default'
 
+# Tarefas periódicas (celery -A cadastro_pessoas beat)
+CELERY_BEAT_SCHEDULE = {
+    'gerar-aulas': {
+        'task': 'frequencia.tasks.gerar_aulas_task',
+        'schedule': crontab(hour=2, minute=0),
+    },
+    # Fecha as aulas encerradas lançando as faltas (frequencia.calendario.registrar_ausencias)
+    'registrar-ausencias': {
+        'task': 'frequencia.tasks.registrar_ausencias_task',
+        'schedule': crontab(minute='*/15'),
+    },
+}
+
 # Configurações para evitar timeouts
 CELERY_TASK_ALWAYS_EAGER = True  # Executar tarefas sincronamente para desenvolvimento
 CELERY_TASK_EAGER_PROPAGATES = True
@@ -244,6 +260,65 @@ LOGGING = {
     },
 } 
 
+# Cache do Django (versões dos índices do check-in, CEPs, etc.). Com vários processos
+# (web e workers Celery), use um backend compartilhado (ex.: django.core.cache.backends.redis.RedisCache).
+# O progresso dos lotes de QR Codes fica no banco (usuarios.LoteQrCode), não no cache.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
+# Configurações do cache de CEP (segundos)
+CEP_CACHE_TTL = config('CEP_CACHE_TTL', default=60 * 60 * 24 * 30, cast=int)  # CEPs encontrados: 30 dias
+CEP_CACHE_TTL_NEGATIVO = config('CEP_CACHE_TTL_NEGATIVO', default=60 * 60 * 24, cast=int)  # CEPs inexistentes: 1 dia
+CEP_CACHE_LRU_TAMANHO = 2048  # Entradas no LRU em memória de cada processo
+CEP_CACHE_LRU_TTL = 60 * 60  # Validade máxima no LRU, para refletir mudanças no banco
+
+# Cliente HTTP do ViaCEP (timeouts em segundos)
+VIACEP_URL = 'https://viacep.com.br/ws/{cep}/json/'
+VIACEP_POOL_TAMANHO = 10  # Conexões keep-alive mantidas por processo
+VIACEP_POOL_ASYNC_TAMANHO = 100  # Conexões simultâneas do cliente assíncrono (views ASGI)
+VIACEP_TIMEOUT_CONEXAO = 1.0
+VIACEP_TIMEOUT_LEITURA = 2.0
+VIACEP_TENTATIVAS = 2  # Total de tentativas, com espera aleatória entre elas
+VIACEP_PRAZO_TOTAL = 4.0  # Nenhuma consulta passa deste tempo somando as tentativas
+VIACEP_DISJUNTOR_FALHAS = 5  # Falhas seguidas para abrir o circuito
+VIACEP_DISJUNTOR_ESPERA = 30.0  # Tempo com o circuito aberto antes de testar de novo
+
+# Token para coleta das métricas em /enderecos/metricas/ (Authorization: Bearer <token>)
+METRICAS_TOKEN = config('METRICAS_TOKEN', default='')
+
+# QR Code dos atletas: renderizado sob demanda em /atleta/qr/<codigo>.svg|png.
+# Com True, a imagem também é gravada em MEDIA_ROOT (em segundo plano) ao cadastrar o atleta.
+QR_CODE_SALVAR_ARQUIVO = config('QR_CODE_SALVAR_ARQUIVO', default=False, cast=bool)
+
+# Códigos de atleta têm 10 caracteres com verificador (ver usuarios.codigos).
+# Os antigos, de 9 e sem verificador, são aceitos enquanto isto for True.
+ATLETA_ACEITAR_CODIGOS_LEGADOS = config('ATLETA_ACEITAR_CODIGOS_LEGADOS', default=True, cast=bool)
+
+# Token do leitor de QR Code da portaria (Authorization: Bearer <token>) em /frequencia/checkin/
+FREQUENCIA_LEITOR_TOKEN = config('FREQUENCIA_LEITOR_TOKEN', default='')
+
+# Status de matrícula (StatusMatricula.nome) que permitem registrar frequência,
+# junto com Matricula.ativa. Os demais indicam pendência (ex.: pagamento).
+FREQUENCIA_STATUS_ELEGIVEIS = ['Ativa']
+
+# Gravação em grupo do check-in (frequencia.gravacao): a leitura é confirmada
+# depois de ir para o diário em FREQUENCIA_FILA_DIR e gravada no banco junto com
+# as demais a cada FREQUENCIA_GRUPO_INTERVALO segundos ou FREQUENCIA_GRUPO_MAXIMO leituras.
+FREQUENCIA_GRAVACAO_EM_GRUPO = config('FREQUENCIA_GRAVACAO_EM_GRUPO', default=False, cast=bool)
+FREQUENCIA_FILA_DIR = config('FREQUENCIA_FILA_DIR', default=str(BASE_DIR / 'fila_frequencia'))
+FREQUENCIA_GRUPO_INTERVALO = 0.25
+FREQUENCIA_GRUPO_MAXIMO = 100
+
+# Aulas (frequencia.Aula) geradas à frente a partir dos horários das turmas
+AULAS_SEMANAS_A_FRENTE = 4
+
+# Fonte TrueType usada nos cartões em PDF (nome ou caminho; precisa ter acentos)
+CARTAO_FONTE = config('CARTAO_FONTE', default='DejaVuSans.ttf')
+
 # Configurações de autenticação
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
@@ -7,6 +7,8 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('publico.urls', namespace='publico')),  # Site público como página principal
     path('', include('usuarios.urls', namespace='usuarios')),  # Sistema de usuários
+    path('enderecos/', include('enderecos.urls', namespace='enderecos')),
+    path('frequencia/', include('frequencia.urls', namespace='frequencia')),  # Check-in da portaria
 ]
 # Servir arquivos de mídia durante o desenvolvimento
 if settings.DEBUG:
@@ -1,10 +1,11 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from .models import Empresa, MensagemContato, TermosCondicoes
+from utils.filtros_admin import FiltroDataCriacaoUUID7
 
 class EmpresaAdmin(admin.ModelAdmin):
     list_display = ['nome_fantasia', 'municipio', 'uf', 'telefone1', 'email', 'ativo', 'data_criacao']
-    list_filter = ['ativo', 'uf', 'municipio', 'data_criacao']
+    list_filter = ['ativo', 'uf', 'municipio', ('data_criacao', FiltroDataCriacaoUUID7)]
     search_fields = ['nome_fantasia', 'nome_empresarial', 'municipio', 'email']
     readonly_fields = ['id', 'data_criacao', 'data_atualizacao']
     
@@ -44,7 +45,7 @@ class EmpresaAdmin(admin.ModelAdmin):
 
 class MensagemContatoAdmin(admin.ModelAdmin):
     list_display = ['nome', 'email', 'assunto', 'data_envio', 'lida', 'respondida']
-    list_filter = ['lida', 'respondida', 'data_envio', 'assunto']
+    list_filter = ['lida', 'respondida', ('data_envio', FiltroDataCriacaoUUID7), 'assunto']
     search_fields = ['nome', 'email', 'assunto', 'mensagem']
     readonly_fields = ['id', 'data_envio']
     
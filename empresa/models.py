@@ -1,5 +1,6 @@
 from django.db import models
 from utils.uuid7 import uuid7
+from utils.intervalos import IntervaloUUID7QuerySet
 
 
 class Empresa(models.Model):
@@ -44,6 +45,8 @@ class Empresa(models.Model):
     data_atualizacao = models.DateTimeField(auto_now=True, verbose_name="Data de Atualização")
     ativo = models.BooleanField(default=True, verbose_name="Ativo")
     
+    objects = IntervaloUUID7QuerySet.as_manager()
+
     class Meta:
         verbose_name = "Empresa"
         verbose_name_plural = "Empresas"
@@ -114,6 +117,8 @@ class MensagemContato(models.Model):
     lida = models.BooleanField(default=False, verbose_name="Mensagem Lida")
     respondida = models.BooleanField(default=False, verbose_name="Respondida")
     
+    objects = IntervaloUUID7QuerySet.as_manager()
+
     class Meta:
         verbose_name = "Mensagem de Contato"
         verbose_name_plural = "Mensagens de Contato"
@@ -0,0 +1,19 @@
+from django.contrib import admin
+from .models import CepConsulta, CepBase
+
+
+@admin.register(CepConsulta)
+class CepConsultaAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'encontrado', 'logradouro', 'bairro', 'cidade', 'uf', 'consultado_em']
+    list_filter = ['encontrado', 'uf', 'consultado_em']
+    search_fields = ['cep', 'logradouro', 'bairro', 'cidade']
+    readonly_fields = ['consultado_em']
+
+
+@admin.register(CepBase)
+class CepBaseAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'logradouro', 'bairro', 'cidade', 'uf']
+    list_filter = ['uf']
+    search_fields = ['=cep', 'logradouro', 'cidade']
+    # A base nacional tem centenas de milhares de linhas: evitar COUNT(*) completo
+    show_full_result_count = False
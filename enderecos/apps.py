@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class EnderecosConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'enderecos'
+    verbose_name = 'Endereços'
@@ -0,0 +1,332 @@
+"""
+Camadas de cache para consultas de CEP.
+
+A ordem de resolução é:
+1. LRU em memória do processo (mais rápido, expira em poucos minutos/horas);
+2. Base local ``CepBase``, importada com ``manage.py importar_ceps``;
+3. Tabela ``CepConsulta`` no banco, compartilhada entre processos, com TTL;
+4. ViaCEP, apenas quando as camadas anteriores não têm resposta válida.
+
+Respostas "erro" do ViaCEP (CEP inexistente) também são guardadas, com TTL
+menor, para não repetir a consulta a cada digitação. Falhas de rede nunca
+são guardadas. Consultas simultâneas ao mesmo CEP são agrupadas em uma única
+requisição ao ViaCEP.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+from django.utils import timezone
+
+from .contexto import contexto_atual
+from .viacep import consultar_viacep, consultar_viacep_async, ViaCepIndisponivel
+
+logger = logging.getLogger(__name__)
+
+# Marca de ausência no cache (None é um valor válido: CEP inexistente)
+AUSENTE = object()
+
+
+class CacheLRU:
+    """Cache LRU em memória com prazo de validade, seguro entre threads"""
+
+    def __init__(self, tamanho_maximo, ttl):
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl = ttl
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave):
+        """Retorna o valor guardado ou AUSENTE se não existir/expirou"""
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return AUSENTE
+            expira_em, valor = item
+            if expira_em < time.monotonic():
+                del self._itens[chave]
+                return AUSENTE
+            self._itens.move_to_end(chave)
+            return valor
+
+    def guardar(self, chave, valor, ttl=None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            self._itens[chave] = (time.monotonic() + ttl, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho_maximo:
+                self._itens.popitem(last=False)
+
+    def remover(self, chave):
+        with self._lock:
+            self._itens.pop(chave, None)
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+    def __len__(self):
+        return len(self._itens)
+
+
+class _Chamada:
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+
+class ConsultaUnica:
+    """Agrupa chamadas simultâneas para a mesma chave em uma única execução.
+
+    A primeira thread executa a função; as demais aguardam e recebem o mesmo
+    resultado (ou a mesma exceção).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._em_andamento = {}
+
+    def executar(self, chave, funcao):
+        with self._lock:
+            chamada = self._em_andamento.get(chave)
+            lider = chamada is None
+            if lider:
+                chamada = _Chamada()
+                self._em_andamento[chave] = chamada
+
+        if not lider:
+            chamada.evento.wait()
+            if chamada.erro is not None:
+                raise chamada.erro
+            return chamada.resultado
+
+        try:
+            chamada.resultado = funcao()
+        except Exception as e:
+            chamada.erro = e
+            raise
+        finally:
+            with self._lock:
+                del self._em_andamento[chave]
+            chamada.evento.set()
+        return chamada.resultado
+
+
+class ConsultaUnicaAsync:
+    """
+    Equivalente de ConsultaUnica para corrotinas no mesmo event loop. A
+    consulta roda em uma task do próprio mapa, não na corrotina de quem
+    chegou primeiro: se esse cliente desconectar (cancelamento), os demais
+    continuam esperando e recebem o resultado.
+    """
+
+    def __init__(self):
+        self._em_andamento = {}
+
+    async def executar(self, chave, funcao):
+        loop = asyncio.get_running_loop()
+        # Tasks pertencem a um único loop, por isso o loop faz parte da chave
+        chave = (id(loop), chave)
+        tarefa = self._em_andamento.get(chave)
+        if tarefa is None:
+            tarefa = loop.create_task(funcao())
+            self._em_andamento[chave] = tarefa
+            tarefa.add_done_callback(lambda concluida: self._concluida(chave, concluida))
+        # shield: o cancelamento de quem espera não cancela a consulta dos demais
+        return await asyncio.shield(tarefa)
+
+    def _concluida(self, chave, tarefa):
+        if self._em_andamento.get(chave) is tarefa:
+            del self._em_andamento[chave]
+        if not tarefa.cancelled():
+            # Evita o aviso "exception was never retrieved" quando ninguém mais esperava
+            tarefa.exception()
+
+
+TTL_POSITIVO = getattr(settings, 'CEP_CACHE_TTL', 60 * 60 * 24 * 30)
+TTL_NEGATIVO = getattr(settings, 'CEP_CACHE_TTL_NEGATIVO', 60 * 60 * 24)
+
+_lru = CacheLRU(
+    tamanho_maximo=getattr(settings, 'CEP_CACHE_LRU_TAMANHO', 2048),
+    ttl=getattr(settings, 'CEP_CACHE_LRU_TTL', 60 * 60),
+)
+_consultas = ConsultaUnica()
+_consultas_async = ConsultaUnicaAsync()
+
+
+def resolver_cep(cep_limpo):
+    """
+    Resolve um CEP (8 dígitos) passando pelas camadas de cache.
+    Retorna o dicionário de endereço ou None se o CEP não existir.
+    Levanta ViaCepIndisponivel se for preciso consultar o ViaCEP e ele falhar.
+    """
+    contexto = contexto_atual()
+    dados = _da_memoria(contexto, cep_limpo)
+    if dados is AUSENTE:
+        try:
+            dados = _consultas.executar(cep_limpo, lambda: _resolver(cep_limpo))
+        except ViaCepIndisponivel as e:
+            _memorizar(contexto, cep_limpo, e)
+            raise
+        _memorizar(contexto, cep_limpo, dados)
+    # Cópia para que quem chamou não altere o valor guardado no cache
+    return dict(dados) if dados else None
+
+
+async def resolver_cep_async(cep_limpo):
+    """Versão assíncrona de ``resolver_cep`` (banco via thread, ViaCEP via httpx)"""
+    contexto = contexto_atual()
+    dados = _da_memoria(contexto, cep_limpo)
+    if dados is AUSENTE:
+        try:
+            dados = await _consultas_async.executar(cep_limpo, lambda: _resolver_async(cep_limpo))
+        except ViaCepIndisponivel as e:
+            _memorizar(contexto, cep_limpo, e)
+            raise
+        _memorizar(contexto, cep_limpo, dados)
+    return dict(dados) if dados else None
+
+
+def limpar_cache_memoria():
+    """Esvazia o LRU do processo (a tabela no banco é mantida)"""
+    _lru.limpar()
+
+
+def _da_memoria(contexto, cep_limpo):
+    """Busca na memória da requisição e depois no LRU; AUSENTE se não estiver em nenhum"""
+    if contexto is not None:
+        contexto.consultas += 1
+        if cep_limpo in contexto.resultados:
+            contexto.reaproveitadas += 1
+            dados = contexto.resultados[cep_limpo]
+            if isinstance(dados, ViaCepIndisponivel):
+                raise dados
+            return dados
+    return _lru.obter(cep_limpo)
+
+
+def _memorizar(contexto, cep_limpo, dados):
+    # Guardar também a falha: não insistir no ViaCEP fora do ar durante a mesma requisição
+    if contexto is not None:
+        contexto.resultados[cep_limpo] = dados
+
+
+def _resolver_local(cep_limpo):
+    """
+    Consulta a base local e o cache no banco.
+    Retorna (dados, registro); dados é AUSENTE quando é preciso ir ao ViaCEP.
+    """
+    dados = _buscar_base_local(cep_limpo)
+    if dados is not None:
+        return dados, None
+
+    registro = _buscar_registro(cep_limpo)
+    if registro is not None and not registro.expirada(TTL_POSITIVO, TTL_NEGATIVO):
+        return registro.como_dict(), registro
+    return AUSENTE, registro
+
+
+def _resolver(cep_limpo):
+    dados, registro = _resolver_local(cep_limpo)
+    if dados is AUSENTE:
+        _contar_viacep()
+        try:
+            dados = consultar_viacep(cep_limpo)
+        except ViaCepIndisponivel:
+            return _consulta_expirada(cep_limpo, registro)
+        _gravar_registro(cep_limpo, dados)
+    _guardar_lru(cep_limpo, dados)
+    return dados
+
+
+def _no_banco(funcao):
+    """
+    ``sync_to_async`` para o acesso ao banco. Ele não depende da thread da
+    requisição; com thread_sensitive=False as consultas de CEPs diferentes
+    não ficam enfileiradas em uma única thread. As threads do executor não
+    passam pelos sinais de início e fim de requisição, então as conexões
+    que abrem são fechadas aqui (respeitando CONN_MAX_AGE).
+    """
+    def executar(*args):
+        close_old_connections()
+        try:
+            return funcao(*args)
+        finally:
+            close_old_connections()
+    return sync_to_async(executar, thread_sensitive=False)
+
+
+async def _resolver_async(cep_limpo):
+    dados, registro = await _no_banco(_resolver_local)(cep_limpo)
+    if dados is AUSENTE:
+        _contar_viacep()
+        try:
+            dados = await consultar_viacep_async(cep_limpo)
+        except ViaCepIndisponivel:
+            return _consulta_expirada(cep_limpo, registro)
+        await _no_banco(_gravar_registro)(cep_limpo, dados)
+    _guardar_lru(cep_limpo, dados)
+    return dados
+
+
+def _contar_viacep():
+    contexto = contexto_atual()
+    if contexto is not None:
+        contexto.viacep += 1
+
+
+def _consulta_expirada(cep_limpo, registro):
+    """Com o ViaCEP fora do ar, melhor um endereço antigo do que nenhum endereço"""
+    if registro is not None and registro.encontrado:
+        logger.info(f"ViaCEP indisponível, usando consulta expirada do CEP {cep_limpo}")
+        return registro.como_dict()
+    raise ViaCepIndisponivel(f"CEP {cep_limpo} fora das bases locais")
+
+
+def _guardar_lru(cep_limpo, dados):
+    _lru.guardar(cep_limpo, dados, ttl=TTL_POSITIVO if dados else TTL_NEGATIVO)
+
+
+def _buscar_base_local(cep_limpo):
+    from .models import CepBase
+    try:
+        registro = CepBase.objects.filter(cep=cep_limpo).first()
+    except DatabaseError as e:
+        logger.warning(f"Falha ao ler base local de CEPs: {e}")
+        return None
+    return registro.como_dict() if registro else None
+
+
+def _buscar_registro(cep_limpo):
+    from .models import CepConsulta
+    try:
+        return CepConsulta.objects.filter(cep=cep_limpo).first()
+    except DatabaseError as e:
+        logger.warning(f"Falha ao ler cache de CEP no banco: {e}")
+        return None
+
+
+def _gravar_registro(cep_limpo, dados):
+    from .models import CepConsulta
+    dados = dados or {}
+    try:
+        CepConsulta.objects.update_or_create(
+            cep=cep_limpo,
+            defaults={
+                'encontrado': bool(dados),
+                'logradouro': dados.get('logradouro') or '',
+                'complemento': dados.get('complemento') or '',
+                'bairro': dados.get('bairro') or '',
+                'cidade': dados.get('cidade') or '',
+                'uf': dados.get('uf') or '',
+                'consultado_em': timezone.now(),
+            }
+        )
+    except DatabaseError as e:
+        logger.warning(f"Falha ao gravar cache de CEP no banco: {e}")
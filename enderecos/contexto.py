@@ -0,0 +1,46 @@
+"""
+Contexto de resolução de CEP por requisição.
+
+Num único envio do formulário de atleta o mesmo CEP é resolvido pelo
+validador do modelo, pela view e por ``Atleta.save()``. Dentro de um
+contexto, a primeira resolução é memorizada (inclusive a falha por ViaCEP
+indisponível) e as seguintes são respondidas da memória, então o envio custa
+no máximo uma consulta ao ViaCEP. Os contadores permitem conferir isso.
+"""
+import contextvars
+from contextlib import contextmanager
+
+_contexto = contextvars.ContextVar('contexto_cep', default=None)
+
+
+class ContextoCep:
+    """Memória e contadores das resoluções de CEP de uma requisição"""
+
+    def __init__(self):
+        self.resultados = {}
+        self.consultas = 0  # Chamadas a resolver_cep
+        self.reaproveitadas = 0  # Respondidas pela memória da requisição
+        self.viacep = 0  # Requisições feitas ao ViaCEP
+
+    def como_header(self):
+        return f"consultas={self.consultas}; reaproveitadas={self.reaproveitadas}; viacep={self.viacep}"
+
+
+def contexto_atual():
+    """Retorna o ContextoCep ativo ou None fora de um contexto"""
+    return _contexto.get()
+
+
+@contextmanager
+def contexto_cep():
+    """Abre um contexto de resolução de CEP (reaproveita o atual, se houver)"""
+    atual = _contexto.get()
+    if atual is not None:
+        yield atual
+        return
+    contexto = ContextoCep()
+    token = _contexto.set(contexto)
+    try:
+        yield contexto
+    finally:
+        _contexto.reset(token)
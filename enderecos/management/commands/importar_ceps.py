@@ -0,0 +1,214 @@
+"""
+Importa uma base nacional de CEPs para a tabela CepBase.
+
+Formatos aceitos (opcionalmente compactados com gzip, extensão .gz):
+- CSV com cabeçalho (delimitador configurável);
+- JSON Lines (um objeto por linha, extensões .jsonl/.ndjson);
+- JSON com uma lista de objetos (lida de forma incremental).
+
+O arquivo é lido em fluxo e gravado em lotes, então o consumo de memória
+depende apenas do tamanho do lote, não do tamanho do arquivo.
+
+Uso:
+    python manage.py importar_ceps ceps.csv
+    python manage.py importar_ceps ceps.jsonl.gz --lote 10000
+"""
+import csv
+import gzip
+import io
+import json
+import re
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from enderecos.models import CepBase
+
+# Nomes de colunas usados pelas bases mais comuns (ViaCEP, Correios, dumps livres)
+COLUNAS = {
+    'cep': ('cep', 'codigo_postal'),
+    'logradouro': ('logradouro', 'endereco', 'rua'),
+    'complemento': ('complemento',),
+    'bairro': ('bairro', 'bairro_inicial'),
+    'cidade': ('cidade', 'localidade', 'municipio'),
+    'uf': ('uf', 'estado', 'sigla_uf'),
+}
+
+CAMPOS_ATUALIZAVEIS = ['logradouro', 'complemento', 'bairro', 'cidade', 'uf']
+
+
+class Command(BaseCommand):
+    help = 'Importa uma base de CEPs (CSV/JSON) para consulta local, sem depender do ViaCEP'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='Caminho do arquivo CSV, JSON ou JSON Lines (pode ser .gz)')
+        parser.add_argument(
+            '--formato', choices=['csv', 'json', 'jsonl'],
+            help='Formato do arquivo (padrão: detectado pela extensão)'
+        )
+        parser.add_argument('--delimitador', default=None, help='Delimitador do CSV (padrão: detectado)')
+        parser.add_argument('--encoding', default='utf-8', help='Codificação do arquivo (padrão: utf-8)')
+        parser.add_argument('--lote', type=int, default=5000, help='Registros por INSERT (padrão: 5000)')
+        parser.add_argument(
+            '--limpar', action='store_true',
+            help='Apaga a base local antes de importar'
+        )
+
+    def handle(self, *args, **options):
+        arquivo = options['arquivo']
+        formato = options['formato'] or self._detectar_formato(arquivo)
+        tamanho_lote = options['lote']
+        if tamanho_lote <= 0:
+            raise CommandError('--lote deve ser maior que zero')
+
+        try:
+            fluxo = self._abrir(arquivo, options['encoding'])
+        except OSError as e:
+            raise CommandError(f'Não foi possível abrir {arquivo}: {e}')
+
+        if options['limpar']:
+            apagados, _ = CepBase.objects.all().delete()
+            self.stdout.write(f'Base local limpa ({apagados} registros removidos)')
+
+        if formato == 'csv':
+            registros = self._ler_csv(fluxo, options['delimitador'])
+        elif formato == 'jsonl':
+            registros = self._ler_jsonl(fluxo)
+        else:
+            registros = self._ler_json(fluxo)
+
+        inicio = time.monotonic()
+        importados = ignorados = 0
+        lote = []
+        with fluxo:
+            for registro in registros:
+                cep = self._montar(registro)
+                if cep is None:
+                    ignorados += 1
+                    continue
+                lote.append(cep)
+                if len(lote) >= tamanho_lote:
+                    importados += self._gravar(lote)
+                    lote = []
+                    self._progresso(importados, inicio)
+            if lote:
+                importados += self._gravar(lote)
+
+        duracao = time.monotonic() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'{importados} CEPs importados em {duracao:.1f}s '
+            f'({importados / duracao if duracao else importados:.0f}/s), {ignorados} linhas ignoradas'
+        ))
+
+    def _detectar_formato(self, arquivo):
+        nome = arquivo.lower()
+        if nome.endswith('.gz'):
+            nome = nome[:-3]
+        if nome.endswith(('.jsonl', '.ndjson')):
+            return 'jsonl'
+        if nome.endswith('.json'):
+            return 'json'
+        return 'csv'
+
+    def _abrir(self, arquivo, encoding):
+        if arquivo.lower().endswith('.gz'):
+            return io.TextIOWrapper(gzip.open(arquivo, 'rb'), encoding=encoding, newline='')
+        return open(arquivo, encoding=encoding, newline='')
+
+    def _ler_csv(self, fluxo, delimitador):
+        if delimitador is None:
+            amostra = fluxo.readline()
+            delimitador = ';' if amostra.count(';') > amostra.count(',') else ','
+            linhas = _prefixar(amostra, fluxo)
+        else:
+            linhas = fluxo
+        yield from csv.DictReader(linhas, delimiter=delimitador)
+
+    def _ler_jsonl(self, fluxo):
+        for numero, linha in enumerate(fluxo, start=1):
+            linha = linha.strip()
+            if not linha:
+                continue
+            try:
+                yield json.loads(linha)
+            except ValueError:
+                self.stderr.write(f'Linha {numero} com JSON inválido, ignorada')
+
+    def _ler_json(self, fluxo, tamanho_bloco=64 * 1024):
+        """Lê uma lista JSON de objetos sem carregar o arquivo inteiro"""
+        decoder = json.JSONDecoder()
+        buffer = ''
+        inicio_lista = False
+        while True:
+            bloco = fluxo.read(tamanho_bloco)
+            buffer += bloco
+            posicao = 0
+            while True:
+                # Pular espaços, vírgulas e a abertura da lista
+                while posicao < len(buffer) and buffer[posicao] in ' \t\r\n,':
+                    posicao += 1
+                if not inicio_lista and posicao < len(buffer):
+                    if buffer[posicao] != '[':
+                        raise CommandError('O arquivo JSON deve conter uma lista de objetos')
+                    inicio_lista = True
+                    posicao += 1
+                    continue
+                if posicao < len(buffer) and buffer[posicao] == ']':
+                    return
+                try:
+                    objeto, fim = decoder.raw_decode(buffer, posicao)
+                except ValueError:
+                    # Objeto incompleto: ler mais um bloco
+                    break
+                yield objeto
+                posicao = fim
+            buffer = buffer[posicao:]
+            if not bloco:
+                if buffer.strip():
+                    raise CommandError('Arquivo JSON truncado ou inválido')
+                return
+
+    def _montar(self, registro):
+        """Converte um registro do arquivo em CepBase (ou None se inválido)"""
+        valores = {}
+        for campo, nomes in COLUNAS.items():
+            valor = ''
+            for nome in nomes:
+                if registro.get(nome):
+                    valor = str(registro[nome]).strip()
+                    break
+            valores[campo] = valor
+
+        valores['cep'] = re.sub(r'[^0-9]', '', valores['cep'])
+        valores['uf'] = valores['uf'].upper()[:2]
+        if len(valores['cep']) != 8 or not valores['cidade'] or len(valores['uf']) != 2:
+            return None
+
+        for campo in CAMPOS_ATUALIZAVEIS:
+            limite = CepBase._meta.get_field(campo).max_length
+            valores[campo] = valores[campo][:limite]
+        return CepBase(**valores)
+
+    def _gravar(self, lote):
+        # Um mesmo CEP pode aparecer repetido no lote: o último vence
+        unicos = {cep.cep: cep for cep in lote}
+        with transaction.atomic():
+            CepBase.objects.bulk_create(
+                unicos.values(),
+                update_conflicts=True,
+                unique_fields=['cep'],
+                update_fields=CAMPOS_ATUALIZAVEIS,
+            )
+        return len(unicos)
+
+    def _progresso(self, importados, inicio):
+        duracao = time.monotonic() - inicio
+        taxa = importados / duracao if duracao else importados
+        self.stdout.write(f'  {importados} CEPs importados ({taxa:.0f}/s)')
+
+
+def _prefixar(primeira_linha, fluxo):
+    """Devolve a linha já lida seguida do restante do arquivo"""
+    yield primeira_linha
+    yield from fluxo
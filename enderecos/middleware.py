@@ -0,0 +1,43 @@
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .contexto import contexto_cep
+
+logger = logging.getLogger(__name__)
+
+
+class ContextoCepMiddleware:
+    """Abre um contexto de resolução de CEP para cada requisição.
+
+    Funciona tanto em WSGI quanto em ASGI (não força views assíncronas a
+    rodarem de forma síncrona). Com DEBUG ativo, os contadores são enviados
+    no header ``X-CEP-Consultas``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with contexto_cep() as contexto:
+            response = self.get_response(request)
+        return self._registrar(request, response, contexto)
+
+    async def __acall__(self, request):
+        with contexto_cep() as contexto:
+            response = await self.get_response(request)
+        return self._registrar(request, response, contexto)
+
+    def _registrar(self, request, response, contexto):
+        if contexto.consultas:
+            logger.debug(f"CEP em {request.path}: {contexto.como_header()}")
+            if settings.DEBUG:
+                response['X-CEP-Consultas'] = contexto.como_header()
+        return response
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-18 08:43
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CepConsulta',
+            fields=[
+                ('cep', models.CharField(max_length=8, primary_key=True, serialize=False, verbose_name='CEP')),
+                ('encontrado', models.BooleanField(default=True, verbose_name='CEP Encontrado')),
+                ('logradouro', models.CharField(blank=True, max_length=200, verbose_name='Logradouro')),
+                ('complemento', models.CharField(blank=True, max_length=200, verbose_name='Complemento')),
+                ('bairro', models.CharField(blank=True, max_length=100, verbose_name='Bairro')),
+                ('cidade', models.CharField(blank=True, max_length=100, verbose_name='Cidade')),
+                ('uf', models.CharField(blank=True, max_length=2, verbose_name='UF')),
+                ('consultado_em', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Consultado em')),
+            ],
+            options={
+                'verbose_name': 'Consulta de CEP',
+                'verbose_name_plural': 'Consultas de CEP',
+                'ordering': ['-consultado_em'],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-18 08:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enderecos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CepBase',
+            fields=[
+                ('cep', models.CharField(max_length=8, primary_key=True, serialize=False, verbose_name='CEP')),
+                ('logradouro', models.CharField(blank=True, max_length=200, verbose_name='Logradouro')),
+                ('complemento', models.CharField(blank=True, max_length=200, verbose_name='Complemento')),
+                ('bairro', models.CharField(blank=True, max_length=100, verbose_name='Bairro')),
+                ('cidade', models.CharField(max_length=100, verbose_name='Cidade')),
+                ('uf', models.CharField(max_length=2, verbose_name='UF')),
+            ],
+            options={
+                'verbose_name': 'CEP da Base Local',
+                'verbose_name_plural': 'Base Local de CEPs',
+                'ordering': ['cep'],
+            },
+        ),
+    ]
@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+from django.db import models
+from django.utils import timezone
+
+
+class CepConsulta(models.Model):
+    """Resultado de uma consulta de CEP ao ViaCEP, usado como cache persistente.
+
+    O próprio CEP (somente dígitos) é a chave primária: a consulta é sempre
+    feita por ele e assim evitamos um segundo índice só para a busca.
+    Consultas em que o ViaCEP respondeu "erro" são gravadas com
+    ``encontrado=False`` (cache negativo).
+    """
+    cep = models.CharField(
+        max_length=8,
+        primary_key=True,
+        verbose_name='CEP'
+    )
+    encontrado = models.BooleanField(
+        default=True,
+        verbose_name='CEP Encontrado'
+    )
+    logradouro = models.CharField(max_length=200, blank=True, verbose_name='Logradouro')
+    complemento = models.CharField(max_length=200, blank=True, verbose_name='Complemento')
+    bairro = models.CharField(max_length=100, blank=True, verbose_name='Bairro')
+    cidade = models.CharField(max_length=100, blank=True, verbose_name='Cidade')
+    uf = models.CharField(max_length=2, blank=True, verbose_name='UF')
+    consultado_em = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Consultado em'
+    )
+
+    class Meta:
+        verbose_name = 'Consulta de CEP'
+        verbose_name_plural = 'Consultas de CEP'
+        ordering = ['-consultado_em']
+
+    def __str__(self):
+        return f"{self.cep[:5]}-{self.cep[5:]}"
+
+    def expirada(self, ttl_positivo, ttl_negativo):
+        """Indica se a consulta passou do prazo de validade (em segundos)"""
+        ttl = ttl_positivo if self.encontrado else ttl_negativo
+        return timezone.now() - self.consultado_em > timedelta(seconds=ttl)
+
+    def como_dict(self):
+        """Retorna os dados no mesmo formato de ``buscar_cep`` (ou None se não encontrado)"""
+        if not self.encontrado:
+            return None
+        return {
+            'cep': str(self),
+            'logradouro': self.logradouro,
+            'bairro': self.bairro,
+            'cidade': self.cidade,
+            'uf': self.uf,
+            'complemento': self.complemento,
+        }
+
+
+class CepBase(models.Model):
+    """Base nacional de CEPs importada de arquivo (comando ``importar_ceps``).
+
+    É consultada antes do ViaCEP, permitindo resolver endereços mesmo com o
+    serviço lento ou fora do ar.
+    """
+    cep = models.CharField(
+        max_length=8,
+        primary_key=True,
+        verbose_name='CEP'
+    )
+    logradouro = models.CharField(max_length=200, blank=True, verbose_name='Logradouro')
+    complemento = models.CharField(max_length=200, blank=True, verbose_name='Complemento')
+    bairro = models.CharField(max_length=100, blank=True, verbose_name='Bairro')
+    cidade = models.CharField(max_length=100, verbose_name='Cidade')
+    uf = models.CharField(max_length=2, verbose_name='UF')
+
+    class Meta:
+        verbose_name = 'CEP da Base Local'
+        verbose_name_plural = 'Base Local de CEPs'
+        ordering = ['cep']
+
+    def __str__(self):
+        return f"{self.cep[:5]}-{self.cep[5:]}"
+
+    def como_dict(self):
+        """Retorna os dados no mesmo formato de ``buscar_cep``"""
+        return {
+            'cep': str(self),
+            'logradouro': self.logradouro,
+            'bairro': self.bairro,
+            'cidade': self.cidade,
+            'uf': self.uf,
+            'complemento': self.complemento,
+        }
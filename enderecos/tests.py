@@ -0,0 +1,49 @@
+import asyncio
+
+from django.test import SimpleTestCase
+
+from .cache import ConsultaUnicaAsync
+
+
+class ConsultaUnicaAsyncTests(SimpleTestCase):
+    """Consultas simultâneas ao mesmo CEP: uma execução, e o cancelamento de um cliente não derruba os outros"""
+
+    def test_cancelamento_do_primeiro_nao_afeta_os_demais(self):
+        consultas = ConsultaUnicaAsync()
+        execucoes = []
+
+        async def consultar():
+            execucoes.append(1)
+            await asyncio.sleep(0.05)
+            return {'cep': '78000000'}
+
+        async def cenario():
+            primeiro = asyncio.create_task(consultas.executar('78000000', consultar))
+            await asyncio.sleep(0)
+            segundo = asyncio.create_task(consultas.executar('78000000', consultar))
+            await asyncio.sleep(0.01)
+            # Cliente que desconectou
+            primeiro.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await primeiro
+            return await segundo
+
+        self.assertEqual(asyncio.run(cenario()), {'cep': '78000000'})
+        self.assertEqual(len(execucoes), 1)
+        self.assertEqual(consultas._em_andamento, {})
+
+    def test_erro_chega_a_todos(self):
+        consultas = ConsultaUnicaAsync()
+
+        async def consultar():
+            await asyncio.sleep(0.01)
+            raise ValueError('falha')
+
+        async def cenario():
+            return await asyncio.gather(
+                consultas.executar('78000000', consultar), consultas.executar('78000000', consultar),
+                return_exceptions=True,
+            )
+
+        erros = asyncio.run(cenario())
+        self.assertTrue(all(isinstance(erro, ValueError) for erro in erros))
@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+app_name = 'enderecos'
+
+urlpatterns = [
+    path('metricas/', views.metricas, name='metricas'),
+]
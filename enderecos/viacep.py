@@ -0,0 +1,83 @@
+import logging
+
+from django.conf import settings
+
+from utils.http import obter_cliente, ErroHTTP
+
+logger = logging.getLogger(__name__)
+
+VIACEP_URL = 'https://viacep.com.br/ws/{cep}/json/'
+
+
+class ViaCepIndisponivel(Exception):
+    """O ViaCEP não respondeu (timeout, erro de rede ou HTTP inesperado)"""
+
+
+def cliente_viacep():
+    """Cliente HTTP compartilhado (pool + disjuntor) usado para o ViaCEP"""
+    return obter_cliente(
+        'viacep',
+        tamanho_pool=getattr(settings, 'VIACEP_POOL_TAMANHO', 10),
+        timeout_conexao=getattr(settings, 'VIACEP_TIMEOUT_CONEXAO', 1.0),
+        timeout_leitura=getattr(settings, 'VIACEP_TIMEOUT_LEITURA', 2.0),
+        tentativas=getattr(settings, 'VIACEP_TENTATIVAS', 2),
+        prazo_total=getattr(settings, 'VIACEP_PRAZO_TOTAL', 4.0),
+        limite_falhas=getattr(settings, 'VIACEP_DISJUNTOR_FALHAS', 5),
+        tempo_espera=getattr(settings, 'VIACEP_DISJUNTOR_ESPERA', 30.0),
+        tamanho_pool_async=getattr(settings, 'VIACEP_POOL_ASYNC_TAMANHO', 100),
+    )
+
+
+def _url(cep_limpo):
+    return getattr(settings, 'VIACEP_URL', VIACEP_URL).format(cep=cep_limpo)
+
+
+def consultar_viacep(cep_limpo):
+    """
+    Consulta o ViaCEP para um CEP com 8 dígitos.
+    Retorna o dicionário de endereço, None se o CEP não existir
+    ou levanta ViaCepIndisponivel se o serviço não respondeu.
+    """
+    try:
+        response = cliente_viacep().get(_url(cep_limpo))
+    except ErroHTTP as e:
+        logger.warning(f"ViaCEP indisponível para {cep_limpo}: {e}")
+        raise ViaCepIndisponivel(str(e)) from e
+    return _interpretar_resposta(response)
+
+
+async def consultar_viacep_async(cep_limpo):
+    """Versão assíncrona de ``consultar_viacep``"""
+    try:
+        response = await cliente_viacep().aget(_url(cep_limpo))
+    except ErroHTTP as e:
+        logger.warning(f"ViaCEP indisponível para {cep_limpo}: {e}")
+        raise ViaCepIndisponivel(str(e)) from e
+    return _interpretar_resposta(response)
+
+
+def _interpretar_resposta(response):
+    """Converte a resposta (requests ou httpx) no dicionário de endereço"""
+    if response.status_code == 400:
+        # CEP com formato inválido para o ViaCEP
+        return None
+    if response.status_code != 200:
+        raise ViaCepIndisponivel(f"HTTP {response.status_code}")
+
+    try:
+        dados = response.json()
+    except ValueError as e:
+        raise ViaCepIndisponivel('Resposta inválida do ViaCEP') from e
+
+    # Verificar se o CEP foi encontrado
+    if dados.get('erro'):
+        return None
+
+    return {
+        'cep': dados.get('cep'),
+        'logradouro': dados.get('logradouro'),
+        'bairro': dados.get('bairro'),
+        'cidade': dados.get('localidade'),
+        'uf': dados.get('uf'),
+        'complemento': dados.get('complemento')
+    }
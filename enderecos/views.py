@@ -0,0 +1,20 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
+
+from utils.http import exportar_metricas
+
+
+def metricas(request):
+    """Métricas dos clientes HTTP (ViaCEP) no formato texto do Prometheus"""
+    token = getattr(settings, 'METRICAS_TOKEN', '')
+    autorizacao = request.headers.get('Authorization', '')
+    token_valido = bool(token) and hmac.compare_digest(autorizacao, f'Bearer {token}')
+    if not (token_valido or request.user.is_staff):
+        return HttpResponse('Não autorizado', status=401, content_type='text/plain; charset=utf-8')
+
+    # Garante que o cliente exista mesmo antes da primeira consulta
+    from .viacep import cliente_viacep
+    cliente_viacep()
+    return HttpResponse(exportar_metricas(), content_type='text/plain; version=0.0.4; charset=utf-8')
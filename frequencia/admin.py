@@ -1,6 +1,26 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Professor, Turma, Frequencia
+from django.db.models import Count, Q
+from .models import Professor, Turma, Feriado, Aula, Frequencia, ResumoTurmaDia, ResumoAtletaMes
+from utils.filtros_admin import FiltroDataCriacaoUUID7
+
+
+class FiltroRelacionadoComNome(admin.RelatedFieldListFilter):
+    """Filtro por FK cujo __str__ usa outra FK: as opções vêm com ``relacionados`` na mesma consulta"""
+    relacionados = ()
+    
+    def field_choices(self, field, request, model_admin):
+        ordering = self.field_admin_ordering(field, request, model_admin)
+        objetos = field.remote_field.model._default_manager.select_related(*self.relacionados).order_by(*ordering)
+        return [(objeto.pk, str(objeto)) for objeto in objetos]
+
+
+class FiltroProfessor(FiltroRelacionadoComNome):
+    relacionados = ('usuario',)
+
+
+class FiltroTurma(FiltroRelacionadoComNome):
+    relacionados = ('modalidade',)
 
 
 @admin.register(Professor)
@@ -9,9 +29,10 @@ class ProfessorAdmin(admin.ModelAdmin):
         'usuario_link', 'graduacao', 'modalidades_display', 
         'ativo', 'data_cadastro'
     ]
-    list_filter = ['ativo', 'graduacao', 'modalidades', 'data_cadastro']
+    list_filter = ['ativo', 'graduacao', 'modalidades', ('data_cadastro', FiltroDataCriacaoUUID7)]
     search_fields = ['usuario__first_name', 'usuario__last_name', 'usuario__email', 'graduacao']
     readonly_fields = ['id', 'data_cadastro', 'data_atualizacao']
+    list_select_related = ['usuario']
     
     fieldsets = (
         ('Informações Básicas', {
@@ -38,6 +59,10 @@ class ProfessorAdmin(admin.ModelAdmin):
     usuario_link.short_description = 'Usuário'
     usuario_link.admin_order_field = 'usuario__first_name'
     
+    def get_queryset(self, request):
+        # Modalidades de todos os professores da página em uma consulta
+        return super().get_queryset(request).prefetch_related('modalidades')
+    
     def modalidades_display(self, obj):
         """Exibe as modalidades de forma legível"""
         return ', '.join([modalidade.nome for modalidade in obj.modalidades.all()])
@@ -50,9 +75,12 @@ class TurmaAdmin(admin.ModelAdmin):
         'nome', 'modalidade', 'professor_link', 'dias_semana_display',
         'horario_display', 'capacidade_maxima', 'ativa'
     ]
-    list_filter = ['ativa', 'modalidade', 'professor', 'dias_semana', 'data_criacao']
+    list_filter = [
+        'ativa', 'modalidade', ('professor', FiltroProfessor), 'dias_semana', ('data_criacao', FiltroDataCriacaoUUID7)
+    ]
     search_fields = ['nome', 'modalidade__nome', 'professor__usuario__first_name']
     readonly_fields = ['id', 'data_criacao', 'data_atualizacao']
+    list_select_related = ['modalidade', 'professor__usuario']
     
     fieldsets = (
         ('Informações Básicas', {
@@ -97,10 +125,145 @@ class TurmaAdmin(admin.ModelAdmin):
         return ', '.join(dias)
     dias_semana_display.short_description = 'Dias da Semana'
     
+    def save_model(self, request, obj, form, change):
+        # Horário diferente do da turma: fica, mesmo que o horário da turma mude depois
+        obj.horario_personalizado = (obj.horario_inicio, obj.horario_fim) != (
+            obj.turma.horario_inicio, obj.turma.horario_fim
+        )
+        super().save_model(request, obj, form, change)
+    
+    def horario_display(self, obj):
+        """Exibe o horário de forma legível"""
+        return f"{obj.horario_inicio.strftime('%H:%M')} - {obj.horario_fim.strftime('%H:%M')}"
+    horario_display.short_description = 'Horário'
+
+
+@admin.register(Feriado)
+class FeriadoAdmin(admin.ModelAdmin):
+    list_display = ['data', 'descricao', 'aulas_canceladas']
+    search_fields = ['descricao']
+    date_hierarchy = 'data'
+    readonly_fields = ['id', 'data_criacao']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(total_aulas=Count('aulas'))
+    
+    def aulas_canceladas(self, obj):
+        """Aulas canceladas pelo feriado"""
+        return obj.total_aulas
+    aulas_canceladas.short_description = 'Aulas Canceladas'
+    aulas_canceladas.admin_order_field = 'total_aulas'
+
+
+class FrequenciaInline(admin.TabularInline):
+    """Lista de presença da aula"""
+    model = Frequencia
+    fields = ['atleta', 'data_entrada', 'data_saida', 'status']
+    readonly_fields = ['atleta', 'data_entrada', 'data_saida']
+    extra = 0
+    can_delete = False
+    show_change_link = True
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('atleta')
+
+
+@admin.register(Aula)
+class AulaAdmin(admin.ModelAdmin):
+    list_display = [
+        'data', 'horario_display', 'turma', 'professor', 'presentes', 'cancelada'
+    ]
+    list_filter = [
+        'cancelada', 'turma__modalidade', ('turma', FiltroTurma), ('professor', FiltroProfessor), 'data'
+    ]
+    search_fields = ['turma__nome', 'motivo_cancelamento']
+    readonly_fields = ['id', 'turma', 'data', 'feriado', 'data_criacao', 'data_atualizacao']
+    date_hierarchy = 'data'
+    list_select_related = ['turma__modalidade', 'professor__usuario']
+    inlines = [FrequenciaInline]
+    actions = ['cancelar_aulas', 'reativar_aulas']
+    
+    fieldsets = (
+        ('Aula', {
+            'fields': ('turma', 'data', 'horario_inicio', 'horario_fim', 'professor')
+        }),
+        ('Cancelamento', {
+            'fields': ('cancelada', 'motivo_cancelamento', 'feriado')
+        }),
+        ('Metadados', {
+            'fields': ('id', 'data_criacao', 'data_atualizacao'),
+            'classes': ('collapse',)
+        }),
+    )
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            total_presentes=Count('frequencias', filter=Q(frequencias__status__in=['presente', 'atrasado']))
+        )
+    
+    def save_model(self, request, obj, form, change):
+        # Horário diferente do da turma: fica, mesmo que o horário da turma mude depois
+        obj.horario_personalizado = (obj.horario_inicio, obj.horario_fim) != (
+            obj.turma.horario_inicio, obj.turma.horario_fim
+        )
+        super().save_model(request, obj, form, change)
+    
     def horario_display(self, obj):
         """Exibe o horário de forma legível"""
         return f"{obj.horario_inicio.strftime('%H:%M')} - {obj.horario_fim.strftime('%H:%M')}"
     horario_display.short_description = 'Horário'
+    horario_display.admin_order_field = 'horario_inicio'
+    
+    def presentes(self, obj):
+        """Atletas presentes (inclui atrasados)"""
+        return obj.total_presentes
+    presentes.short_description = 'Presentes'
+    presentes.admin_order_field = 'total_presentes'
+    
+    @admin.action(description='Cancelar aulas selecionadas')
+    def cancelar_aulas(self, request, queryset):
+        # save() em cada aula: os sinais avisam o check-in
+        for aula in queryset.filter(cancelada=False):
+            aula.cancelada = True
+            aula.motivo_cancelamento = aula.motivo_cancelamento or 'Cancelada pela administração'
+            aula.save(update_fields=['cancelada', 'motivo_cancelamento', 'data_atualizacao'])
+    
+    @admin.action(description='Reativar aulas selecionadas')
+    def reativar_aulas(self, request, queryset):
+        for aula in queryset.filter(cancelada=True):
+            aula.cancelada = False
+            aula.motivo_cancelamento = ''
+            aula.feriado = None
+            aula.save(update_fields=['cancelada', 'motivo_cancelamento', 'feriado', 'data_atualizacao'])
+
+
+class FiltroAtraso(admin.SimpleListFilter):
+    """
+    Filtra pelo atraso da entrada (anotação ``atraso`` de
+    Frequencia.objects.com_tempos()). Faltas e justificadas não têm atraso
+    e não entram em nenhuma faixa, como em relatorios.chegadas_atrasadas.
+    """
+    title = 'Atraso'
+    parameter_name = 'atraso'
+    
+    FAIXAS = {
+        'no_horario': ('No horário', {'atraso': 0}),
+        'ate_10': ('Até 10 min', {'atraso__gt': 0, 'atraso__lte': 10}),
+        'ate_30': ('De 11 a 30 min', {'atraso__gt': 10, 'atraso__lte': 30}),
+        'mais_30': ('Mais de 30 min', {'atraso__gt': 30}),
+    }
+    
+    def lookups(self, request, model_admin):
+        return [(valor, rotulo) for valor, (rotulo, _) in self.FAIXAS.items()]
+    
+    def queryset(self, request, queryset):
+        faixa = self.FAIXAS.get(self.value())
+        if faixa:
+            return queryset.filter(**faixa[1])
+        return queryset
 
 
 @admin.register(Frequencia)
@@ -110,20 +273,21 @@ class FrequenciaAdmin(admin.ModelAdmin):
         'horario_saida', 'status', 'duracao_display', 'atraso_display'
     ]
     list_filter = [
-        'status', 'turma__modalidade', 'turma__professor', 
-        'data_aula', 'data_registro'
+        'status', FiltroAtraso, 'turma__modalidade', ('turma__professor', FiltroProfessor), 
+        'data_aula', ('data_registro', FiltroDataCriacaoUUID7)
     ]
     search_fields = [
         'atleta__nome', 'turma__nome', 'qr_code_utilizado'
     ]
     readonly_fields = [
-        'id', 'data_registro', 'data_atualizacao', 'duracao_aula', 'atraso_minutos'
+        'id', 'aula', 'data_registro', 'data_atualizacao', 'duracao_aula', 'atraso_minutos'
     ]
     date_hierarchy = 'data_aula'
+    list_select_related = ['atleta', 'turma']
     
     fieldsets = (
         ('Informações da Aula', {
-            'fields': ('atleta', 'turma', 'professor', 'data_aula')
+            'fields': ('atleta', 'turma', 'professor', 'data_aula', 'aula')
         }),
         ('Controle de Entrada/Saída', {
             'fields': ('data_entrada', 'data_saida', 'status', 'qr_code_utilizado')
@@ -141,6 +305,10 @@ class FrequenciaAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        # Duração e atraso calculados no banco: ordenáveis e filtráveis
+        return super().get_queryset(request).com_tempos()
+    
     def atleta_link(self, obj):
         """Exibe link para o atleta"""
         if obj.atleta:
@@ -186,14 +354,68 @@ class FrequenciaAdmin(admin.ModelAdmin):
             return f"{duracao} min"
         return '-'
     duracao_display.short_description = 'Duração'
+    duracao_display.admin_order_field = 'duracao'
     
     def atraso_display(self, obj):
         """Exibe o atraso (se houver)"""
         atraso = obj.atraso_minutos
-        if atraso > 0:
+        if atraso:
             return format_html(
                 '<span style="color: red;">{} min</span>',
                 atraso
             )
         return '-'
     atraso_display.short_description = 'Atraso'
+    atraso_display.admin_order_field = 'atraso'
+
+
+class ResumoAdmin(admin.ModelAdmin):
+    """Resumos são mantidos por frequencia.resumos: somente leitura"""
+    readonly_fields = ['presentes', 'ausentes', 'atrasados', 'justificados', 'duracao', 'data_atualizacao']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+    
+    def taxa_display(self, obj):
+        """Exibe a taxa de presença"""
+        taxa = obj.taxa_presenca
+        return f"{taxa}%" if taxa is not None else '-'
+    taxa_display.short_description = 'Presença'
+    
+    def minutos_display(self, obj):
+        """Tempo em aula, em minutos"""
+        return obj.minutos
+    minutos_display.short_description = 'Minutos'
+    minutos_display.admin_order_field = 'duracao'
+
+
+@admin.register(ResumoTurmaDia)
+class ResumoTurmaDiaAdmin(ResumoAdmin):
+    list_display = [
+        'data', 'turma', 'presentes', 'atrasados', 'ausentes', 'justificados', 'minutos_display', 'taxa_display'
+    ]
+    list_filter = ['turma__modalidade', ('turma', FiltroTurma)]
+    date_hierarchy = 'data'
+    list_select_related = ['turma__modalidade']
+
+
+@admin.register(ResumoAtletaMes)
+class ResumoAtletaMesAdmin(ResumoAdmin):
+    list_display = [
+        'mes_display', 'atleta', 'presentes', 'atrasados', 'ausentes', 'justificados', 'minutos_display', 'taxa_display'
+    ]
+    search_fields = ['atleta__nome']
+    date_hierarchy = 'mes'
+    list_select_related = ['atleta__usuario']
+    
+    def mes_display(self, obj):
+        """Exibe o mês"""
+        return obj.mes.strftime('%m/%Y')
+    mes_display.short_description = 'Mês'
+    mes_display.admin_order_field = 'mes'
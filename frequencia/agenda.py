@@ -0,0 +1,127 @@
+"""
+Agenda das turmas: qual turma está acontecendo em um dia da semana e minuto.
+
+Turma.dias_mask tem um bit por dia da semana (bit 0 = segunda, como
+datetime.weekday()). A agenda separa as turmas ativas por dia e guarda, para
+cada dia, os minutos em que o conjunto de turmas abertas muda (limites,
+ordenados) e as turmas abertas em cada trecho entre dois limites. Achar as
+turmas de um (dia, minuto) é uma busca binária nos limites, sem percorrer as
+turmas do dia.
+
+Uma turma fica "aberta" de ANTECEDENCIA_ENTRADA minutos antes do início até
+TOLERANCIA_SAIDA minutos depois do fim (a janela do check-in); o horário
+estrito da aula é conferido sobre essas candidatas.
+
+Uma aula do dia com horário próprio (Aula remarcada no admin, ver
+frequencia.calendario.aulas_do_dia) abre a janela pelo horário da aula, não
+pelo da turma: ``turma_atual`` recebe as aulas do dia e devolve a turma com
+o início e o fim da aula.
+
+A agenda é remontada quando alguma Turma muda (frequencia.signals).
+"""
+from bisect import bisect_right
+from collections import namedtuple
+
+from django.utils import timezone
+
+from .indice import IndiceVersionado
+
+# Janela da leitura em torno do horário da turma, em minutos
+ANTECEDENCIA_ENTRADA = 30
+TOLERANCIA_SAIDA = 30
+
+MINUTOS_DIA = 24 * 60
+
+# inicio e fim em minutos do dia
+TurmaIndice = namedtuple('TurmaIndice', 'id nome modalidade_id professor_id inicio fim')
+
+
+def _minutos(horario):
+    return horario.hour * 60 + horario.minute
+
+
+class AgendaTurmas:
+    """Limites e trechos por dia da semana (somente leitura depois de montada)"""
+
+    def __init__(self, turmas):
+        """``turmas``: pares (TurmaIndice, dias_mask)"""
+        self.limites = []
+        self.trechos = []
+        self.turmas = {turma.id: turma for turma, _ in turmas}
+        for dia in range(7):
+            janelas = [
+                (max(0, turma.inicio - ANTECEDENCIA_ENTRADA), min(MINUTOS_DIA, turma.fim + TOLERANCIA_SAIDA + 1), turma)
+                for turma, mascara in turmas if mascara >> dia & 1
+            ]
+            limites = sorted({abertura for abertura, _, _ in janelas} | {fechamento for _, fechamento, _ in janelas})
+            self.limites.append(limites)
+            self.trechos.append([
+                tuple(sorted(
+                    (turma for abertura, fechamento, turma in janelas if abertura <= limite < fechamento),
+                    key=lambda turma: turma.inicio,
+                ))
+                for limite in limites
+            ])
+
+    @classmethod
+    def montar(cls):
+        from .models import Turma
+
+        campos = ('id', 'nome', 'modalidade_id', 'professor_id', 'horario_inicio', 'horario_fim', 'dias_mask')
+        # order_by() vazio: a ordenação padrão de Turma faria JOIN com Modalidade
+        return cls([
+            (TurmaIndice(turma_id, nome, modalidade_id, professor_id, _minutos(inicio), _minutos(fim)), mascara)
+            for turma_id, nome, modalidade_id, professor_id, inicio, fim, mascara
+            in Turma.objects.filter(ativa=True, dias_mask__gt=0).order_by().values_list(*campos)
+        ])
+
+    def abertas(self, dia_semana, minuto):
+        """Turmas com a janela aberta no dia (0 = segunda) e minuto do dia, pelo início"""
+        posicao = bisect_right(self.limites[dia_semana], minuto) - 1
+        return self.trechos[dia_semana][posicao] if posicao >= 0 else ()
+
+    def turma_atual(self, modalidades, momento_local, aulas=None):
+        """
+        Turma de uma das modalidades informadas cuja janela contém o momento.
+        Havendo mais de uma, a de início mais próximo. ``aulas`` (turma_id ->
+        AulaIndice, as aulas do dia): as remarcadas valem pelo horário da
+        aula, e a turma devolvida traz esse início e fim.
+        """
+        minuto = momento_local.hour * 60 + momento_local.minute
+        aulas = aulas or {}
+        candidatas = [
+            turma for turma in self.abertas(momento_local.weekday(), minuto)
+            if turma.modalidade_id in modalidades and not (turma.id in aulas and aulas[turma.id].remarcada)
+        ]
+        for turma_id, aula in aulas.items():
+            turma = self.turmas.get(turma_id) if aula.remarcada else None
+            if turma is not None and turma.modalidade_id in modalidades \
+                    and aula.inicio - ANTECEDENCIA_ENTRADA <= minuto <= aula.fim + TOLERANCIA_SAIDA:
+                candidatas.append(turma._replace(inicio=aula.inicio, fim=aula.fim))
+        if not candidatas:
+            return None
+        return min(candidatas, key=lambda turma: abs(minuto - turma.inicio))
+
+    def em_andamento(self, momento_local, professor_id=None):
+        """Turmas em aula no momento (entre início e fim), opcionalmente de um professor"""
+        minuto = momento_local.hour * 60 + momento_local.minute
+        return [
+            turma for turma in self.abertas(momento_local.weekday(), minuto)
+            if turma.inicio <= minuto < turma.fim and (professor_id is None or turma.professor_id == professor_id)
+        ]
+
+
+_agenda = IndiceVersionado('Agenda de turmas', 'frequencia:agenda:versao', AgendaTurmas.montar)
+
+
+def invalidar_agenda():
+    _agenda.invalidar()
+
+
+def agenda_turmas():
+    return _agenda.atual()
+
+
+def turmas_em_andamento(momento=None, professor_id=None):
+    """Turmas em aula agora (ou no momento informado), para as telas do professor e dos responsáveis"""
+    return agenda_turmas().em_andamento(timezone.localtime(momento or timezone.now()), professor_id)
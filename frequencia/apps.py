@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class FrequenciaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'frequencia'
+
+    def ready(self):
+        # Conecta os sinais que invalidam o índice de check-in
+        from . import signals
@@ -0,0 +1,266 @@
+"""
+Calendário de aulas: as ocorrências (Aula) de cada turma.
+
+As aulas são geradas a partir de Turma.dias_mask e do horário da turma, de
+hoje até AULAS_SEMANAS_A_FRENTE semanas à frente. A geração é incremental
+(só cria as que faltam) e roda todo dia pela tarefa gerar_aulas_task; uma
+turma nova ou alterada tem as aulas futuras refeitas na hora
+(frequencia.signals).
+
+Cancelamentos:
+  - uma aula pode ser cancelada no admin (cancelada + motivo);
+  - um Feriado cancela as aulas da data, inclusive as geradas depois dele,
+    e as reativa se for excluído ou mudar de data.
+
+Faltas: depois que a janela de leitura de uma aula fecha, registrar_ausencias
+lança "ausente" para cada atleta elegível da turma que não tem registro na
+aula (tarefa registrar_ausencias_task, agendada em CELERY_BEAT_SCHEDULE).
+A matrícula é por modalidade, não por turma; o atleta conta como da turma
+quando ela é a única turma ativa da modalidade ou quando ele já teve uma
+entrada (presente ou atrasado) nela antes da aula. Um atleta que nunca
+apareceu numa modalidade com várias turmas (faixas etárias, horários) não
+recebe falta em nenhuma delas. Aula.ausencias_registradas marca as aulas já
+fechadas.
+
+Frequencia.aula liga cada presença à ocorrência. No check-in, as aulas do
+dia vêm de um mapa turma -> aula lido uma vez e guardado no processo
+(``aulas_do_dia``), versionado no cache como os índices de
+frequencia.indice. Uma aula pode ter horário próprio (alterado no admin,
+Aula.horario_personalizado): a janela do check-in, o status de atraso, o
+atraso calculado (Frequencia.objects.com_tempos) e o fechamento das faltas
+seguem o horário da aula.
+"""
+import logging
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from .agenda import TOLERANCIA_SAIDA
+from .indice import INDICE_IDADE_MAXIMA
+
+logger = logging.getLogger(__name__)
+
+CHAVE_VERSAO = 'frequencia:aulas:versao'
+
+# inicio e fim em minutos do dia; remarcada: horário diferente do da turma
+AulaIndice = namedtuple('AulaIndice', 'id cancelada professor_id inicio fim remarcada')
+
+
+def _motivo_feriado(descricao):
+    return f'Feriado: {descricao}'[:200]
+
+
+def gerar_aulas(semanas=None, hoje=None, turmas=None):
+    """
+    Cria as aulas que faltam de ``hoje`` até ``semanas`` semanas à frente
+    (padrão AULAS_SEMANAS_A_FRENTE), para todas as turmas ativas ou só para
+    ``turmas``. Devolve quantas aulas foram criadas.
+    """
+    from .models import Aula, Feriado, Turma
+
+    hoje = hoje or timezone.localdate()
+    fim = hoje + timedelta(weeks=semanas or settings.AULAS_SEMANAS_A_FRENTE)
+    if turmas is None:
+        turmas = Turma.objects.filter(ativa=True, dias_mask__gt=0)
+    campos = ('id', 'professor_id', 'dias_mask', 'horario_inicio', 'horario_fim')
+    turmas = list(turmas.order_by().values_list(*campos))
+    feriados = {data: (feriado_id, descricao) for feriado_id, data, descricao in
+                Feriado.objects.filter(data__range=(hoje, fim)).values_list('id', 'data', 'descricao')}
+    existentes = set(
+        Aula.objects.filter(data__range=(hoje, fim), turma_id__in=[turma[0] for turma in turmas])
+        .order_by().values_list('turma_id', 'data')
+    )
+
+    novas = []
+    for turma_id, professor_id, mascara, inicio, fim_aula in turmas:
+        data = hoje
+        while data <= fim:
+            if mascara >> data.weekday() & 1 and (turma_id, data) not in existentes:
+                feriado_id, descricao = feriados.get(data, (None, ''))
+                novas.append(Aula(
+                    turma_id=turma_id, professor_id=professor_id, data=data,
+                    horario_inicio=inicio, horario_fim=fim_aula,
+                    cancelada=feriado_id is not None, feriado_id=feriado_id,
+                    motivo_cancelamento=_motivo_feriado(descricao) if feriado_id else '',
+                ))
+            data += timedelta(days=1)
+
+    # ignore_conflicts: outra geração simultânea pode ter criado a mesma (turma, data)
+    Aula.objects.bulk_create(novas, batch_size=500, ignore_conflicts=True)
+    if novas:
+        transaction.on_commit(invalidar_aulas)
+    return len(novas)
+
+
+def sincronizar_aulas_turma(turma_id):
+    """
+    Refaz as aulas futuras de uma turma depois de uma alteração: apaga as
+    de dias que saíram do horário (ou todas, se a turma foi desativada),
+    atualiza horário e professor das demais e gera as que faltam. Aulas com
+    frequência registrada não são tocadas, e as com horário alterado no
+    admin (Aula.horario_personalizado) mantêm o horário.
+    """
+    from .models import Aula, Turma
+
+    turma = Turma.objects.filter(id=turma_id).first()
+    if turma is None:
+        return
+    futuras = Aula.objects.filter(turma_id=turma_id, data__gte=timezone.localdate(), frequencias__isnull=True)
+    if not turma.ativa or not turma.dias_mask:
+        futuras.delete()
+    else:
+        # iso_week_day: 1 = segunda ... 7 = domingo; o bit 0 de dias_mask é segunda
+        dias = [dia + 1 for dia in range(7) if turma.dias_mask >> dia & 1]
+        futuras.exclude(data__iso_week_day__in=dias).delete()
+        Aula.objects.filter(id__in=futuras.values('id')).update(professor_id=turma.professor_id)
+        Aula.objects.filter(id__in=futuras.filter(horario_personalizado=False).values('id')).update(
+            horario_inicio=turma.horario_inicio, horario_fim=turma.horario_fim,
+        )
+        gerar_aulas(turmas=Turma.objects.filter(id=turma_id))
+    transaction.on_commit(invalidar_aulas)
+
+
+def aplicar_feriado(feriado):
+    """Cancela as aulas da data do feriado e reativa as que ele cancelou em outra data"""
+    from .models import Aula
+
+    Aula.objects.filter(feriado=feriado).exclude(data=feriado.data).update(
+        cancelada=False, feriado=None, motivo_cancelamento=''
+    )
+    Aula.objects.filter(data=feriado.data, cancelada=False).update(
+        cancelada=True, feriado=feriado, motivo_cancelamento=_motivo_feriado(feriado.descricao)
+    )
+    transaction.on_commit(invalidar_aulas)
+
+
+def remover_feriado(feriado):
+    """Reativa as aulas canceladas pelo feriado (antes de excluí-lo)"""
+    from .models import Aula
+
+    Aula.objects.filter(feriado=feriado).update(cancelada=False, feriado=None, motivo_cancelamento='')
+    transaction.on_commit(invalidar_aulas)
+
+
+def registrar_ausencias(momento=None):
+    """
+    Lança as faltas das aulas encerradas até ``momento`` (padrão: agora)
+    que ainda não foram fechadas. Os pares (aula, atleta) sem registro saem
+    de uma única consulta: aulas não canceladas x matrículas elegíveis da
+    modalidade da turma, vigentes na data, de atletas da turma (única turma
+    ativa da modalidade ou entrada anterior nela), sem Frequencia na
+    (turma, data).
+    Os registros "ausente" entram com bulk_create; ignore_conflicts em
+    (atleta, turma, data_aula) torna a execução repetível. Devolve
+    ``(aulas fechadas, faltas lançadas)``.
+    """
+    from .models import STATUS_COM_ENTRADA, Aula, Frequencia, Turma
+    from .resumos import atualizar_resumos
+
+    # Janela de leitura fechada: fim da aula + TOLERANCIA_SAIDA
+    limite = timezone.localtime(momento) - timedelta(minutes=TOLERANCIA_SAIDA)
+    aulas = list(
+        Aula.objects.filter(ausencias_registradas=False, data__lte=limite.date())
+        .filter(Q(data__lt=limite.date()) | Q(horario_fim__lte=limite.time()))
+        .order_by().values_list('id', flat=True)
+    )
+    if not aulas:
+        return 0, 0
+
+    matricula = 'turma__modalidade__matricula'
+    # Vínculo atleta-turma: a matrícula só diz a modalidade
+    unica_turma = ~Exists(Turma.objects.filter(
+        modalidade_id=OuterRef('turma__modalidade_id'), ativa=True,
+    ).exclude(id=OuterRef('turma_id')))
+    ja_frequentou = Exists(Frequencia.objects.filter(
+        atleta_id=OuterRef(f'{matricula}__atleta_id'), turma_id=OuterRef('turma_id'),
+        data_aula__lt=OuterRef('data'), status__in=STATUS_COM_ENTRADA,
+    ))
+    pares = (
+        Aula.objects.filter(id__in=aulas, cancelada=False)
+        # Tudo no mesmo filter(): as condições valem para a mesma matrícula
+        .filter(
+            Q(**{f'{matricula}__data_inicio__isnull': True}) | Q(**{f'{matricula}__data_inicio__lte': F('data')}),
+            Q(**{f'{matricula}__data_fim__isnull': True}) | Q(**{f'{matricula}__data_fim__gte': F('data')}),
+            ~Exists(Frequencia.objects.filter(
+                atleta_id=OuterRef(f'{matricula}__atleta_id'), turma_id=OuterRef('turma_id'),
+                data_aula=OuterRef('data'),
+            )),
+            unica_turma | ja_frequentou,
+            **{
+                f'{matricula}__ativa': True,
+                f'{matricula}__status_matricula__nome__in': settings.FREQUENCIA_STATUS_ELEGIVEIS,
+            },
+        )
+        .order_by().distinct()
+        .values_list(
+            'id', 'turma_id', 'professor_id', 'data', 'horario_inicio',
+            f'{matricula}__atleta_id', f'{matricula}__atleta__codigo_alfanumerico',
+        )
+    )
+    ausencias = [
+        Frequencia(
+            atleta_id=atleta_id, turma_id=turma_id, aula_id=aula_id, professor_id=professor_id,
+            data_aula=data, status='ausente', qr_code_utilizado=codigo,
+            # data_entrada é obrigatória: a falta fica com o horário de início da aula
+            data_entrada=timezone.make_aware(datetime.combine(data, inicio)),
+            observacoes='Falta lançada automaticamente',
+        )
+        for aula_id, turma_id, professor_id, data, inicio, atleta_id, codigo in pares
+    ]
+    with transaction.atomic():
+        Frequencia.objects.bulk_create(ausencias, batch_size=500, ignore_conflicts=True)
+        Aula.objects.filter(id__in=aulas).update(ausencias_registradas=True)
+        atualizar_resumos((falta.atleta_id, falta.turma_id, falta.data_aula) for falta in ausencias)
+    return len(aulas), len(ausencias)
+
+
+def invalidar_aulas():
+    """Faz os processos relerem as aulas do dia (chamado depois do commit)"""
+    try:
+        cache.incr(CHAVE_VERSAO)
+    except ValueError:
+        cache.set(CHAVE_VERSAO, 1, None)
+
+
+_aulas_por_dia = {}
+
+
+def _minutos(horario):
+    return horario.hour * 60 + horario.minute
+
+
+def aulas_do_dia(data):
+    """
+    turma_id -> AulaIndice(id, cancelada, professor_id, inicio, fim,
+    remarcada) das aulas da data, guardado no processo. O check-in usa o
+    horário da aula (agenda.turma_atual), não o da turma.
+    """
+    from .models import Aula
+
+    versao = cache.get(CHAVE_VERSAO, 0)
+    guardado = _aulas_por_dia.get(data)
+    if guardado is not None and guardado[0] == versao and time.monotonic() - guardado[1] < INDICE_IDADE_MAXIMA:
+        return guardado[2]
+    campos = (
+        'turma_id', 'id', 'cancelada', 'professor_id', 'horario_inicio', 'horario_fim',
+        'turma__horario_inicio', 'turma__horario_fim',
+    )
+    aulas = {
+        turma_id: AulaIndice(
+            aula_id, cancelada, professor_id, _minutos(inicio), _minutos(fim),
+            (inicio, fim) != (turma_inicio, turma_fim),
+        )
+        for turma_id, aula_id, cancelada, professor_id, inicio, fim, turma_inicio, turma_fim in
+        Aula.objects.filter(data=data).order_by().values_list(*campos)
+    }
+    if len(_aulas_por_dia) > 7:
+        # Só alguns dias ficam guardados (hoje e os de leituras sincronizadas com atraso)
+        _aulas_por_dia.clear()
+    _aulas_por_dia[data] = (versao, time.monotonic(), aulas)
+    return aulas
@@ -0,0 +1,154 @@
+"""
+Registro de entrada/saída a partir da leitura do QR Code na portaria.
+
+Fluxo de uma leitura:
+  1. o código é conferido pelo verificador (usuarios.codigos), sem banco;
+  2. atleta, modalidades em que ele pode treinar e turma em andamento vêm
+     de índices em memória (frequencia.indice, frequencia.elegibilidade e
+     frequencia.agenda), sem banco. A turma em andamento usa as aulas do
+     dia (frequencia.calendario, mapa também em memória): uma aula
+     remarcada abre a janela e conta o atraso pelo horário dela;
+  3. aula cancelada recusa a leitura;
+  4. a Frequencia é gravada com um único INSERT. Se já existe registro do
+     atleta na turma e dia (unique_together), a leitura vira saída, com um
+     UPDATE condicional; se o registro é uma falta (lançada ou
+     justificada), a leitura vira a entrada. Os resumos
+     (frequencia.resumos) são atualizados na mesma transação.
+
+O resultado é um dicionário no formato das tarefas do projeto
+(``{'status', 'message', ...}``), convertido em JSON pela view.
+"""
+import logging
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from usuarios.codigos import codigo_valido
+
+from .elegibilidade import modalidades_elegiveis
+from .agenda import agenda_turmas
+from .calendario import aulas_do_dia
+from .indice import indice_checkin
+from .models import STATUS_COM_ENTRADA, Frequencia
+from .resumos import atualizar_resumos, somar_aos_resumos
+
+logger = logging.getLogger(__name__)
+
+# Entradas depois de início + TOLERANCIA_ATRASO minutos ficam como "atrasado"
+TOLERANCIA_ATRASO = 10
+# Leituras repetidas dentro deste intervalo após a entrada não contam como saída
+INTERVALO_MINIMO_SAIDA = timedelta(minutes=10)
+
+
+def status_da_entrada(turma, momento_local):
+    """
+    "presente" ou "atrasado" para uma entrada na turma devolvida por
+    ``agenda.turma_atual`` (início da aula do dia, ou da turma sem aula: o
+    mesmo de Frequencia.objects.com_tempos, então o status e o atraso
+    calculado concordam).
+    """
+    minuto = momento_local.hour * 60 + momento_local.minute
+    return 'atrasado' if minuto - turma.inicio > TOLERANCIA_ATRASO else 'presente'
+
+
+def normalizar_codigo(codigo):
+    """Leitores costumam enviar espaços, quebras de linha ou minúsculas"""
+    return (codigo or '').strip().upper()
+
+
+def localizar_leitura(codigo, momento):
+    """
+    Passos 1 a 3 do fluxo, sem banco. Retorna ``(recusa, atleta, turma, aula)``:
+    ``recusa`` é o resultado a devolver quando a leitura não tem aula
+    (codigo_invalido, atleta_nao_encontrado, sem_turma ou aula_cancelada),
+    senão None. ``aula`` é None se o calendário ainda não tem a aula.
+    """
+    if not codigo_valido(codigo):
+        return {'status': 'codigo_invalido', 'message': 'Código não reconhecido'}, None, None, None
+
+    indice = indice_checkin()
+    atleta = indice.atletas.get(codigo)
+    if atleta is None:
+        return {'status': 'atleta_nao_encontrado', 'message': 'Atleta não encontrado'}, None, None, None
+
+    local = timezone.localtime(momento)
+    aulas = aulas_do_dia(local.date())
+    # Com aula remarcada, a turma vem com o horário da aula
+    turma = agenda_turmas().turma_atual(modalidades_elegiveis(codigo), local, aulas)
+    if turma is None:
+        recusa = {
+            'status': 'sem_turma', 'message': 'Nenhuma turma do atleta neste horário',
+            'atleta': atleta.nome,
+        }
+        return recusa, atleta, None, None
+
+    aula = aulas.get(turma.id)
+    if aula is not None and aula.cancelada:
+        recusa = {
+            'status': 'aula_cancelada', 'message': 'A aula desta turma hoje foi cancelada',
+            'atleta': atleta.nome, 'turma': turma.nome,
+        }
+        return recusa, atleta, turma, aula
+    return None, atleta, turma, aula
+
+
+def registrar_leitura(codigo, momento=None):
+    """
+    Registra a entrada ou a saída do atleta dono do código na turma que está
+    acontecendo. Retorna ``{'status': ..., 'message': ..., ...}``, com status:
+    entrada, saida, ja_registrado, codigo_invalido, atleta_nao_encontrado,
+    sem_turma ou aula_cancelada.
+    """
+    codigo = normalizar_codigo(codigo)
+    momento = momento or timezone.now()
+    recusa, atleta, turma, aula = localizar_leitura(codigo, momento)
+    if recusa:
+        return recusa
+
+    local = timezone.localtime(momento)
+    resultado = {'atleta': atleta.nome, 'turma': turma.nome}
+    try:
+        # Registro e resumos (frequencia.signals) na mesma transação; dentro de
+        # outra, vira um savepoint e a falha do INSERT não invalida o restante
+        with transaction.atomic():
+            Frequencia.objects.create(
+                atleta_id=atleta.id, turma_id=turma.id, data_aula=local.date(),
+                aula_id=aula.id if aula else None,
+                professor_id=aula.professor_id if aula else turma.professor_id,
+                data_entrada=momento, qr_code_utilizado=codigo,
+                status=status_da_entrada(turma, local),
+            )
+        return {'status': 'entrada', 'message': 'Entrada registrada', **resultado}
+    except IntegrityError:
+        pass
+
+    # Já existe registro hoje nesta turma: saída (ou leitura repetida)
+    registro = Frequencia.objects.filter(
+        atleta_id=atleta.id, turma_id=turma.id, data_aula=local.date()
+    ).values('id', 'status', 'data_entrada', 'data_saida').first()
+    if registro is None:
+        logger.error(f"[ERRO] Falha ao registrar entrada de {codigo} na turma {turma.id}")
+        return {'status': 'erro', 'message': 'Não foi possível registrar a leitura', **resultado}
+    if registro['status'] not in STATUS_COM_ENTRADA:
+        # Falta lançada (calendario.registrar_ausencias) ou justificada antes da chegada: vira a entrada
+        with transaction.atomic():
+            atualizados = Frequencia.objects.filter(id=registro['id'], status=registro['status']).update(
+                status=status_da_entrada(turma, local), data_entrada=momento, qr_code_utilizado=codigo,
+                observacoes='', data_atualizacao=timezone.now(),
+            )
+            if atualizados:
+                atualizar_resumos([(atleta.id, turma.id, local.date())])
+        if not atualizados:
+            return {'status': 'ja_registrado', 'message': 'Leitura já registrada', **resultado}
+        return {'status': 'entrada', 'message': 'Entrada registrada', **resultado}
+    if registro['data_saida'] or momento - registro['data_entrada'] < INTERVALO_MINIMO_SAIDA:
+        return {'status': 'ja_registrado', 'message': 'Leitura já registrada', **resultado}
+
+    with transaction.atomic():
+        atualizados = Frequencia.objects.filter(id=registro['id'], data_saida__isnull=True).update(data_saida=momento)
+        if atualizados:
+            somar_aos_resumos(atleta.id, turma.id, local.date(), duracao=momento - registro['data_entrada'])
+    if not atualizados:
+        return {'status': 'ja_registrado', 'message': 'Leitura já registrada', **resultado}
+    return {'status': 'saida', 'message': 'Saída registrada', **resultado}
@@ -0,0 +1,195 @@
+"""
+Elegibilidade dos atletas para registrar frequência.
+
+Um atleta é elegível em uma modalidade quando tem nela matrícula ativa com
+status em FREQUENCIA_STATUS_ELEGIVEIS (por padrão só "Ativa": "Pendente" e
+"Suspensa" ainda têm pendências). A estrutura é um dicionário
+``codigo -> Elegibilidade(atleta_id, modalidades)``, usado pela validação de
+Frequencia (admin incluído) e pelo check-in, no lugar de uma consulta a
+Matricula por registro.
+
+O dicionário fica em memória no processo e também no cache compartilhado:
+
+  - a base completa (uma consulta) é guardada no cache junto com a versão em
+    que foi montada, e os outros processos a carregam de lá em vez do banco;
+  - cada alteração de Atleta ou Matricula (sinais em frequencia.signals)
+    recalcula só a entrada daquele atleta e a publica como um delta
+    numerado: a versão é um contador no cache e o delta fica na chave da
+    versão. Quem está na versão N aplica os deltas N+1, N+2... e só volta ao
+    banco se faltar algum;
+  - uma base com mais de ELEGIBILIDADE_IDADE_MAXIMA segundos é remontada do
+    banco (com o LocMemCache padrão os deltas não chegam aos outros
+    processos; é o que os mantém em dia).
+"""
+import logging
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CHAVE_VERSAO = 'frequencia:elegibilidade:versao'
+CHAVE_BASE = 'frequencia:elegibilidade:base'
+CHAVE_DELTA = 'frequencia:elegibilidade:delta:{}'
+# Deltas mais antigos que isto já foram incorporados por uma base remontada
+DELTA_VALIDADE = 24 * 60 * 60
+ELEGIBILIDADE_IDADE_MAXIMA = 300
+
+Elegibilidade = namedtuple('Elegibilidade', 'atleta_id modalidades')
+
+
+def matriculas_elegiveis():
+    """Matrículas que dão direito a registrar frequência"""
+    from usuarios.models import Matricula
+
+    # order_by() vazio: a ordenação padrão de Matricula faria JOIN com Atleta
+    return Matricula.objects.filter(
+        ativa=True, status_matricula__nome__in=settings.FREQUENCIA_STATUS_ELEGIVEIS,
+    ).order_by()
+
+
+def _montar_do_banco():
+    from usuarios.models import Atleta
+
+    modalidades = {}
+    for atleta_id, modalidade_id in matriculas_elegiveis().values_list('atleta_id', 'modalidade_id'):
+        modalidades.setdefault(atleta_id, set()).add(modalidade_id)
+    return {
+        codigo: Elegibilidade(atleta_id, frozenset(modalidades.get(atleta_id, ())))
+        for atleta_id, codigo in Atleta.objects.order_by().values_list('id', 'codigo_alfanumerico')
+    }
+
+
+class _Estado:
+    """Cópia local do dicionário e a versão do cache que ela reflete"""
+
+    def __init__(self, mapa, versao, criado_em):
+        self.mapa = mapa
+        self.versao = versao
+        # time.time() da consulta ao banco, comparável entre processos
+        self.criado_em = criado_em
+
+    @property
+    def vencido(self):
+        return time.time() - self.criado_em >= ELEGIBILIDADE_IDADE_MAXIMA
+
+
+_estado = None
+_lock = threading.Lock()
+
+
+def _versao_atual():
+    return cache.get(CHAVE_VERSAO, 0)
+
+
+def _aplicar_deltas(estado, versao):
+    """Leva o estado até a versão pedida; False se algum delta não está mais no cache"""
+    if versao < estado.versao:
+        # Contador reiniciado (cache limpo ou expirado)
+        return False
+    chaves = [CHAVE_DELTA.format(numero) for numero in range(estado.versao + 1, versao + 1)]
+    deltas = cache.get_many(chaves) if chaves else {}
+    if len(deltas) != len(chaves):
+        return False
+    for chave in chaves:
+        codigo, entrada = deltas[chave]
+        if entrada is None:
+            estado.mapa.pop(codigo, None)
+        else:
+            estado.mapa[codigo] = entrada
+    estado.versao = versao
+    return True
+
+
+def _carregar(versao):
+    """Base do cache compartilhado mais deltas; sem ela, ou faltando deltas, o banco"""
+    base = cache.get(CHAVE_BASE)
+    if base is not None:
+        versao_base, criado_em, mapa = base
+        estado = _Estado(mapa, versao_base, criado_em)
+        if not estado.vencido and _aplicar_deltas(estado, versao):
+            return estado
+    inicio = time.monotonic()
+    # Deltas publicados durante a consulta serão reaplicados depois: cada um traz a entrada inteira
+    estado = _Estado(_montar_do_banco(), versao, time.time())
+    cache.set(CHAVE_BASE, (versao, estado.criado_em, estado.mapa), ELEGIBILIDADE_IDADE_MAXIMA)
+    logger.info(f"[OK] Elegibilidade montada: {len(estado.mapa)} atletas em "
+                f"{(time.monotonic() - inicio) * 1000:.0f} ms")
+    return estado
+
+
+def _mapa():
+    global _estado
+    versao = _versao_atual()
+    estado = _estado
+    if estado is not None and estado.versao == versao and not estado.vencido:
+        return estado.mapa
+    with _lock:
+        estado = _estado
+        if estado is None or estado.vencido:
+            estado = _estado = _carregar(versao)
+        elif estado.versao != versao and not _aplicar_deltas(estado, versao):
+            estado = _estado = _carregar(versao)
+    return estado.mapa
+
+
+def elegibilidade(codigo):
+    """Elegibilidade(atleta_id, modalidades) do dono do código, ou None se não há atleta com ele"""
+    return _mapa().get(codigo)
+
+
+def modalidades_elegiveis(codigo):
+    entrada = elegibilidade(codigo)
+    return entrada.modalidades if entrada else frozenset()
+
+
+def _proxima_versao():
+    try:
+        return cache.incr(CHAVE_VERSAO)
+    except ValueError:
+        # Contador ainda não existe (ou expirou): quem tinha deltas antigos volta ao banco
+        cache.add(CHAVE_VERSAO, 0, None)
+        return cache.incr(CHAVE_VERSAO)
+
+
+def _publicar(codigo, entrada):
+    """Numera o delta no contador do cache e o deixa disponível aos outros processos"""
+    versao = _proxima_versao()
+    cache.set(CHAVE_DELTA.format(versao), (codigo, entrada), DELTA_VALIDADE)
+    with _lock:
+        estado = _estado
+        if estado is not None and estado.versao == versao - 1:
+            _aplicar_deltas(estado, versao)
+
+
+def atualizar_elegibilidade(atleta_id):
+    """Recalcula a entrada de um atleta (chamado depois do commit de Atleta/Matricula)"""
+    from usuarios.models import Atleta
+
+    codigo = Atleta.objects.filter(id=atleta_id).values_list('codigo_alfanumerico', flat=True).first()
+    if codigo is None:
+        # Atleta excluído: a remoção é publicada pelo sinal do próprio Atleta
+        return
+    modalidades = frozenset(
+        matriculas_elegiveis().filter(atleta_id=atleta_id).values_list('modalidade_id', flat=True)
+    )
+    _publicar(codigo, Elegibilidade(atleta_id, modalidades))
+
+
+def remover_elegibilidade(codigo):
+    _publicar(codigo, None)
+
+
+def invalidar_elegibilidade():
+    """
+    Descarta tudo (ex.: um StatusMatricula mudou de nome). A versão avança
+    sem delta, então todos os processos remontam do banco.
+    """
+    global _estado
+    cache.delete(CHAVE_BASE)
+    _proxima_versao()
+    with _lock:
+        _estado = None
@@ -0,0 +1,344 @@
+"""
+Gravação em grupo das leituras do check-in (FREQUENCIA_GRAVACAO_EM_GRUPO).
+
+Com o SQLite, cada check-in em sua própria transação disputa a trava de
+escrita do banco: no início de uma aula, dezenas de leituras simultâneas
+ficam em fila e algumas falham com "database is locked". Aqui a leitura é
+decidida (entrada, saída ou repetida) e confirmada ao leitor assim que
+está no diário em disco; uma thread grava as pendentes no banco em uma
+única transação a cada FREQUENCIA_GRUPO_INTERVALO segundos, ou antes se
+juntar FREQUENCIA_GRUPO_MAXIMO leituras.
+
+Diário:
+  - cada processo escreve em um segmento próprio em FREQUENCIA_FILA_DIR,
+    uma leitura JSON por linha, com fsync antes da confirmação. Leituras
+    simultâneas compartilham o fsync: quem chega enquanto um está em
+    andamento espera por ele e, se ainda não coberto, faz o próximo para
+    todas as que se juntaram;
+  - a cada gravação o segmento é trocado, e o antigo só é apagado depois do
+    commit das suas leituras. Se a gravação falhar, por qualquer motivo, as
+    leituras voltam para a fila e os segmentos continuam em disco; se o
+    processo cair, o segmento fica lá;
+  - segmentos sem modificação há SEGMENTO_ORFAO segundos (o dono toca o seu
+    a cada ciclo) são de processos que caíram: outro processo os assume
+    com um rename e grava as leituras. A gravação usa
+    ``sincronizacao.gravar_leituras``, que ignora o que já foi gravado,
+    então repetir um segmento não duplica nada.
+
+As presenças do dia (entrada/saída de cada atleta em cada turma) ficam em
+memória, lidas do banco uma vez por turma. Com vários processos, a entrada
+pode ter sido lida em outro: quando a memória diz "sem entrada", o registro
+do atleta é relido do banco antes de decidir. A entrada do outro processo
+já está no banco muito antes de uma saída valer (FREQUENCIA_GRUPO_INTERVALO
+contra INTERVALO_MINIMO_SAIDA), e a saída é um UPDATE condicional, que vale
+qualquer que seja o processo que gravou a entrada.
+"""
+import atexit
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .checkin import INTERVALO_MINIMO_SAIDA, localizar_leitura, normalizar_codigo
+
+logger = logging.getLogger(__name__)
+
+# Segmentos parados há mais que isto são de processos que caíram
+SEGMENTO_ORFAO = 60
+# De quanto em quanto tempo procurar segmentos órfãos
+INTERVALO_RESGATE = 30
+
+
+def _ler_segmento(caminho):
+    """Leituras de um segmento; uma última linha incompleta nunca foi confirmada"""
+    leituras = []
+    with open(caminho, encoding='utf-8') as arquivo:
+        for linha in arquivo:
+            try:
+                leituras.append(json.loads(linha))
+            except ValueError:
+                break
+    return leituras
+
+
+class GravacaoEmGrupo:
+    """Diário em disco, estado das presenças do dia e a thread que grava no banco"""
+
+    def __init__(self, diretorio, intervalo, maximo):
+        self.diretorio = Path(diretorio)
+        self.intervalo = intervalo
+        self.maximo = maximo
+        self._condicao = threading.Condition()
+        # Trava do fsync; quando as duas são necessárias, esta vem antes de _condicao
+        self._lock_diario = threading.Lock()
+        self._escritas = 0
+        self._sincronizadas = 0
+        self._pendentes = []
+        # Segmentos já trocados cujas leituras ainda não foram gravadas no banco
+        self._fechados = []
+        self._segmento = None
+        self._caminho = None
+        self._sequencia = itertools.count()
+        # (atleta_id, turma_id, data_aula) -> [data_entrada, data_saida] das leituras do dia
+        self._presencas = {}
+        # (turma_id, data_aula) já lidos do banco
+        self._turmas_lidas = set()
+        self._dia = None
+        self._thread = None
+        self._encerrada = False
+
+    # Diário
+
+    def _abrir_segmento(self):
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        self._caminho = self.diretorio / f'segmento-{os.getpid()}-{time.time_ns()}-{next(self._sequencia)}.jsonl'
+        self._segmento = open(self._caminho, 'a', encoding='utf-8')
+
+    def _anotar(self, leitura):
+        """Escreve no segmento (sem fsync) e devolve o número da escrita"""
+        if self._segmento is None:
+            self._abrir_segmento()
+        self._segmento.write(json.dumps(leitura) + '\n')
+        self._segmento.flush()
+        self._pendentes.append(leitura)
+        self._escritas += 1
+        return self._escritas
+
+    def _confirmar(self, escrita):
+        """Garante o fsync da escrita; um fsync cobre todas as feitas até ele"""
+        with self._lock_diario:
+            if self._sincronizadas >= escrita:
+                return
+            with self._condicao:
+                segmento, alvo = self._segmento, self._escritas
+            os.fsync(segmento.fileno())
+            self._sincronizadas = alvo
+
+    def _trocar_segmento(self):
+        # Chamado com as duas travas: nenhum fsync em andamento no segmento antigo
+        os.fsync(self._segmento.fileno())
+        self._sincronizadas = self._escritas
+        self._segmento.close()
+        self._fechados.append(self._caminho)
+        self._abrir_segmento()
+
+    # Leituras
+
+    def _presencas_da_turma(self, turma_id, data_aula):
+        """
+        Entradas e saídas já registradas no banco para a turma no dia. Faltas
+        (lançadas ou justificadas) ficam de fora: a leitura sobre elas é a
+        entrada, que gravar_leituras põe no lugar da falta.
+        """
+        from .models import STATUS_COM_ENTRADA, Frequencia
+
+        registros = Frequencia.objects.filter(
+            turma_id=turma_id, data_aula=data_aula, status__in=STATUS_COM_ENTRADA,
+        ).order_by()
+        return {
+            (atleta_id, turma_id, data_aula): [entrada, saida]
+            for atleta_id, entrada, saida in registros.values_list('atleta_id', 'data_entrada', 'data_saida')
+        }
+
+    def _presenca_do_atleta(self, chave):
+        """
+        Entrada e saída do atleta gravadas no banco (talvez por outro
+        processo), ou None; falta não conta como entrada
+        """
+        from .models import STATUS_COM_ENTRADA, Frequencia
+
+        atleta_id, turma_id, data_aula = chave
+        registro = (
+            Frequencia.objects.filter(
+                atleta_id=atleta_id, turma_id=turma_id, data_aula=data_aula, status__in=STATUS_COM_ENTRADA,
+            )
+            .values_list('data_entrada', 'data_saida').first()
+        )
+        return list(registro) if registro else None
+
+    def registrar(self, codigo, momento=None):
+        """Mesmo contrato de ``checkin.registrar_leitura``, mas sem esperar pelo banco"""
+        codigo = normalizar_codigo(codigo)
+        momento = momento or timezone.now()
+        recusa, atleta, turma, _ = localizar_leitura(codigo, momento)
+        if recusa:
+            return recusa
+
+        data_aula = timezone.localtime(momento).date()
+        chave = (atleta.id, turma.id, data_aula)
+        resultado = {'atleta': atleta.nome, 'turma': turma.nome}
+        # A consulta fica fora da trava, para não segurar as outras leituras
+        lidas = None if (turma.id, data_aula) in self._turmas_lidas else self._presencas_da_turma(turma.id, data_aula)
+        do_banco = None
+        if lidas is None and self._presencas.get(chave, [None])[0] is None:
+            # Sem entrada neste processo: pode ter sido lida em outro
+            do_banco = self._presenca_do_atleta(chave)
+
+        with self._condicao:
+            if self._dia != data_aula:
+                self._presencas.clear()
+                self._turmas_lidas.clear()
+                self._dia = data_aula
+            if lidas is not None and (turma.id, data_aula) not in self._turmas_lidas:
+                for chave_lida, presenca in lidas.items():
+                    self._presencas.setdefault(chave_lida, presenca)
+                self._turmas_lidas.add((turma.id, data_aula))
+            if do_banco is not None and self._presencas.get(chave, [None])[0] is None:
+                self._presencas[chave] = do_banco
+            entrada, saida = self._presencas.setdefault(chave, [None, None])
+            if entrada is None:
+                sentido = 'entrada'
+            elif saida is None and momento - entrada >= INTERVALO_MINIMO_SAIDA:
+                sentido = 'saida'
+            else:
+                return {'status': 'ja_registrado', 'message': 'Leitura já registrada', **resultado}
+            escrita = self._anotar({'codigo': codigo, 'momento': momento.isoformat(), 'sentido': sentido})
+            self._presencas[chave][0 if sentido == 'entrada' else 1] = momento
+            if len(self._pendentes) >= self.maximo:
+                self._condicao.notify()
+        self._confirmar(escrita)
+        self._iniciar()
+
+        if sentido == 'entrada':
+            return {'status': 'entrada', 'message': 'Entrada registrada', **resultado}
+        return {'status': 'saida', 'message': 'Saída registrada', **resultado}
+
+    # Gravação no banco
+
+    def descarregar(self):
+        """Grava as leituras pendentes em uma transação; devolve quantas foram gravadas"""
+        from .sincronizacao import gravar_leituras
+
+        with self._lock_diario, self._condicao:
+            if not self._pendentes:
+                if self._caminho is not None:
+                    # Sinal de vida: segmento tocado não é tomado como órfão
+                    os.utime(self._caminho)
+                return 0
+            lote, self._pendentes = self._pendentes, []
+            self._trocar_segmento()
+            segmentos = list(self._fechados)
+
+        close_old_connections()
+        try:
+            resultados = gravar_leituras(lote)
+        except Exception as erro:
+            # Qualquer falha: o lote fica para o próximo ciclo e os segmentos continuam em
+            # disco (só saem de _fechados junto com um lote gravado que cubra as suas leituras)
+            logger.error(f"[ERRO] Gravação em grupo de {len(lote)} leituras: {erro}", exc_info=True)
+            with self._condicao:
+                self._pendentes[:0] = lote
+            return 0
+
+        with self._condicao:
+            self._fechados = [caminho for caminho in self._fechados if caminho not in segmentos]
+        for caminho in segmentos:
+            caminho.unlink(missing_ok=True)
+        rejeitadas = [resultado for resultado in resultados if resultado['status'] == 'rejeitada']
+        if rejeitadas:
+            logger.warning(f"[ERRO] Gravação em grupo: {len(rejeitadas)} leituras confirmadas e rejeitadas "
+                           f"na gravação ({rejeitadas[0]['motivo']})")
+        return len(lote)
+
+    def resgatar_orfaos(self):
+        """Grava os segmentos deixados por processos que caíram; devolve quantas leituras"""
+        from .sincronizacao import gravar_leituras
+
+        if not self.diretorio.exists():
+            return 0
+        proprios = set(self._fechados) | {self._caminho}
+        limite = time.time() - SEGMENTO_ORFAO
+        total = 0
+        for caminho in sorted(self.diretorio.glob('segmento-*.jsonl')):
+            try:
+                if caminho in proprios or caminho.stat().st_mtime > limite:
+                    continue
+                # O rename decide qual processo fica com o segmento
+                resgatado = caminho.with_suffix(f'.resgate-{os.getpid()}')
+                os.replace(caminho, resgatado)
+            except OSError:
+                continue
+            leituras = _ler_segmento(resgatado)
+            try:
+                if leituras:
+                    gravar_leituras(leituras)
+            except Exception as erro:
+                logger.error(f"[ERRO] Resgate de {caminho.name}: {erro}", exc_info=True)
+                os.replace(resgatado, caminho)
+                continue
+            resgatado.unlink(missing_ok=True)
+            total += len(leituras)
+            logger.info(f"[OK] Segmento órfão {caminho.name} resgatado: {len(leituras)} leituras")
+        return total
+
+    def _executar(self):
+        ultimo_resgate = 0
+        while True:
+            with self._condicao:
+                self._condicao.wait_for(
+                    lambda: len(self._pendentes) >= self.maximo or self._encerrada, timeout=self.intervalo
+                )
+                encerrada = self._encerrada
+            try:
+                self.descarregar()
+                if time.monotonic() - ultimo_resgate >= INTERVALO_RESGATE:
+                    ultimo_resgate = time.monotonic()
+                    self.resgatar_orfaos()
+            except Exception as erro:
+                logger.error(f"[ERRO] Gravação em grupo: {erro}")
+            if encerrada:
+                self._fechar_segmento()
+                return
+
+    def _fechar_segmento(self):
+        """Na saída normal, sem pendentes, o segmento vazio não precisa ficar para resgate"""
+        with self._condicao:
+            if self._segmento is not None and not self._pendentes:
+                self._segmento.close()
+                self._caminho.unlink(missing_ok=True)
+                self._segmento = self._caminho = None
+
+    def _iniciar(self):
+        if self._thread is not None:
+            return
+        with self._condicao:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._executar, name='gravacao-frequencia', daemon=True)
+                self._thread.start()
+                atexit.register(self.encerrar)
+
+    def encerrar(self, espera=10):
+        """Grava o que falta (saída normal do processo) e para a thread"""
+        with self._condicao:
+            self._encerrada = True
+            self._condicao.notify()
+        if self._thread is not None:
+            self._thread.join(espera)
+
+
+_gravacao = None
+_lock = threading.Lock()
+
+
+def gravacao_em_grupo():
+    global _gravacao
+    if _gravacao is None:
+        with _lock:
+            if _gravacao is None:
+                _gravacao = GravacaoEmGrupo(
+                    settings.FREQUENCIA_FILA_DIR,
+                    settings.FREQUENCIA_GRUPO_INTERVALO,
+                    settings.FREQUENCIA_GRUPO_MAXIMO,
+                )
+    return _gravacao
+
+
+def registrar_leitura_em_grupo(codigo, momento=None):
+    return gravacao_em_grupo().registrar(codigo, momento)
@@ -0,0 +1,97 @@
+"""
+Índices em memória para o check-in por QR Code na portaria.
+
+Na leitura de um código, o check-in precisa saber quem é o atleta, em quais
+modalidades ele é elegível (frequencia.elegibilidade) e qual turma delas
+está acontecendo agora (frequencia.agenda). Em vez de consultar o banco a
+cada leitura, esses dados ficam em índices montados de uma vez e
+reaproveitados entre as requisições do processo.
+
+IndiceVersionado guarda um desses índices. Ele é remontado quando:
+  - o cadastro de origem muda (sinais em frequencia.signals incrementam a
+    versão guardada no cache; com um cache compartilhado entre processos,
+    todos os workers percebem na próxima leitura);
+  - passa de INDICE_IDADE_MAXIMA segundos (garante a atualização mesmo com
+    o LocMemCache padrão, que não é compartilhado entre processos).
+"""
+import logging
+import threading
+import time
+from collections import namedtuple
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+INDICE_IDADE_MAXIMA = 60
+
+
+class IndiceVersionado:
+    """Resultado de ``montar()`` reaproveitado enquanto a versão no cache não muda"""
+
+    def __init__(self, nome, chave_versao, montar):
+        self.nome = nome
+        self.chave_versao = chave_versao
+        self.montar = montar
+        self._valor = None
+        self._versao = None
+        self._criado_em = 0
+        self._lock = threading.Lock()
+
+    def _valido(self, versao):
+        return self._valor is not None and self._versao == versao \
+            and time.monotonic() - self._criado_em < INDICE_IDADE_MAXIMA
+
+    def invalidar(self):
+        """Marca o índice como desatualizado em todos os processos que compartilham o cache"""
+        try:
+            cache.incr(self.chave_versao)
+        except ValueError:
+            # Chave ainda não existe (ou expirou) no cache
+            cache.set(self.chave_versao, 1, None)
+
+    def atual(self):
+        """Índice atual, remontado se a versão mudou ou se passou da idade máxima"""
+        versao = cache.get(self.chave_versao, 0)
+        if self._valido(versao):
+            return self._valor
+        with self._lock:
+            # Outra thread pode ter remontado enquanto esta esperava
+            if not self._valido(versao):
+                inicio = time.monotonic()
+                self._valor = self.montar()
+                self._versao, self._criado_em = versao, time.monotonic()
+                logger.info(f"[OK] {self.nome} montado em {(time.monotonic() - inicio) * 1000:.0f} ms")
+            return self._valor
+
+
+AtletaIndice = namedtuple('AtletaIndice', 'id nome')
+
+
+class IndiceCheckin:
+    """Foto do cadastro de atletas usada pelo check-in (somente leitura depois de montada)"""
+
+    def __init__(self, atletas):
+        # codigo -> AtletaIndice
+        self.atletas = atletas
+
+    @classmethod
+    def montar(cls):
+        from usuarios.models import Atleta
+
+        # order_by() vazio: a ordenação padrão do modelo faria JOINs desnecessários
+        return cls({
+            codigo: AtletaIndice(atleta_id, nome)
+            for atleta_id, codigo, nome in Atleta.objects.order_by().values_list('id', 'codigo_alfanumerico', 'nome')
+        })
+
+
+_indice = IndiceVersionado('Índice de check-in', 'frequencia:indice_checkin:versao', IndiceCheckin.montar)
+
+
+def invalidar_indice():
+    _indice.invalidar()
+
+
+def indice_checkin():
+    return _indice.atual()
@@ -0,0 +1,33 @@
+"""
+Gera as aulas (frequencia.Aula) que faltam no calendário, de hoje até N
+semanas à frente. A tarefa gerar_aulas_task faz o mesmo todo dia; o comando
+serve para a primeira carga ou para estender o calendário.
+
+Uso:
+    python manage.py gerar_aulas
+    python manage.py gerar_aulas --semanas 12
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from frequencia.calendario import gerar_aulas
+
+
+class Command(BaseCommand):
+    help = 'Gera as aulas que faltam no calendário a partir dos horários das turmas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--semanas', type=int, default=settings.AULAS_SEMANAS_A_FRENTE,
+            help='Semanas à frente (padrão: AULAS_SEMANAS_A_FRENTE)'
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.monotonic()
+        criadas = gerar_aulas(options['semanas'])
+        duracao = time.monotonic() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'{criadas} aulas criadas em {duracao:.1f}s'
+        ))
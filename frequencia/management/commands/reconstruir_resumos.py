@@ -0,0 +1,36 @@
+"""
+Recalcula do zero os resumos de frequência (ResumoTurmaDia e
+ResumoAtletaMes) a partir de Frequencia, alguns meses por transação. No dia
+a dia os resumos são mantidos a cada gravação (frequencia.resumos); o
+comando serve para a primeira carga e para corrigir divergências.
+
+Uso:
+    python manage.py reconstruir_resumos
+    python manage.py reconstruir_resumos --meses 3
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from frequencia.resumos import reconstruir_resumos
+
+
+class Command(BaseCommand):
+    help = 'Recalcula os resumos de frequência por turma/dia e atleta/mês'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--meses', type=int, default=1,
+            help='Meses recalculados por transação (padrão: 1)'
+        )
+
+    def handle(self, *args, **options):
+        def progresso(inicio, fim, dias, meses):
+            self.stdout.write(f'{inicio:%m/%Y}: {dias} resumos diários, {meses} mensais')
+
+        inicio = time.monotonic()
+        dias, meses = reconstruir_resumos(max(1, options['meses']), progresso)
+        duracao = time.monotonic() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'{dias} resumos diários e {meses} mensais recalculados em {duracao:.1f}s'
+        ))
@@ -0,0 +1,66 @@
+"""
+Relatório de chegadas atrasadas por atleta e turma (frequencia.relatorios).
+
+Uso:
+    python manage.py relatorio_atrasos
+    python manage.py relatorio_atrasos --desde 2025-03-01 --ate 2025-03-31 --minimo 10
+    python manage.py relatorio_atrasos --csv atrasos.csv
+"""
+import csv
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from frequencia.relatorios import relatorio_atrasos
+
+
+class Command(BaseCommand):
+    help = 'Lista os atletas com chegadas atrasadas no período'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--desde', type=date.fromisoformat,
+            help='Data inicial (AAAA-MM-DD; padrão: 30 dias atrás)'
+        )
+        parser.add_argument(
+            '--ate', type=date.fromisoformat,
+            help='Data final (AAAA-MM-DD; padrão: hoje)'
+        )
+        parser.add_argument(
+            '--minimo', type=int, default=1,
+            help='Minutos de atraso a partir dos quais a entrada conta (padrão: 1)'
+        )
+        parser.add_argument(
+            '--csv', metavar='ARQUIVO',
+            help='Grava o relatório em CSV em vez de exibir'
+        )
+
+    def handle(self, *args, **options):
+        ate = options['ate'] or timezone.localdate()
+        desde = options['desde'] or ate - timedelta(days=30)
+        linhas = relatorio_atrasos(desde, ate, options['minimo'])
+
+        colunas = ['atleta__nome', 'turma__nome', 'aulas', 'atrasos', 'atraso_medio', 'atraso_maximo']
+        if options['csv']:
+            with open(options['csv'], 'w', newline='', encoding='utf-8') as arquivo:
+                escritor = csv.writer(arquivo)
+                escritor.writerow(['atleta', 'turma', 'aulas', 'atrasos', 'atraso_medio', 'atraso_maximo'])
+                total = 0
+                for linha in linhas.iterator():
+                    escritor.writerow([linha[coluna] for coluna in colunas[:4]]
+                                      + [round(linha['atraso_medio'], 1), linha['atraso_maximo']])
+                    total += 1
+            self.stdout.write(self.style.SUCCESS(f'{total} linhas gravadas em {options["csv"]}'))
+            return
+
+        self.stdout.write(f'Atrasos de {desde:%d/%m/%Y} a {ate:%d/%m/%Y} (a partir de {options["minimo"]} min)')
+        total = 0
+        for linha in linhas.iterator():
+            self.stdout.write(
+                f'{linha["atleta__nome"]:<40} {linha["turma__nome"]:<25} '
+                f'{linha["atrasos"]:>3}/{linha["aulas"]:<3} aulas  '
+                f'média {linha["atraso_medio"]:5.1f} min  máx {linha["atraso_maximo"]:3} min'
+            )
+            total += 1
+        self.stdout.write(self.style.SUCCESS(f'{total} atletas com atraso'))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:25
+
+from django.db import migrations, models
+
+DIAS_SEMANA = ['segunda', 'terca', 'quarta', 'quinta', 'sexta', 'sabado', 'domingo']
+
+
+def preencher_dias_mask(apps, schema_editor):
+    Turma = apps.get_model('frequencia', 'Turma')
+    turmas = list(Turma.objects.only('id', 'dias_semana'))
+    for turma in turmas:
+        turma.dias_mask = sum(1 << DIAS_SEMANA.index(dia) for dia in set(turma.dias_semana or []) if dia in DIAS_SEMANA)
+    Turma.objects.bulk_update(turmas, ['dias_mask'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('frequencia', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='turma',
+            name='dias_mask',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False, help_text='Calculada de dias_semana ao salvar (bit 0 = segunda)', verbose_name='Máscara dos Dias'),
+        ),
+        migrations.RunPython(preencher_dias_mask, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:29
+
+import django.db.models.deletion
+import utils.uuid7
+from django.db import migrations, models
+
+
+def aulas_das_frequencias(apps, schema_editor):
+    """Cria uma Aula para cada (turma, data) com frequência já registrada e liga os registros a ela"""
+    Aula = apps.get_model('frequencia', 'Aula')
+    Frequencia = apps.get_model('frequencia', 'Frequencia')
+    Turma = apps.get_model('frequencia', 'Turma')
+
+    pares = set(Frequencia.objects.order_by().values_list('turma_id', 'data_aula'))
+    turmas = Turma.objects.in_bulk({turma_id for turma_id, _ in pares})
+    Aula.objects.bulk_create([
+        Aula(
+            turma_id=turma_id, professor_id=turmas[turma_id].professor_id, data=data,
+            horario_inicio=turmas[turma_id].horario_inicio, horario_fim=turmas[turma_id].horario_fim,
+        )
+        for turma_id, data in pares
+    ], batch_size=500)
+    for aula_id, turma_id, data in Aula.objects.values_list('id', 'turma_id', 'data'):
+        Frequencia.objects.filter(turma_id=turma_id, data_aula=data).update(aula_id=aula_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('frequencia', '0003_dias_mask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Feriado',
+            fields=[
+                ('id', models.UUIDField(default=utils.uuid7.uuid7, editable=False, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(unique=True, verbose_name='Data')),
+                ('descricao', models.CharField(help_text='Ex: Independência do Brasil', max_length=100, verbose_name='Descrição')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+            ],
+            options={
+                'verbose_name': 'Feriado',
+                'verbose_name_plural': 'Feriados',
+                'ordering': ['data'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Aula',
+            fields=[
+                ('id', models.UUIDField(default=utils.uuid7.uuid7, editable=False, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(verbose_name='Data')),
+                ('horario_inicio', models.TimeField(verbose_name='Horário de Início')),
+                ('horario_fim', models.TimeField(verbose_name='Horário de Término')),
+                ('cancelada', models.BooleanField(default=False, verbose_name='Cancelada')),
+                ('motivo_cancelamento', models.CharField(blank=True, max_length=200, verbose_name='Motivo do Cancelamento')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+                ('data_atualizacao', models.DateTimeField(auto_now=True, verbose_name='Última Atualização')),
+                ('professor', models.ForeignKey(help_text='Professor da turma na data (pode ser um substituto)', on_delete=django.db.models.deletion.PROTECT, to='frequencia.professor', verbose_name='Professor')),
+                ('turma', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aulas', to='frequencia.turma', verbose_name='Turma')),
+                ('feriado', models.ForeignKey(blank=True, help_text='Preenchido quando a aula foi cancelada por um feriado', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='aulas', to='frequencia.feriado', verbose_name='Feriado')),
+            ],
+            options={
+                'verbose_name': 'Aula',
+                'verbose_name_plural': 'Aulas',
+                'ordering': ['data', 'horario_inicio'],
+            },
+        ),
+        migrations.AddField(
+            model_name='frequencia',
+            name='aula',
+            field=models.ForeignKey(blank=True, help_text='Ocorrência da turma na data; preenchida a partir de turma e data da aula', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='frequencias', to='frequencia.aula', verbose_name='Aula'),
+        ),
+        migrations.AddIndex(
+            model_name='aula',
+            index=models.Index(fields=['data', 'horario_inicio'], name='aula_data_horario_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='aula',
+            unique_together={('turma', 'data')},
+        ),
+        migrations.RunPython(aulas_das_frequencias, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:32
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fechar_aulas_passadas(apps, schema_editor):
+    """As aulas anteriores ao lançamento automático ficam como estão (faltas lançadas à mão)"""
+    Aula = apps.get_model('frequencia', 'Aula')
+    Aula.objects.filter(data__lt=timezone.localdate()).update(ausencias_registradas=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('frequencia', '0004_calendario_aulas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aula',
+            name='ausencias_registradas',
+            field=models.BooleanField(default=False, editable=False, help_text='As faltas dos matriculados sem presença já foram lançadas (frequencia.calendario)', verbose_name='Ausências Registradas'),
+        ),
+        migrations.RunPython(fechar_aulas_passadas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,119 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:37
+
+import datetime
+import django.db.models.deletion
+import utils.uuid7
+from django.db import migrations, models
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncMonth
+
+
+def resumos_do_historico(apps, schema_editor):
+    """Resumos das frequências já registradas (depois, reconstruir_resumos faz o mesmo)"""
+    Frequencia = apps.get_model('frequencia', 'Frequencia')
+    ResumoTurmaDia = apps.get_model('frequencia', 'ResumoTurmaDia')
+    ResumoAtletaMes = apps.get_model('frequencia', 'ResumoAtletaMes')
+
+    contagens = {
+        'presentes': Count('id', filter=Q(status='presente')),
+        'ausentes': Count('id', filter=Q(status='ausente')),
+        'atrasados': Count('id', filter=Q(status='atrasado')),
+        'justificados': Count('id', filter=Q(status='justificado')),
+        'duracao': Sum(
+            ExpressionWrapper(F('data_saida') - F('data_entrada'), output_field=DurationField()),
+            filter=Q(data_saida__isnull=False),
+        ),
+    }
+
+    def valores(linha):
+        return {campo: linha[campo] for campo in contagens if campo != 'duracao'} | {
+            'duracao': linha['duracao'] or datetime.timedelta(),
+        }
+
+    frequencias = Frequencia.objects.order_by()
+    ResumoTurmaDia.objects.bulk_create([
+        ResumoTurmaDia(turma_id=linha['turma_id'], data=linha['data_aula'], **valores(linha))
+        for linha in frequencias.values('turma_id', 'data_aula').annotate(**contagens)
+    ], batch_size=500)
+    ResumoAtletaMes.objects.bulk_create([
+        ResumoAtletaMes(atleta_id=linha['atleta_id'], mes=linha['mes'], **valores(linha))
+        for linha in frequencias.values('atleta_id', mes=TruncMonth('data_aula')).annotate(**contagens)
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('frequencia', '0005_aula_ausencias_registradas'),
+        ('usuarios', '0006_sincronizacao_portaria'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoAtletaMes',
+            fields=[
+                ('id', models.UUIDField(default=utils.uuid7.uuid7, editable=False, primary_key=True, serialize=False, verbose_name='ID')),
+                ('presentes', models.PositiveIntegerField(default=0, verbose_name='Presentes')),
+                ('ausentes', models.PositiveIntegerField(default=0, verbose_name='Ausentes')),
+                ('atrasados', models.PositiveIntegerField(default=0, verbose_name='Atrasados')),
+                ('justificados', models.PositiveIntegerField(default=0, verbose_name='Justificados')),
+                ('duracao', models.DurationField(default=datetime.timedelta, help_text='Soma do tempo entre entrada e saída dos registros com saída', verbose_name='Tempo em Aula')),
+                ('data_atualizacao', models.DateTimeField(auto_now=True, verbose_name='Última Atualização')),
+                ('mes', models.DateField(help_text='Primeiro dia do mês', verbose_name='Mês')),
+            ],
+            options={
+                'verbose_name': 'Resumo Mensal do Atleta',
+                'verbose_name_plural': 'Resumos Mensais dos Atletas',
+                'ordering': ['-mes'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumoTurmaDia',
+            fields=[
+                ('id', models.UUIDField(default=utils.uuid7.uuid7, editable=False, primary_key=True, serialize=False, verbose_name='ID')),
+                ('presentes', models.PositiveIntegerField(default=0, verbose_name='Presentes')),
+                ('ausentes', models.PositiveIntegerField(default=0, verbose_name='Ausentes')),
+                ('atrasados', models.PositiveIntegerField(default=0, verbose_name='Atrasados')),
+                ('justificados', models.PositiveIntegerField(default=0, verbose_name='Justificados')),
+                ('duracao', models.DurationField(default=datetime.timedelta, help_text='Soma do tempo entre entrada e saída dos registros com saída', verbose_name='Tempo em Aula')),
+                ('data_atualizacao', models.DateTimeField(auto_now=True, verbose_name='Última Atualização')),
+                ('data', models.DateField(verbose_name='Data')),
+            ],
+            options={
+                'verbose_name': 'Resumo Diário da Turma',
+                'verbose_name_plural': 'Resumos Diários das Turmas',
+                'ordering': ['-data'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='frequencia',
+            index=models.Index(fields=['data_aula', 'turma'], name='frequencia_data_turma_idx'),
+        ),
+        migrations.AddField(
+            model_name='resumoatletames',
+            name='atleta',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumos_frequencia', to='usuarios.atleta', verbose_name='Atleta'),
+        ),
+        migrations.AddField(
+            model_name='resumoturmadia',
+            name='turma',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumos', to='frequencia.turma', verbose_name='Turma'),
+        ),
+        migrations.AddIndex(
+            model_name='resumoatletames',
+            index=models.Index(fields=['mes'], name='resumo_atleta_mes_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='resumoatletames',
+            unique_together={('atleta', 'mes')},
+        ),
+        migrations.AddIndex(
+            model_name='resumoturmadia',
+            index=models.Index(fields=['data'], name='resumo_turma_data_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='resumoturmadia',
+            unique_together={('turma', 'data')},
+        ),
+        migrations.RunPython(resumos_do_historico, migrations.RunPython.noop),
+    ]
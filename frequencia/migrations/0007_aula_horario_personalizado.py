@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:05
+
+from django.db import migrations, models
+from django.db.models import F, Q
+from django.utils import timezone
+
+
+def marcar_horarios_alterados(apps, schema_editor):
+    """Aulas futuras com horário diferente do da turma foram alteradas à mão (as demais são refeitas a cada alteração da turma)"""
+    Aula = apps.get_model('frequencia', 'Aula')
+    Aula.objects.filter(data__gte=timezone.localdate()).filter(
+        ~Q(horario_inicio=F('turma__horario_inicio')) | ~Q(horario_fim=F('turma__horario_fim'))
+    ).update(horario_personalizado=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('frequencia', '0006_resumos_frequencia'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aula',
+            name='horario_personalizado',
+            field=models.BooleanField(default=False, editable=False, help_text='Horário alterado só nesta aula; alterações no horário da turma não o substituem', verbose_name='Horário Personalizado'),
+        ),
+        migrations.RunPython(marcar_horarios_alterados, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,11 @@
 from django.db import models
+from django.db.models.functions import Coalesce, ExtractHour, ExtractMinute, Greatest
 from django.core.exceptions import ValidationError
+from django.utils import timezone
+from datetime import timedelta
 from usuarios.models import Usuario, Atleta, Modalidade
 from utils.uuid7 import uuid7
+from utils.intervalos import IntervaloUUID7QuerySet
 
 
 class Professor(models.Model):
@@ -47,6 +51,8 @@ class Professor(models.Model):
         verbose_name='Última Atualização'
     )
     
+    objects = IntervaloUUID7QuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Professor'
         verbose_name_plural = 'Professores'
@@ -64,6 +70,24 @@ class Professor(models.Model):
             raise ValidationError('Apenas usuários do tipo Professor podem ser cadastrados como professores')
 
 
+def mascara_dias(dias_semana):
+    """Bits dos dias da semana (bit 0 = segunda ... bit 6 = domingo, como datetime.weekday())"""
+    nomes = [dia for dia, _ in Turma.DIAS_SEMANA_CHOICES]
+    mascara = 0
+    for dia in dias_semana or []:
+        if dia in nomes:
+            mascara |= 1 << nomes.index(dia)
+    return mascara
+
+
+class TurmaQuerySet(IntervaloUUID7QuerySet):
+    def no_dia(self, dia_semana):
+        """Turmas que funcionam no dia (0 = segunda, como datetime.weekday())"""
+        return self.alias(
+            dia_no_mascara=models.F('dias_mask').bitand(1 << dia_semana)
+        ).filter(dia_no_mascara__gt=0)
+
+
 class Turma(models.Model):
     """Modelo para turmas do Dojô"""
     id = models.UUIDField(
@@ -107,6 +131,14 @@ class Turma(models.Model):
         default=list
     )
     
+    dias_mask = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        db_index=True,
+        verbose_name='Máscara dos Dias',
+        help_text='Calculada de dias_semana ao salvar (bit 0 = segunda)'
+    )
+    
     horario_inicio = models.TimeField(
         verbose_name='Horário de Início'
     )
@@ -136,6 +168,8 @@ class Turma(models.Model):
         verbose_name='Última Atualização'
     )
     
+    objects = TurmaQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Turma'
         verbose_name_plural = 'Turmas'
@@ -145,6 +179,14 @@ class Turma(models.Model):
     def __str__(self):
         return f"{self.nome} - {self.modalidade.nome} ({self.horario_inicio.strftime('%H:%M')})"
     
+    def save(self, *args, **kwargs):
+        """Mantém dias_mask de acordo com dias_semana"""
+        self.dias_mask = mascara_dias(self.dias_semana)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'dias_semana' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'dias_mask'}
+        super().save(*args, **kwargs)
+    
     def clean(self):
         """Validações customizadas"""
         super().clean()
@@ -162,6 +204,177 @@ class Turma(models.Model):
             raise ValidationError('O professor selecionado não ensina esta modalidade')
 
 
+class Feriado(models.Model):
+    """Dias sem aula no Dojô (feriados, recessos)"""
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid7,
+        editable=False,
+        verbose_name='ID'
+    )
+    
+    data = models.DateField(
+        unique=True,
+        verbose_name='Data'
+    )
+    
+    descricao = models.CharField(
+        max_length=100,
+        verbose_name='Descrição',
+        help_text='Ex: Independência do Brasil'
+    )
+    
+    data_criacao = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Data de Criação'
+    )
+    
+    objects = IntervaloUUID7QuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Feriado'
+        verbose_name_plural = 'Feriados'
+        ordering = ['data']
+    
+    def __str__(self):
+        return f"{self.data.strftime('%d/%m/%Y')} - {self.descricao}"
+
+
+class Aula(models.Model):
+    """Ocorrência de uma turma em uma data, gerada a partir do horário da turma (frequencia.calendario)"""
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid7,
+        editable=False,
+        verbose_name='ID'
+    )
+    
+    turma = models.ForeignKey(
+        Turma,
+        on_delete=models.CASCADE,
+        related_name='aulas',
+        verbose_name='Turma'
+    )
+    
+    professor = models.ForeignKey(
+        Professor,
+        on_delete=models.PROTECT,
+        verbose_name='Professor',
+        help_text='Professor da turma na data (pode ser um substituto)'
+    )
+    
+    data = models.DateField(
+        verbose_name='Data'
+    )
+    
+    horario_inicio = models.TimeField(
+        verbose_name='Horário de Início'
+    )
+    
+    horario_fim = models.TimeField(
+        verbose_name='Horário de Término'
+    )
+    
+    horario_personalizado = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Horário Personalizado',
+        help_text='Horário alterado só nesta aula; alterações no horário da turma não o substituem'
+    )
+    
+    cancelada = models.BooleanField(
+        default=False,
+        verbose_name='Cancelada'
+    )
+    
+    motivo_cancelamento = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name='Motivo do Cancelamento'
+    )
+    
+    feriado = models.ForeignKey(
+        Feriado,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='aulas',
+        verbose_name='Feriado',
+        help_text='Preenchido quando a aula foi cancelada por um feriado'
+    )
+    
+    ausencias_registradas = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Ausências Registradas',
+        help_text='As faltas dos matriculados sem presença já foram lançadas (frequencia.calendario)'
+    )
+    
+    data_criacao = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Data de Criação'
+    )
+    
+    data_atualizacao = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Última Atualização'
+    )
+    
+    objects = IntervaloUUID7QuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Aula'
+        verbose_name_plural = 'Aulas'
+        ordering = ['data', 'horario_inicio']
+        unique_together = ['turma', 'data']
+        indexes = [
+            models.Index(fields=['data', 'horario_inicio'], name='aula_data_horario_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.turma.nome} - {self.data.strftime('%d/%m/%Y')} {self.horario_inicio.strftime('%H:%M')}"
+    
+    def clean(self):
+        """Validações customizadas"""
+        super().clean()
+        
+        if self.horario_fim <= self.horario_inicio:
+            raise ValidationError('O horário de término deve ser maior que o horário de início')
+
+
+# Status em que a entrada é de fato uma chegada (falta e justificada ficam com o
+# início da aula em data_entrada, que é obrigatória)
+STATUS_COM_ENTRADA = ['presente', 'atrasado']
+
+
+class FrequenciaQuerySet(IntervaloUUID7QuerySet):
+    def com_tempos(self):
+        """
+        Anota ``duracao`` (tempo entre entrada e saída; None sem saída) e
+        ``atraso`` (minutos da entrada depois do início da aula, 0 se no
+        horário; None se o status não é uma chegada), calculados no banco. O
+        início é o da aula quando o registro tem aula (pode ter horário
+        próprio), senão o da turma, o mesmo com que o check-in decide o
+        status (checkin.status_da_entrada); a entrada é lida no fuso horário
+        atual.
+        """
+        inicio = Coalesce('aula__horario_inicio', 'turma__horario_inicio')
+        return self.annotate(
+            duracao=models.ExpressionWrapper(
+                models.F('data_saida') - models.F('data_entrada'), output_field=models.DurationField()
+            ),
+            atraso=models.Case(
+                models.When(status__in=STATUS_COM_ENTRADA, then=Greatest(
+                    ExtractHour('data_entrada') * 60 + ExtractMinute('data_entrada')
+                    - (ExtractHour(inicio) * 60 + ExtractMinute(inicio)),
+                    models.Value(0),
+                )),
+                default=None,
+                output_field=models.IntegerField(),
+            ),
+        )
+
+
 class Frequencia(models.Model):
     """Modelo para controle de frequência dos atletas"""
     id = models.UUIDField(
@@ -191,6 +404,16 @@ class Frequencia(models.Model):
         verbose_name='Turma'
     )
     
+    aula = models.ForeignKey(
+        Aula,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='frequencias',
+        verbose_name='Aula',
+        help_text='Ocorrência da turma na data; preenchida a partir de turma e data da aula'
+    )
+    
     professor = models.ForeignKey(
         Professor,
         on_delete=models.CASCADE,
@@ -240,11 +463,17 @@ class Frequencia(models.Model):
         verbose_name='Última Atualização'
     )
     
+    objects = FrequenciaQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Frequência'
         verbose_name_plural = 'Frequências'
         ordering = ['-data_aula', '-data_entrada', 'atleta__nome']
         unique_together = ['atleta', 'turma', 'data_aula']
+        indexes = [
+            # Recontagem dos resumos por (turma, data) e reconstrução por período (frequencia.resumos)
+            models.Index(fields=['data_aula', 'turma'], name='frequencia_data_turma_idx'),
+        ]
     
     def __str__(self):
         return f"{self.atleta.nome} - {self.turma.nome} - {self.data_aula.strftime('%d/%m/%Y')}"
@@ -253,38 +482,148 @@ class Frequencia(models.Model):
         """Validações customizadas"""
         super().clean()
         
+        # Código e matrículas vêm do índice de elegibilidade, sem consultas por registro
+        from .elegibilidade import elegibilidade
+        elegivel = elegibilidade(self.qr_code_utilizado)
+        
         # Verificar se o QR Code corresponde ao atleta
-        if self.qr_code_utilizado != self.atleta.codigo_alfanumerico:
+        if elegivel is None or elegivel.atleta_id != self.atleta_id:
             raise ValidationError('QR Code não corresponde ao atleta')
         
         # Verificar se a data de saída é posterior à data de entrada
         if self.data_saida and self.data_saida <= self.data_entrada:
             raise ValidationError('A data de saída deve ser posterior à data de entrada')
         
-        # Verificar se o atleta está matriculado na turma
-        from usuarios.models import Matricula
-        if not Matricula.objects.filter(
-            atleta=self.atleta,
-            modalidade=self.turma.modalidade,
-            ativa=True
-        ).exists():
+        # Verificar se o atleta está matriculado na turma, com a matrícula em dia
+        if self.turma.modalidade_id not in elegivel.modalidades:
             raise ValidationError('O atleta não está matriculado nesta modalidade')
+        
+        # Associar a aula da turma na data (frequencia.calendario)
+        if self.aula_id is None:
+            self.aula = Aula.objects.filter(turma_id=self.turma_id, data=self.data_aula).first()
+        elif self.aula.turma_id != self.turma_id or self.aula.data != self.data_aula:
+            raise ValidationError('A aula não corresponde à turma e à data informadas')
+        if self.aula is not None and self.aula.cancelada:
+            raise ValidationError('A aula desta turma nesta data foi cancelada')
     
     @property
     def duracao_aula(self):
-        """Retorna a duração da aula em minutos"""
-        if self.data_saida:
+        """Retorna a duração da aula em minutos (usa a anotação de com_tempos() se houver)"""
+        duracao = getattr(self, 'duracao', None)
+        if duracao is None and self.data_saida:
             duracao = self.data_saida - self.data_entrada
+        if duracao is not None:
             return int(duracao.total_seconds() / 60)
         return None
     
     @property
     def atraso_minutos(self):
-        """Retorna o atraso em minutos (se houver)"""
+        """Retorna o atraso em minutos, None em faltas (usa a anotação de com_tempos() se houver)"""
+        if hasattr(self, 'atraso'):
+            return self.atraso
+        if self.status not in STATUS_COM_ENTRADA:
+            return None
         if self.data_entrada:
-            horario_previsto = self.turma.horario_inicio
-            horario_real = self.data_entrada.time()
+            horario_previsto = self.aula.horario_inicio if self.aula_id else self.turma.horario_inicio
+            horario_real = timezone.localtime(self.data_entrada).time()
             if horario_real > horario_previsto:
                 atraso = horario_real.hour * 60 + horario_real.minute - (horario_previsto.hour * 60 + horario_previsto.minute)
                 return atraso
         return 0
+
+
+class ResumoFrequencia(models.Model):
+    """Contagens de frequência de um período, mantidas por frequencia.resumos"""
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid7,
+        editable=False,
+        verbose_name='ID'
+    )
+    
+    presentes = models.PositiveIntegerField(default=0, verbose_name='Presentes')
+    ausentes = models.PositiveIntegerField(default=0, verbose_name='Ausentes')
+    atrasados = models.PositiveIntegerField(default=0, verbose_name='Atrasados')
+    justificados = models.PositiveIntegerField(default=0, verbose_name='Justificados')
+    
+    duracao = models.DurationField(
+        default=timedelta,
+        verbose_name='Tempo em Aula',
+        help_text='Soma do tempo entre entrada e saída dos registros com saída'
+    )
+    
+    data_atualizacao = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Última Atualização'
+    )
+
+    class Meta:
+        abstract = True
+    
+    @property
+    def minutos(self):
+        return int(self.duracao.total_seconds() // 60)
+    
+    @property
+    def total(self):
+        return self.presentes + self.ausentes + self.atrasados + self.justificados
+    
+    @property
+    def taxa_presenca(self):
+        """Percentual de presença (atrasados contam como presentes)"""
+        if not self.total:
+            return None
+        return round((self.presentes + self.atrasados) * 100 / self.total, 1)
+
+
+class ResumoTurmaDia(ResumoFrequencia):
+    """Frequência de uma turma em um dia"""
+    turma = models.ForeignKey(
+        Turma,
+        on_delete=models.CASCADE,
+        related_name='resumos',
+        verbose_name='Turma'
+    )
+    
+    data = models.DateField(
+        verbose_name='Data'
+    )
+
+    class Meta:
+        verbose_name = 'Resumo Diário da Turma'
+        verbose_name_plural = 'Resumos Diários das Turmas'
+        ordering = ['-data']
+        unique_together = ['turma', 'data']
+        indexes = [
+            models.Index(fields=['data'], name='resumo_turma_data_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.turma.nome} - {self.data.strftime('%d/%m/%Y')}"
+
+
+class ResumoAtletaMes(ResumoFrequencia):
+    """Frequência de um atleta em um mês (todas as turmas)"""
+    atleta = models.ForeignKey(
+        Atleta,
+        on_delete=models.CASCADE,
+        related_name='resumos_frequencia',
+        verbose_name='Atleta'
+    )
+    
+    mes = models.DateField(
+        verbose_name='Mês',
+        help_text='Primeiro dia do mês'
+    )
+
+    class Meta:
+        verbose_name = 'Resumo Mensal do Atleta'
+        verbose_name_plural = 'Resumos Mensais dos Atletas'
+        ordering = ['-mes']
+        unique_together = ['atleta', 'mes']
+        indexes = [
+            models.Index(fields=['mes'], name='resumo_atleta_mes_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.atleta.nome} - {self.mes.strftime('%m/%Y')}"
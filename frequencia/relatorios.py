@@ -0,0 +1,51 @@
+"""
+Relatórios de frequência calculados no banco.
+
+Usam as anotações de Frequencia.objects.com_tempos() (duração e atraso),
+as mesmas do admin, de modo que o relatório e a lista filtrada por atraso
+no admin contam os mesmos registros.
+"""
+from django.db.models import Avg, Count, Max, Q
+
+from .models import STATUS_COM_ENTRADA, Frequencia
+
+
+def chegadas_atrasadas(inicio, fim, minimo=1, turma=None):
+    """
+    Entradas com ``minimo`` minutos ou mais de atraso entre as datas
+    ``inicio`` e ``fim`` (inclusive), da mais atrasada para a menos.
+    """
+    registros = (
+        Frequencia.objects.com_tempos()
+        .filter(data_aula__range=(inicio, fim), status__in=STATUS_COM_ENTRADA, atraso__gte=minimo)
+        .select_related('atleta', 'turma')
+    )
+    if turma is not None:
+        registros = registros.filter(turma=turma)
+    return registros.order_by('-atraso', '-data_aula')
+
+
+def relatorio_atrasos(inicio, fim, minimo=1, turma=None):
+    """
+    Atrasos por atleta e turma no período: ``atleta_id``, ``atleta__nome``,
+    ``turma__nome``, ``atrasos`` (quantidade), ``atraso_medio`` e
+    ``atraso_maximo`` (minutos) e ``aulas`` (entradas no período), dos
+    atletas que mais se atrasam para os que menos.
+    """
+    entradas = Frequencia.objects.com_tempos().filter(
+        data_aula__range=(inicio, fim), status__in=STATUS_COM_ENTRADA,
+    )
+    if turma is not None:
+        entradas = entradas.filter(turma=turma)
+    atrasada = Q(atraso__gte=minimo)
+    return (
+        entradas.values('atleta_id', 'atleta__nome', 'turma_id', 'turma__nome')
+        .annotate(
+            aulas=Count('id'),
+            atrasos=Count('id', filter=atrasada),
+            atraso_medio=Avg('atraso', filter=atrasada),
+            atraso_maximo=Max('atraso'),
+        )
+        .filter(atrasos__gt=0)
+        .order_by('-atrasos', '-atraso_medio', 'atleta__nome')
+    )
@@ -0,0 +1,190 @@
+"""
+Resumos de frequência: contagens por turma e dia (ResumoTurmaDia) e por
+atleta e mês (ResumoAtletaMes).
+
+Os painéis leem os resumos em vez de agregar toda a tabela de Frequencia.
+Cada gravação de Frequencia atualiza, na mesma transação, só os resumos que
+ela afeta (a turma no dia e o atleta no mês), de duas formas:
+
+  - ``somar_aos_resumos``: quando se sabe exatamente o que mudou (um
+    registro novo, uma saída), um UPDATE com incremento em cada resumo;
+  - ``atualizar_resumos``: recontagem dos resumos afetados a partir de
+    Frequencia. Serve para alterações e exclusões, em que os valores
+    anteriores não são conhecidos, e para bulk_create com ignore_conflicts,
+    em que não se sabe quais linhas entraram. Custa uma consulta por tabela
+    sobre poucas linhas (índices de Frequencia por atleta e por data e
+    turma).
+
+Onde as gravações passam:
+  - save() e delete() de Frequencia (admin, check-in): frequencia.signals;
+  - UPDATE e bulk_create (saída no check-in, sincronização da portaria,
+    faltas das aulas encerradas): chamada direta.
+
+``python manage.py reconstruir_resumos`` recalcula tudo, mês a mês.
+"""
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Frequencia, ResumoAtletaMes, ResumoTurmaDia
+
+CAMPOS_CONTAGEM = ['presentes', 'ausentes', 'atrasados', 'justificados', 'duracao']
+
+# Status de Frequencia -> campo contado nos resumos
+CAMPO_STATUS = {
+    'presente': 'presentes',
+    'ausente': 'ausentes',
+    'atrasado': 'atrasados',
+    'justificado': 'justificados',
+}
+
+
+def _contagens():
+    return {
+        **{campo: Count('id', filter=Q(status=status)) for status, campo in CAMPO_STATUS.items()},
+        'duracao': Sum(
+            ExpressionWrapper(F('data_saida') - F('data_entrada'), output_field=DurationField()),
+            filter=Q(data_saida__isnull=False),
+        ),
+    }
+
+
+def _resumo(modelo, linha, **chave):
+    return modelo(
+        presentes=linha['presentes'], ausentes=linha['ausentes'], atrasados=linha['atrasados'],
+        justificados=linha['justificados'], duracao=linha['duracao'] or timedelta(), **chave,
+    )
+
+
+def _gravar(modelo, resumos, campos_chave):
+    modelo.objects.bulk_create(
+        resumos, batch_size=500, update_conflicts=True, unique_fields=campos_chave,
+        update_fields=CAMPOS_CONTAGEM + ['data_atualizacao'],
+    )
+
+
+def mes_de(data):
+    return data.replace(day=1)
+
+
+def _proximo_mes(mes):
+    return date(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+
+
+def somar_aos_resumos(atleta_id, turma_id, data_aula, status=None, duracao=None):
+    """
+    Soma aos resumos do registro ``(atleta_id, turma_id, data_aula)`` um
+    registro novo com ``status`` e/ou ``duracao`` (tempo entre entrada e
+    saída). Um resumo que ainda não existe é criado: todo período com
+    registros tem resumo (a migração e reconstruir_resumos partem do
+    histórico). Deve rodar na transação da gravação.
+    """
+    valores = {'data_atualizacao': timezone.now()}
+    if status:
+        valores[CAMPO_STATUS[status]] = F(CAMPO_STATUS[status]) + 1
+    if duracao:
+        valores['duracao'] = F('duracao') + duracao
+    with transaction.atomic():
+        for modelo, chave in (
+            (ResumoTurmaDia, {'turma_id': turma_id, 'data': data_aula}),
+            (ResumoAtletaMes, {'atleta_id': atleta_id, 'mes': mes_de(data_aula)}),
+        ):
+            if not modelo.objects.filter(**chave).update(**valores):
+                # Primeiro registro do período: o resumo começa zerado
+                modelo.objects.bulk_create([modelo(**chave)], ignore_conflicts=True)
+                modelo.objects.filter(**chave).update(**valores)
+
+
+def atualizar_resumos(chaves):
+    """
+    Recalcula os resumos afetados por registros ``(atleta_id, turma_id,
+    data_aula)`` gravados ou excluídos. Deve rodar na transação da
+    gravação.
+    """
+    chaves = set(chaves)
+    if not chaves:
+        return
+    dias = {(turma_id, data) for _, turma_id, data in chaves}
+    meses = {(atleta_id, mes_de(data)) for atleta_id, _, data in chaves}
+
+    with transaction.atomic():
+        linhas = (
+            Frequencia.objects.filter(
+                turma_id__in={turma_id for turma_id, _ in dias}, data_aula__in={data for _, data in dias},
+            )
+            .order_by().values('turma_id', 'data_aula').annotate(**_contagens())
+        )
+        resumos = [
+            _resumo(ResumoTurmaDia, linha, turma_id=linha['turma_id'], data=linha['data_aula'])
+            for linha in linhas if (linha['turma_id'], linha['data_aula']) in dias
+        ]
+        _gravar(ResumoTurmaDia, resumos, ['turma', 'data'])
+        # Sem nenhum registro: o resumo sai (registro excluído, turma ou atleta em exclusão)
+        for turma_id, data in dias - {(resumo.turma_id, resumo.data) for resumo in resumos}:
+            ResumoTurmaDia.objects.filter(turma_id=turma_id, data=data).delete()
+
+        inicio = min(mes for _, mes in meses)
+        fim = max(mes for _, mes in meses)
+        linhas = (
+            Frequencia.objects.filter(
+                atleta_id__in={atleta_id for atleta_id, _ in meses},
+                data_aula__gte=inicio, data_aula__lt=_proximo_mes(fim),
+            )
+            .order_by().values('atleta_id', mes=TruncMonth('data_aula')).annotate(**_contagens())
+        )
+        resumos = [
+            _resumo(ResumoAtletaMes, linha, atleta_id=linha['atleta_id'], mes=linha['mes'])
+            for linha in linhas if (linha['atleta_id'], linha['mes']) in meses
+        ]
+        _gravar(ResumoAtletaMes, resumos, ['atleta', 'mes'])
+        for atleta_id, mes in meses - {(resumo.atleta_id, resumo.mes) for resumo in resumos}:
+            ResumoAtletaMes.objects.filter(atleta_id=atleta_id, mes=mes).delete()
+
+
+def reconstruir_resumos(meses_por_lote=1, progresso=None):
+    """
+    Recalcula todos os resumos a partir de Frequencia, ``meses_por_lote``
+    meses por transação (cada lote substitui os resumos do seu período).
+    ``progresso(inicio, fim, dias, meses)`` é chamado a cada lote. Devolve
+    ``(resumos diários, resumos mensais)``.
+    """
+    datas = Frequencia.objects.order_by('data_aula').values_list('data_aula', flat=True)
+    primeira, ultima = datas.first(), datas.last()
+    total_dias = total_meses = 0
+    with transaction.atomic():
+        if primeira is None:
+            ResumoTurmaDia.objects.all().delete()
+            ResumoAtletaMes.objects.all().delete()
+            return 0, 0
+        # Resumos fora do período com registros (sobras de registros excluídos)
+        ResumoTurmaDia.objects.exclude(data__range=(mes_de(primeira), ultima)).delete()
+        ResumoAtletaMes.objects.exclude(mes__range=(mes_de(primeira), ultima)).delete()
+
+    inicio = mes_de(primeira)
+    while inicio <= ultima:
+        fim = inicio
+        for _ in range(meses_por_lote):
+            fim = _proximo_mes(fim)
+        periodo = Frequencia.objects.filter(data_aula__gte=inicio, data_aula__lt=fim).order_by()
+        with transaction.atomic():
+            ResumoTurmaDia.objects.filter(data__gte=inicio, data__lt=fim).delete()
+            ResumoAtletaMes.objects.filter(mes__gte=inicio, mes__lt=fim).delete()
+            dias = [
+                _resumo(ResumoTurmaDia, linha, turma_id=linha['turma_id'], data=linha['data_aula'])
+                for linha in periodo.values('turma_id', 'data_aula').annotate(**_contagens())
+            ]
+            meses = [
+                _resumo(ResumoAtletaMes, linha, atleta_id=linha['atleta_id'], mes=linha['mes'])
+                for linha in periodo.values('atleta_id', mes=TruncMonth('data_aula')).annotate(**_contagens())
+            ]
+            ResumoTurmaDia.objects.bulk_create(dias, batch_size=500)
+            ResumoAtletaMes.objects.bulk_create(meses, batch_size=500)
+        total_dias += len(dias)
+        total_meses += len(meses)
+        if progresso:
+            progresso(inicio, fim, len(dias), len(meses))
+        inicio = fim
+    return total_dias, total_meses
@@ -0,0 +1,105 @@
+"""
+Sinais que mantêm em dia o índice de check-in (frequencia.indice), a agenda
+das turmas (frequencia.agenda), a elegibilidade dos atletas
+(frequencia.elegibilidade), o calendário de aulas (frequencia.calendario)
+e os resumos de frequência (frequencia.resumos). Conectados em FrequenciaConfig.ready().
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from usuarios.models import Atleta, Matricula, StatusMatricula
+
+from .elegibilidade import atualizar_elegibilidade, invalidar_elegibilidade, remover_elegibilidade
+from .agenda import invalidar_agenda
+from .calendario import aplicar_feriado, invalidar_aulas, remover_feriado, sincronizar_aulas_turma
+from .indice import invalidar_indice
+from .models import Aula, Feriado, Frequencia, Turma
+from .resumos import atualizar_resumos, somar_aos_resumos
+
+
+# Sempre depois do commit: antes disso a releitura veria o banco sem a alteração
+
+@receiver(post_save, sender=Atleta)
+@receiver(post_delete, sender=Atleta)
+def cadastro_alterado(sender, **kwargs):
+    transaction.on_commit(invalidar_indice)
+
+
+@receiver(post_save, sender=Turma)
+@receiver(post_delete, sender=Turma)
+def turma_alterada(sender, **kwargs):
+    transaction.on_commit(invalidar_agenda)
+
+
+@receiver(post_save, sender=Turma)
+def horario_turma_alterado(sender, instance, **kwargs):
+    # Na mesma transação da turma: aulas futuras refeitas junto com a alteração
+    sincronizar_aulas_turma(instance.pk)
+
+
+@receiver(post_save, sender=Feriado)
+def feriado_salvo(sender, instance, **kwargs):
+    aplicar_feriado(instance)
+
+
+@receiver(pre_delete, sender=Feriado)
+def feriado_excluido(sender, instance, **kwargs):
+    remover_feriado(instance)
+
+
+@receiver(post_save, sender=Aula)
+@receiver(post_delete, sender=Aula)
+def aula_alterada(sender, **kwargs):
+    transaction.on_commit(invalidar_aulas)
+
+
+@receiver(post_save, sender=Atleta)
+@receiver(post_save, sender=Matricula)
+@receiver(post_delete, sender=Matricula)
+def elegibilidade_alterada(sender, instance, **kwargs):
+    # Só a entrada deste atleta é recalculada
+    atleta_id = instance.pk if sender is Atleta else instance.atleta_id
+    transaction.on_commit(partial(atualizar_elegibilidade, atleta_id))
+
+
+@receiver(post_delete, sender=Atleta)
+def atleta_excluido(sender, instance, **kwargs):
+    transaction.on_commit(partial(remover_elegibilidade, instance.codigo_alfanumerico))
+
+
+@receiver(post_save, sender=StatusMatricula)
+@receiver(post_delete, sender=StatusMatricula)
+def status_matricula_alterado(sender, **kwargs):
+    # O nome do status decide a elegibilidade de todas as matrículas com ele
+    transaction.on_commit(invalidar_elegibilidade)
+
+
+@receiver(pre_save, sender=Frequencia)
+def frequencia_antes_de_salvar(sender, instance, raw=False, **kwargs):
+    # Alteração de atleta, turma ou data: o resumo de origem também muda
+    if not raw and not instance._state.adding:
+        instance._chave_resumo = Frequencia.objects.filter(pk=instance.pk).values_list(
+            'atleta_id', 'turma_id', 'data_aula'
+        ).first()
+
+
+@receiver(post_save, sender=Frequencia)
+def frequencia_salva(sender, instance, created, raw=False, **kwargs):
+    # Na mesma transação do registro
+    if raw:
+        return
+    if created:
+        # Registro novo (check-in): só incrementa
+        duracao = instance.data_saida - instance.data_entrada if instance.data_saida else None
+        somar_aos_resumos(instance.atleta_id, instance.turma_id, instance.data_aula, instance.status, duracao)
+    else:
+        anterior = getattr(instance, '_chave_resumo', None)
+        atualizar_resumos(filter(None, [(instance.atleta_id, instance.turma_id, instance.data_aula), anterior]))
+
+
+@receiver(post_delete, sender=Frequencia)
+def frequencia_excluida(sender, instance, **kwargs):
+    atualizar_resumos([(instance.atleta_id, instance.turma_id, instance.data_aula)])
@@ -0,0 +1,202 @@
+"""
+Sincronização com o leitor offline da portaria (scripts_portaria/leitor_offline.py).
+
+O leitor guarda as leituras em uma fila SQLite local e as valida contra uma
+cópia do cadastro (roster), de modo que a portaria continua funcionando sem
+rede. Duas operações ligam o leitor ao servidor:
+
+  - ``roster(desde)``: atletas (código, nome, modalidades em que são
+    elegíveis) e turmas alterados desde o cursor anterior. Sem cursor, ou
+    com um cursor mais antigo que ROSTER_DELTA_MAXIMO, devolve o cadastro
+    completo (``completo: true``). Os deltas saem de data_atualizacao: não
+    trazem exclusões (atletas, matrículas, turmas) nem alterações feitas
+    com QuerySet.update(). Só o completo, que substitui a cópia do leitor,
+    as elimina; por isso o leitor o pede ao iniciar e periodicamente
+    (ROSTER_COMPLETO_INTERVALO no leitor), sem cursor.
+  - ``sincronizar_leituras(leituras)``: grava um lote de leituras. As
+    entradas viram Frequencia com ``bulk_create(ignore_conflicts=True)``
+    sobre (atleta, turma, data_aula), e as saídas um UPDATE condicional.
+    Reenviar o mesmo lote não muda nada, então o leitor pode repetir o envio
+    sempre que não tiver certeza de que o anterior chegou. Uma entrada que
+    chega depois de a falta da aula ter sido lançada (ou justificada)
+    substitui a falta.
+"""
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from usuarios.codigos import codigo_valido
+
+from .checkin import INTERVALO_MINIMO_SAIDA, normalizar_codigo, status_da_entrada
+from .elegibilidade import matriculas_elegiveis, modalidades_elegiveis
+from .agenda import agenda_turmas
+from .calendario import aulas_do_dia
+from .indice import indice_checkin
+from .resumos import atualizar_resumos
+
+logger = logging.getLogger(__name__)
+
+# Deltas mais antigos que isto devolvem o cadastro completo
+ROSTER_DELTA_MAXIMO = timedelta(days=1)
+# O cursor devolvido recua um pouco, para não perder alterações de transações ainda abertas
+ROSTER_MARGEM_CURSOR = timedelta(seconds=5)
+# Leituras aceitas por chamada de sincronizar_leituras
+MAXIMO_LEITURAS_POR_LOTE = 1000
+
+SENTIDOS = ('entrada', 'saida')
+
+
+def _momento(valor):
+    momento = parse_datetime(valor) if isinstance(valor, str) else None
+    if momento is not None and timezone.is_naive(momento):
+        momento = timezone.make_aware(momento)
+    return momento
+
+
+def roster(desde=None):
+    """Cadastro para o leitor offline: completo ou só o que mudou desde o cursor"""
+    from usuarios.models import Atleta, Matricula
+    from .models import Turma
+
+    agora = timezone.now()
+    desde = _momento(desde) if desde else None
+    completo = desde is None or agora - desde > ROSTER_DELTA_MAXIMO
+
+    atletas = Atleta.objects.all()
+    turmas = Turma.objects.all() if completo else Turma.objects.filter(data_atualizacao__gte=desde)
+    if not completo:
+        alterados = Matricula.objects.filter(data_atualizacao__gte=desde).values('atleta_id')
+        atletas = atletas.filter(Q(data_atualizacao__gte=desde) | Q(id__in=alterados))
+
+    atletas = list(atletas.order_by().values_list('id', 'codigo_alfanumerico', 'nome'))
+    ids = [atleta_id for atleta_id, _, _ in atletas]
+    matriculas = matriculas_elegiveis()
+    if not completo:
+        matriculas = matriculas.filter(atleta_id__in=ids)
+    modalidades = {}
+    for atleta_id, modalidade_id in matriculas.values_list('atleta_id', 'modalidade_id'):
+        modalidades.setdefault(atleta_id, []).append(str(modalidade_id))
+
+    campos = ('id', 'nome', 'modalidade_id', 'dias_semana', 'horario_inicio', 'horario_fim', 'ativa')
+    return {
+        'cursor': (agora - ROSTER_MARGEM_CURSOR).isoformat(),
+        'completo': completo,
+        'atletas': [
+            {'codigo': codigo, 'nome': nome, 'modalidades': modalidades.get(atleta_id, [])}
+            for atleta_id, codigo, nome in atletas
+        ],
+        'turmas': [
+            {
+                'id': str(turma_id), 'nome': nome, 'modalidade': str(modalidade_id), 'dias': dias or [],
+                'inicio': inicio.strftime('%H:%M'), 'fim': fim.strftime('%H:%M'), 'ativa': ativa,
+            }
+            for turma_id, nome, modalidade_id, dias, inicio, fim, ativa in turmas.order_by().values_list(*campos)
+        ],
+    }
+
+
+def gravar_leituras(leituras):
+    """
+    Valida e grava leituras ``{"id", "codigo", "momento" (ISO 8601),
+    "sentido" ("entrada"/"saida")}`` em uma transação. Devolve
+    ``[{'id', 'status', 'motivo'?}]``, com status ``registrada`` ou
+    ``rejeitada``. Gravar de novo as mesmas leituras não muda nada.
+    """
+    from .models import STATUS_COM_ENTRADA, Frequencia
+
+    indice = indice_checkin()
+    agenda = agenda_turmas()
+    resultados = []
+    entradas = {}
+    saidas = []
+    for leitura in sorted(leituras, key=lambda item: str(item.get('momento', ''))):
+        identificador = leitura.get('id')
+        codigo = normalizar_codigo(leitura.get('codigo'))
+        momento = _momento(leitura.get('momento'))
+        sentido = leitura.get('sentido')
+        motivo = None
+        atleta = turma = aula = None
+        if not codigo_valido(codigo):
+            motivo = 'codigo_invalido'
+        elif momento is None or sentido not in SENTIDOS:
+            motivo = 'leitura_invalida'
+        else:
+            atleta = indice.atletas.get(codigo)
+            local = timezone.localtime(momento)
+            aulas = aulas_do_dia(local.date())
+            turma = agenda.turma_atual(modalidades_elegiveis(codigo), local, aulas) if atleta else None
+            aula = aulas.get(turma.id) if turma else None
+            if atleta is None:
+                motivo = 'atleta_nao_encontrado'
+            elif turma is None:
+                motivo = 'sem_turma'
+            elif aula is not None and aula.cancelada:
+                motivo = 'aula_cancelada'
+        if motivo:
+            resultados.append({'id': identificador, 'status': 'rejeitada', 'motivo': motivo})
+            continue
+
+        chave = (atleta.id, turma.id, local.date())
+        if sentido == 'entrada':
+            # Várias entradas do mesmo atleta na mesma aula: vale a primeira
+            if chave not in entradas:
+                entradas[chave] = Frequencia(
+                    atleta_id=atleta.id, turma_id=turma.id, data_aula=local.date(),
+                    aula_id=aula.id if aula else None,
+                    professor_id=aula.professor_id if aula else turma.professor_id,
+                    data_entrada=momento, qr_code_utilizado=codigo,
+                    status=status_da_entrada(turma, local),
+                )
+        else:
+            saidas.append((chave, momento))
+        resultados.append({'id': identificador, 'status': 'registrada'})
+
+    with transaction.atomic():
+        # Conflito em (atleta, turma, data_aula): a entrada já foi gravada (online ou em envio anterior)
+        Frequencia.objects.bulk_create(entradas.values(), ignore_conflicts=True)
+        # Leitura que chegou depois de a falta ser lançada (calendario.registrar_ausencias) ou
+        # justificada: vira a presença
+        if entradas:
+            faltas = Frequencia.objects.exclude(status__in=STATUS_COM_ENTRADA).filter(
+                atleta_id__in={entrada.atleta_id for entrada in entradas.values()},
+                data_aula__in={entrada.data_aula for entrada in entradas.values()},
+            ).order_by().values_list('id', 'status', 'atleta_id', 'turma_id', 'data_aula')
+            for falta_id, status, *chave in faltas:
+                entrada = entradas.get(tuple(chave))
+                if entrada is not None:
+                    Frequencia.objects.filter(id=falta_id, status=status).update(
+                        status=entrada.status, data_entrada=entrada.data_entrada,
+                        qr_code_utilizado=entrada.qr_code_utilizado, observacoes='',
+                        data_atualizacao=timezone.now(),
+                    )
+        for (atleta_id, turma_id, data_aula), momento in saidas:
+            Frequencia.objects.filter(
+                atleta_id=atleta_id, turma_id=turma_id, data_aula=data_aula, data_saida__isnull=True,
+                data_entrada__lte=momento - INTERVALO_MINIMO_SAIDA,
+            ).update(data_saida=momento)
+        atualizar_resumos(list(entradas) + [chave for chave, _ in saidas])
+    return resultados
+
+
+def sincronizar_leituras(leituras):
+    """
+    Grava um lote de leituras do leitor offline (ver ``gravar_leituras``).
+    Devolve ``{'status', 'message', 'resultados': [...]}``; as leituras
+    rejeitadas não adiantam ser reenviadas.
+    """
+    if len(leituras) > MAXIMO_LEITURAS_POR_LOTE:
+        return {'status': 'error', 'message': f'Máximo de {MAXIMO_LEITURAS_POR_LOTE} leituras por lote'}
+
+    resultados = gravar_leituras(leituras)
+    registradas = sum(1 for resultado in resultados if resultado['status'] == 'registrada')
+    logger.info(f"[OK] Sincronização da portaria: {registradas} leituras registradas, "
+                f"{len(resultados) - registradas} rejeitadas")
+    return {
+        'status': 'success',
+        'message': f'{registradas} leituras registradas',
+        'resultados': resultados,
+    }
@@ -0,0 +1,63 @@
+import logging
+import time
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, queue='default')
+def gerar_aulas_task(self, semanas=None):
+    """
+    Tarefa Celery (diária, CELERY_BEAT_SCHEDULE) que mantém o calendário de
+    aulas gerado até AULAS_SEMANAS_A_FRENTE semanas à frente.
+    """
+    try:
+        from .calendario import gerar_aulas
+
+        criadas = gerar_aulas(semanas)
+        logger.info(f"[OK] Calendário de aulas atualizado: {criadas} aulas criadas")
+        return {
+            'status': 'success',
+            'message': f'{criadas} aulas criadas',
+            'criadas': criadas
+        }
+
+    except Exception as e:
+        logger.error(f"[ERRO] Erro ao gerar aulas: {e}", exc_info=True)
+        return {
+            'status': 'error',
+            'message': f'Erro: {str(e)}'
+        }
+
+
+@shared_task(bind=True, queue='default')
+def registrar_ausencias_task(self):
+    """
+    Tarefa Celery (periódica, CELERY_BEAT_SCHEDULE) que lança "ausente" para
+    os atletas da turma sem registro nas aulas já encerradas.
+    """
+    try:
+        from .calendario import registrar_ausencias
+
+        inicio = time.perf_counter()
+        aulas, faltas = registrar_ausencias()
+        duracao = time.perf_counter() - inicio
+        por_segundo = faltas / duracao if duracao else 0
+        logger.info(f"[OK] Faltas lançadas: {faltas} em {aulas} aulas, "
+                    f"{duracao:.2f}s ({por_segundo:.0f} registros/s)")
+        return {
+            'status': 'success',
+            'message': f'{faltas} faltas lançadas em {aulas} aulas',
+            'aulas': aulas,
+            'faltas': faltas,
+            'duracao': round(duracao, 3),
+            'registros_por_segundo': round(por_segundo, 1)
+        }
+
+    except Exception as e:
+        logger.error(f"[ERRO] Erro ao lançar faltas: {e}", exc_info=True)
+        return {
+            'status': 'error',
+            'message': f'Erro: {str(e)}'
+        }
@@ -1,3 +1,418 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+from datetime import date, datetime, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from usuarios.codigos import criar_atletas_em_lote
+from usuarios.models import Usuario, Atleta, Modalidade, TipoMatricula, StatusMatricula, Matricula
+
+from .agenda import invalidar_agenda
+from .calendario import invalidar_aulas, registrar_ausencias, sincronizar_aulas_turma
+from .checkin import TOLERANCIA_ATRASO, registrar_leitura
+from .sincronizacao import gravar_leituras
+from .elegibilidade import invalidar_elegibilidade
+from .gravacao import SEGMENTO_ORFAO, GravacaoEmGrupo
+from .indice import invalidar_indice
+from .models import Professor, Turma, Aula, Frequencia, mascara_dias
+
+
+def novo_atleta(usuario, numero):
+    """Atleta com os campos obrigatórios preenchidos, para criar_atletas_em_lote"""
+    return Atleta(
+        usuario=usuario, nome=f'Atleta {numero}', data_nascimento=date(2012, 1, 1),
+        cpf=f'{numero:011d}', sexo='M', parentesco='filho',
+        cep='78000000', endereco='Rua', numero='1', bairro='Centro', cidade='Cuiabá', estado='MT',
+        escolaridade='medio', escola='Escola', turno='matutino',
+    )
+
+
+class ListagensAdminTests(TestCase):
+    """
+    As listagens do admin fazem o mesmo número de consultas com 10 ou 500
+    registros: colunas calculadas vêm de anotações e select_related/
+    prefetch_related, nunca de uma consulta por linha.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_superuser(
+            email='admin@exemplo.com', username='admin', first_name='Admin', last_name='Teste', password='x',
+        )
+        cls.modalidades = [Modalidade.objects.create(nome=nome) for nome in ('Judô', 'Jiu-Jitsu')]
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def criar_usuarios(self, quantidade):
+        inicio = Usuario.objects.count()
+        return Usuario.objects.bulk_create([
+            Usuario(email=f'usuario{i}@exemplo.com', username=f'usuario{i}', first_name='Usuário', last_name=str(i))
+            for i in range(inicio, inicio + quantidade)
+        ])
+
+    def criar_professores(self, quantidade):
+        professores = Professor.objects.bulk_create([
+            Professor(usuario=usuario, graduacao='preta') for usuario in self.criar_usuarios(quantidade)
+        ])
+        Professor.modalidades.through.objects.bulk_create([
+            Professor.modalidades.through(professor_id=professor.id, modalidade_id=modalidade.id)
+            for professor in professores for modalidade in self.modalidades
+        ])
+        return professores
+
+    def criar_turmas(self, quantidade, professor=None):
+        # bulk_create: sem os sinais que geram o calendário de cada turma
+        professor = professor or self.criar_professores(1)[0]
+        inicio = Turma.objects.count()
+        return Turma.objects.bulk_create([
+            Turma(
+                nome=f'Turma {i}', modalidade=self.modalidades[0], professor=professor,
+                dias_semana=['segunda', 'quarta'], horario_inicio=time(18, 0), horario_fim=time(19, 0),
+            )
+            for i in range(inicio, inicio + quantidade)
+        ])
+
+    def criar_aulas(self, quantidade):
+        turma = self.criar_turmas(1)[0]
+        inicio = Aula.objects.count()
+        return Aula.objects.bulk_create([
+            Aula(
+                turma=turma, professor_id=turma.professor_id, data=date(2025, 1, 1) + timedelta(days=i),
+                horario_inicio=turma.horario_inicio, horario_fim=turma.horario_fim,
+            )
+            for i in range(inicio, inicio + quantidade)
+        ])
+
+    def criar_frequencias(self, quantidade):
+        """Uma aula com ``quantidade`` atletas, chegando com atrasos diferentes"""
+        aula = self.criar_aulas(1)[0]
+        inicio = Atleta.objects.count()
+        atletas = criar_atletas_em_lote([
+            novo_atleta(usuario, inicio + i) for i, usuario in enumerate(self.criar_usuarios(quantidade))
+        ])
+        entrada = timezone.make_aware(datetime.combine(aula.data, aula.horario_inicio))
+        return Frequencia.objects.bulk_create([
+            Frequencia(
+                atleta=atleta, turma_id=aula.turma_id, aula=aula, professor_id=aula.professor_id,
+                data_aula=aula.data, qr_code_utilizado=atleta.codigo_alfanumerico,
+                data_entrada=entrada + timedelta(minutes=i % 40),
+                data_saida=entrada + timedelta(minutes=60),
+            )
+            for i, atleta in enumerate(atletas)
+        ])
+
+    def assertConsultasFixas(self, modelo, criar, orcamento, parametros=''):
+        url = reverse(f'admin:frequencia_{modelo}_changelist') + parametros
+        criados = 0
+        for total in (10, 500):
+            criar(total - criados)
+            criados = total
+            with self.assertNumQueries(orcamento):
+                resposta = self.client.get(url)
+            self.assertEqual(resposta.status_code, 200)
+
+    def test_listagem_de_professores(self):
+        self.assertConsultasFixas('professor', self.criar_professores, 11)
+
+    def test_listagem_de_turmas(self):
+        self.assertConsultasFixas('turma', self.criar_turmas, 11)
+
+    def test_listagem_de_aulas(self):
+        self.assertConsultasFixas('aula', self.criar_aulas, 13)
+
+    def test_listagem_de_frequencias(self):
+        self.assertConsultasFixas('frequencia', self.criar_frequencias, 12)
+
+    def test_listagem_de_frequencias_por_atraso(self):
+        # Filtro e ordenação pelo atraso calculado no banco
+        self.assertConsultasFixas('frequencia', self.criar_frequencias, 12, '?atraso=ate_30&o=-9')
+
+    def test_faltas_fora_do_filtro_de_atraso(self):
+        no_horario, atrasada = self.criar_frequencias(2)
+        Frequencia.objects.filter(id=no_horario.id).update(status='ausente')
+        self.assertIsNone(Frequencia.objects.com_tempos().get(id=no_horario.id).atraso)
+        self.assertEqual(Frequencia.objects.com_tempos().get(id=atrasada.id).atraso, 1)
+
+        url = reverse('admin:frequencia_frequencia_changelist')
+        self.assertEqual(self.client.get(url + '?atraso=no_horario').context['cl'].result_count, 0)
+        self.assertEqual(self.client.get(url + '?atraso=ate_10').context['cl'].result_count, 1)
+
+
+class RegistrarAusenciasTests(TestCase):
+    """Faltas lançadas só para os atletas da turma, não para toda a modalidade"""
+
+    @classmethod
+    def setUpTestData(cls):
+        usuario = Usuario.objects.create_user(
+            email='prof@exemplo.com', username='prof', first_name='Professor', last_name='Teste', password='x',
+        )
+        cls.professor = Professor.objects.create(usuario=usuario, graduacao='preta')
+        cls.judo, cls.jiu_jitsu = [Modalidade.objects.create(nome=nome) for nome in ('Judô', 'Jiu-Jitsu')]
+        # bulk_create: sem os sinais que geram o calendário de cada turma
+        cls.infantil, cls.adulto, cls.unica = Turma.objects.bulk_create([
+            Turma(
+                nome=nome, modalidade=modalidade, professor=cls.professor, dias_semana=['segunda'],
+                horario_inicio=time(18, 0), horario_fim=time(19, 0),
+            )
+            for nome, modalidade in (('Infantil', cls.judo), ('Adulto', cls.judo), ('Única', cls.jiu_jitsu))
+        ])
+        tipo = TipoMatricula.objects.create(nome='Mensal')
+        ativa = StatusMatricula.objects.create(nome='Ativa')
+        cls.frequente, cls.novato = criar_atletas_em_lote([novo_atleta(usuario, numero) for numero in (1, 2)])
+        Matricula.objects.bulk_create([
+            Matricula(atleta=atleta, tipo_matricula=tipo, modalidade=modalidade, status_matricula=ativa)
+            for atleta in (cls.frequente, cls.novato) for modalidade in (cls.judo, cls.jiu_jitsu)
+        ])
+
+    def aula(self, turma, data):
+        return Aula.objects.create(
+            turma=turma, professor=self.professor, data=data,
+            horario_inicio=turma.horario_inicio, horario_fim=turma.horario_fim,
+        )
+
+    def test_faltas_so_nas_turmas_do_atleta(self):
+        anterior, data = date(2025, 3, 3), date(2025, 3, 10)
+        aula_anterior = self.aula(self.infantil, anterior)
+        Aula.objects.filter(id=aula_anterior.id).update(ausencias_registradas=True)
+        Frequencia.objects.create(
+            atleta=self.frequente, turma=self.infantil, aula=aula_anterior, professor=self.professor,
+            data_aula=anterior, qr_code_utilizado=self.frequente.codigo_alfanumerico,
+            data_entrada=timezone.make_aware(datetime.combine(anterior, time(18, 0))),
+        )
+        for turma in (self.infantil, self.adulto, self.unica):
+            self.aula(turma, data)
+
+        self.assertEqual(registrar_ausencias(timezone.make_aware(datetime(2025, 3, 11))), (3, 3))
+        faltas = set(Frequencia.objects.filter(status='ausente').values_list('atleta_id', 'turma_id'))
+        self.assertEqual(faltas, {
+            # Turma que o atleta frequenta
+            (self.frequente.id, self.infantil.id),
+            # Única turma da modalidade: todos os matriculados
+            (self.frequente.id, self.unica.id),
+            (self.novato.id, self.unica.id),
+        })
+
+
+class CenarioCheckin(TestCase):
+    """Turma de todos os dias, das 18h às 19h, com dois atletas matriculados"""
+
+    @classmethod
+    def setUpTestData(cls):
+        usuario = Usuario.objects.create_user(
+            email='prof@exemplo.com', username='prof', first_name='Professor', last_name='Teste', password='x',
+        )
+        cls.professor = Professor.objects.create(usuario=usuario, graduacao='preta')
+        modalidade = Modalidade.objects.create(nome='Judô')
+        dias = ['segunda', 'terca', 'quarta', 'quinta', 'sexta', 'sabado', 'domingo']
+        # bulk_create: sem os sinais que geram o calendário da turma
+        cls.turma = Turma.objects.bulk_create([Turma(
+            nome='Adulto', modalidade=modalidade, professor=cls.professor, dias_semana=dias,
+            dias_mask=mascara_dias(dias), horario_inicio=time(18, 0), horario_fim=time(19, 0),
+        )])[0]
+        cls.atletas = criar_atletas_em_lote([novo_atleta(usuario, numero) for numero in (1, 2)])
+        tipo = TipoMatricula.objects.create(nome='Mensal')
+        ativa = StatusMatricula.objects.create(nome='Ativa')
+        Matricula.objects.bulk_create([
+            Matricula(atleta=atleta, tipo_matricula=tipo, modalidade=modalidade, status_matricula=ativa)
+            for atleta in cls.atletas
+        ])
+        cls.codigo, cls.outro_codigo = [atleta.codigo_alfanumerico for atleta in cls.atletas]
+        cls.momento = timezone.make_aware(datetime(2025, 3, 10, 18, 5))
+
+    def setUp(self):
+        # Os índices em memória são invalidados depois do commit, que não acontece no TestCase
+        for invalidar in (invalidar_indice, invalidar_agenda, invalidar_elegibilidade, invalidar_aulas):
+            invalidar()
+
+
+@mock.patch.object(GravacaoEmGrupo, '_iniciar')
+class GravacaoEmGrupoTests(CenarioCheckin):
+    """O diário só sai do disco depois que as suas leituras estão no banco"""
+
+    def setUp(self):
+        super().setUp()
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio, ignore_errors=True)
+
+    def gravacao(self, diretorio=None):
+        return GravacaoEmGrupo(diretorio or self.diretorio, intervalo=0.25, maximo=100)
+
+    def segmentos(self):
+        return sorted(os.listdir(self.diretorio))
+
+    def test_segmento_de_processo_que_caiu_e_gravado(self, _iniciar):
+        caminho = os.path.join(self.diretorio, 'segmento-1-1-0.jsonl')
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            leitura = {'codigo': self.codigo, 'momento': self.momento.isoformat(), 'sentido': 'entrada'}
+            arquivo.write(json.dumps(leitura) + '\n')
+            # Última linha incompleta: o processo caiu antes de confirmá-la
+            arquivo.write('{"codigo": "')
+        parado = self.momento.timestamp() - SEGMENTO_ORFAO
+        os.utime(caminho, (parado, parado))
+
+        self.assertEqual(self.gravacao().resgatar_orfaos(), 1)
+        self.assertTrue(Frequencia.objects.filter(atleta=self.atletas[0], turma=self.turma).exists())
+        self.assertEqual(self.segmentos(), [])
+
+    def test_falha_na_gravacao_mantem_o_lote_e_o_segmento(self, _iniciar):
+        gravacao = self.gravacao()
+        self.assertEqual(gravacao.registrar(self.codigo, self.momento)['status'], 'entrada')
+        with mock.patch('frequencia.sincronizacao.gravar_leituras', side_effect=ValueError('falha')), \
+                self.assertLogs('frequencia.gravacao', 'ERROR'):
+            self.assertEqual(gravacao.descarregar(), 0)
+        self.assertFalse(Frequencia.objects.exists())
+        self.assertEqual(len(self.segmentos()), 2)
+
+        # A gravação seguinte leva a leitura que falhou e só então apaga o segmento dela
+        self.assertEqual(gravacao.registrar(self.outro_codigo, self.momento)['status'], 'entrada')
+        self.assertEqual(gravacao.descarregar(), 2)
+        self.assertEqual(Frequencia.objects.count(), 2)
+        self.assertEqual(len(self.segmentos()), 1)
+
+    def test_saida_lida_em_outro_processo(self, _iniciar):
+        primeiro, segundo = self.gravacao(), self.gravacao(tempfile.mkdtemp(dir=self.diretorio))
+        # O segundo processo já leu as presenças da turma antes da entrada
+        self.assertEqual(segundo.registrar(self.outro_codigo, self.momento)['status'], 'entrada')
+        self.assertEqual(primeiro.registrar(self.codigo, self.momento)['status'], 'entrada')
+        primeiro.descarregar()
+
+        saida = self.momento + timedelta(minutes=30)
+        self.assertEqual(segundo.registrar(self.codigo, saida)['status'], 'saida')
+        segundo.descarregar()
+        registro = Frequencia.objects.get(atleta=self.atletas[0], turma=self.turma)
+        self.assertEqual(registro.data_saida, saida)
+
+
+class FaltaAntesDaChegadaTests(CenarioCheckin):
+    """Leitura sobre uma falta já lançada ou justificada vira a entrada, não a saída"""
+
+    def setUp(self):
+        super().setUp()
+        Frequencia.objects.bulk_create([
+            # data_entrada é obrigatória: a falta fica com o horário de início da aula
+            Frequencia(
+                atleta=atleta, turma=self.turma, professor=self.professor, data_aula=self.momento.date(),
+                status=status, data_entrada=self.momento - timedelta(minutes=5), observacoes=observacoes,
+            )
+            for atleta, status, observacoes in zip(
+                self.atletas, ('justificado', 'ausente'), ('Atestado', 'Falta lançada automaticamente'),
+            )
+        ])
+
+    def test_checkin_online(self):
+        for codigo in (self.codigo, self.outro_codigo):
+            self.assertEqual(registrar_leitura(codigo, self.momento)['status'], 'entrada')
+        self.assertEqual(registrar_leitura(self.codigo, self.momento + timedelta(minutes=30))['status'], 'saida')
+        registros = Frequencia.objects.order_by('atleta__nome').values_list(
+            'status', 'data_entrada', 'data_saida', 'observacoes')
+        self.assertEqual(list(registros), [
+            ('presente', self.momento, self.momento + timedelta(minutes=30), ''),
+            ('presente', self.momento, None, ''),
+        ])
+
+    def test_leitor_offline(self):
+        gravar_leituras([
+            {'id': str(indice), 'codigo': codigo, 'momento': self.momento.isoformat(), 'sentido': 'entrada'}
+            for indice, codigo in enumerate((self.codigo, self.outro_codigo))
+        ])
+        self.assertEqual(
+            set(Frequencia.objects.values_list('status', 'data_entrada')), {('presente', self.momento)},
+        )
+
+    @mock.patch.object(GravacaoEmGrupo, '_iniciar')
+    def test_gravacao_em_grupo(self, _iniciar):
+        diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, diretorio, ignore_errors=True)
+        gravacao = GravacaoEmGrupo(diretorio, intervalo=0.25, maximo=100)
+        # O primeiro atleta lê a turma inteira do banco; o segundo, só o próprio registro
+        for codigo in (self.codigo, self.outro_codigo):
+            self.assertEqual(gravacao.registrar(codigo, self.momento)['status'], 'entrada')
+        gravacao.descarregar()
+        self.assertEqual(
+            set(Frequencia.objects.values_list('status', 'data_entrada')), {('presente', self.momento)},
+        )
+
+
+@override_settings(FREQUENCIA_LEITOR_TOKEN='token-do-leitor')
+class CsrfPortariaTests(TestCase):
+    """Sem CSRF só com o token do leitor; pela sessão da equipe, o CSRF vale"""
+
+    def setUp(self):
+        self.client = Client(enforce_csrf_checks=True)
+        self.equipe = Usuario.objects.create_user(
+            email='equipe@exemplo.com', username='equipe', first_name='Equipe', last_name='Teste',
+            password='x', is_staff=True,
+        )
+
+    def test_leitor_com_token_sem_csrf(self):
+        for nome, corpo in (('checkin', {'codigo': 'X'}), ('sincronizar', {'leituras': []})):
+            resposta = self.client.post(
+                reverse(f'frequencia:{nome}'), corpo, content_type='application/json',
+                HTTP_AUTHORIZATION='Bearer token-do-leitor',
+            )
+            self.assertNotEqual(resposta.status_code, 403, nome)
+
+    def test_sessao_da_equipe_exige_csrf(self):
+        self.client.force_login(self.equipe)
+        for nome, corpo in (('checkin', {'codigo': 'X'}), ('sincronizar', {'leituras': []})):
+            resposta = self.client.post(reverse(f'frequencia:{nome}'), corpo, content_type='application/json')
+            self.assertEqual(resposta.status_code, 403, nome)
+
+    def test_sessao_da_equipe_com_csrf(self):
+        self.client.force_login(self.equipe)
+        self.client.get(reverse('admin:index'))
+        resposta = self.client.post(
+            reverse('frequencia:checkin'), {'codigo': 'X'}, content_type='application/json',
+            HTTP_X_CSRFTOKEN=self.client.cookies['csrftoken'].value,
+        )
+        self.assertEqual(resposta.status_code, 400)
+
+
+class AulaRemarcadaTests(CenarioCheckin):
+    """Aula com horário próprio: janela do check-in e atraso pelo horário da aula"""
+
+    def setUp(self):
+        super().setUp()
+        self.data = timezone.localdate() + timedelta(days=7)
+        self.aula = Aula.objects.create(
+            turma=self.turma, professor=self.professor, data=self.data,
+            horario_inicio=time(20, 0), horario_fim=time(21, 0), horario_personalizado=True,
+        )
+
+    def momento_em(self, hora, minuto):
+        return timezone.make_aware(datetime.combine(self.data, time(hora, minuto)))
+
+    def test_checkin_no_horario_da_aula(self):
+        self.assertEqual(registrar_leitura(self.codigo, self.momento_em(18, 5))['status'], 'sem_turma')
+        self.assertEqual(registrar_leitura(self.codigo, self.momento_em(20, 5))['status'], 'entrada')
+        registro = Frequencia.objects.com_tempos().get(atleta=self.atletas[0])
+        self.assertEqual((registro.aula_id, registro.status, registro.atraso), (self.aula.id, 'presente', 5))
+
+    def test_alteracao_da_turma_mantem_o_horario_da_aula(self):
+        normal = Aula.objects.create(
+            turma=self.turma, professor=self.professor, data=self.data + timedelta(days=1),
+            horario_inicio=time(18, 0), horario_fim=time(19, 0),
+        )
+        Turma.objects.filter(id=self.turma.id).update(horario_inicio=time(17, 0), horario_fim=time(18, 0))
+        sincronizar_aulas_turma(self.turma.id)
+        self.aula.refresh_from_db()
+        normal.refresh_from_db()
+        self.assertEqual((self.aula.horario_inicio, self.aula.horario_fim), (time(20, 0), time(21, 0)))
+        self.assertEqual((normal.horario_inicio, normal.horario_fim), (time(17, 0), time(18, 0)))
+
+    def test_status_concorda_com_o_atraso_calculado(self):
+        # Online às 20h15 (atrasado) e, pela portaria offline, às 20h05 (no horário)
+        self.assertEqual(registrar_leitura(self.codigo, self.momento_em(20, 15))['status'], 'entrada')
+        gravar_leituras([{
+            'id': '1', 'codigo': self.outro_codigo, 'momento': self.momento_em(20, 5).isoformat(), 'sentido': 'entrada',
+        }])
+        registros = Frequencia.objects.com_tempos().order_by('atraso')
+        self.assertEqual([(registro.status, registro.atraso) for registro in registros], [('presente', 5), ('atrasado', 15)])
+        for registro in registros:
+            self.assertEqual(registro.status == 'atrasado', registro.atraso > TOLERANCIA_ATRASO)
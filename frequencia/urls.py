@@ -0,0 +1,10 @@
+from django.urls import path
+from . import views
+
+app_name = 'frequencia'
+
+urlpatterns = [
+    path('checkin/', views.checkin, name='checkin'),
+    path('portaria/roster/', views.roster, name='roster'),
+    path('portaria/sincronizar/', views.sincronizar, name='sincronizar'),
+]
@@ -1,3 +1,104 @@
-from django.shortcuts import render
+import hmac
+import json
+from functools import wraps
 
-# Create your views here.
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.views.decorators.http import require_GET, require_POST
+
+# Código HTTP de cada status de registrar_leitura
+STATUS_HTTP = {
+    'entrada': 200,
+    'saida': 200,
+    'ja_registrado': 200,
+    'codigo_invalido': 400,
+    'atleta_nao_encontrado': 404,
+    'sem_turma': 409,
+    'aula_cancelada': 409,
+    'erro': 500,
+}
+
+
+def _token_valido(request):
+    """Leitor da portaria: Authorization: Bearer <FREQUENCIA_LEITOR_TOKEN>"""
+    token = getattr(settings, 'FREQUENCIA_LEITOR_TOKEN', '')
+    autorizacao = request.headers.get('Authorization', '')
+    return bool(token) and hmac.compare_digest(autorizacao, f'Bearer {token}')
+
+
+def _leitor_autorizado(request):
+    """Leitor da portaria (token em FREQUENCIA_LEITOR_TOKEN) ou usuário da equipe logado"""
+    return _token_valido(request) or request.user.is_staff
+
+
+def _csrf_exceto_leitor(view):
+    """
+    Dispensa o CSRF só para o leitor com token. Pela sessão da equipe, o
+    POST passa pela verificação de CSRF: sem ela, qualquer página aberta
+    por alguém da equipe logado poderia registrar leituras em seu nome.
+    """
+    protegida = csrf_protect(view)
+
+    @wraps(view)
+    def verificar(request, *args, **kwargs):
+        if _token_valido(request):
+            return view(request, *args, **kwargs)
+        return protegida(request, *args, **kwargs)
+    return csrf_exempt(verificar)
+
+
+@_csrf_exceto_leitor
+@require_POST
+def checkin(request):
+    """
+    Check-in/check-out pelo QR Code: recebe ``{"codigo": "..."}`` (JSON ou
+    formulário) e responde com o resultado de ``registrar_leitura`` (ou da
+    gravação em grupo, com FREQUENCIA_GRAVACAO_EM_GRUPO).
+    """
+    if not _leitor_autorizado(request):
+        return JsonResponse({'status': 'nao_autorizado', 'message': 'Não autorizado'}, status=401)
+
+    if request.content_type == 'application/json':
+        try:
+            codigo = json.loads(request.body or b'{}').get('codigo')
+        except (ValueError, AttributeError):
+            codigo = None
+    else:
+        codigo = request.POST.get('codigo')
+
+    if settings.FREQUENCIA_GRAVACAO_EM_GRUPO:
+        from .gravacao import registrar_leitura_em_grupo as registrar_leitura
+    else:
+        from .checkin import registrar_leitura
+    resultado = registrar_leitura(codigo)
+    return JsonResponse(resultado, status=STATUS_HTTP.get(resultado['status'], 200))
+
+
+@require_GET
+def roster(request):
+    """Cadastro para o leitor offline (``?desde=<cursor>`` para receber só as alterações)"""
+    if not _leitor_autorizado(request):
+        return JsonResponse({'status': 'nao_autorizado', 'message': 'Não autorizado'}, status=401)
+
+    from .sincronizacao import roster as montar_roster
+    return JsonResponse(montar_roster(request.GET.get('desde')))
+
+
+@_csrf_exceto_leitor
+@require_POST
+def sincronizar(request):
+    """Recebe ``{"leituras": [...]}`` do leitor offline e grava as frequências"""
+    if not _leitor_autorizado(request):
+        return JsonResponse({'status': 'nao_autorizado', 'message': 'Não autorizado'}, status=401)
+
+    try:
+        leituras = json.loads(request.body or b'{}').get('leituras')
+    except (ValueError, AttributeError):
+        leituras = None
+    if not isinstance(leituras, list) or not all(isinstance(leitura, dict) for leitura in leituras):
+        return JsonResponse({'status': 'error', 'message': 'Envie {"leituras": [...]}'}, status=400)
+
+    from .sincronizacao import sincronizar_leituras
+    resultado = sincronizar_leituras(leituras)
+    return JsonResponse(resultado, status=200 if resultado['status'] == 'success' else 400)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+"""
+Benchmark: "qual turma está acontecendo agora" com a agenda de turmas
+
+Cria em um banco temporário N turmas com dias e horários aleatórios e mede
+o custo de achar as turmas abertas em (dia da semana, minuto) de três
+formas:
+
+  - banco: carregar as turmas ativas e filtrar dias_semana em Python (como
+    era feito antes de existir um índice);
+  - lista do dia: percorrer em memória as turmas do dia (índice anterior);
+  - agenda: busca binária nos limites de frequencia.agenda.
+
+Execute: python scripts_benchmark/benchmark_agenda.py --turmas 300 --consultas 20000
+"""
+import argparse
+import datetime
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+# Adicionar o diretório do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configurar Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cadastro_pessoas.settings')
+import django
+django.setup()
+
+from django.db import connection
+
+from benchmark_checkin import criar_cenario
+
+
+def criar_turmas(quantidade):
+    from frequencia.models import Turma, mascara_dias
+
+    turma, _ = criar_cenario(0)
+    aleatorio = random.Random(42)
+    nomes = [dia for dia, _ in Turma.DIAS_SEMANA_CHOICES]
+    turmas = []
+    for i in range(quantidade):
+        inicio = aleatorio.randrange(6 * 60, 21 * 60, 15)
+        dias = aleatorio.sample(nomes, aleatorio.randint(1, 3))
+        turmas.append(Turma(
+            nome=f'Turma {i}', modalidade_id=turma.modalidade_id, professor_id=turma.professor_id,
+            dias_semana=dias, dias_mask=mascara_dias(dias),
+            horario_inicio=datetime.time(inicio // 60, inicio % 60),
+            horario_fim=datetime.time((inicio + 60) // 60, (inicio + 60) % 60),
+        ))
+    Turma.objects.bulk_create(turmas)
+
+
+def pelo_banco(dia, minuto):
+    from frequencia.agenda import ANTECEDENCIA_ENTRADA, TOLERANCIA_SAIDA
+    from frequencia.models import Turma
+
+    nome_dia = Turma.DIAS_SEMANA_CHOICES[dia][0]
+    return [
+        turma for turma in Turma.objects.filter(ativa=True).order_by()
+        if nome_dia in turma.dias_semana
+        and turma.horario_inicio.hour * 60 + turma.horario_inicio.minute - ANTECEDENCIA_ENTRADA <= minuto
+        <= turma.horario_fim.hour * 60 + turma.horario_fim.minute + TOLERANCIA_SAIDA
+    ]
+
+
+def medir(nome, buscar, consultas):
+    inicio = time.perf_counter()
+    encontradas = 0
+    for dia, minuto in consultas:
+        encontradas += len(buscar(dia, minuto))
+    duracao = time.perf_counter() - inicio
+    print(f"{nome:<14} {duracao / len(consultas) * 1e6:10.1f} µs/consulta  ({encontradas} turmas encontradas)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--turmas', type=int, default=300)
+    parser.add_argument('--consultas', type=int, default=20000)
+    args = parser.parse_args()
+
+    # Banco temporário
+    pasta = tempfile.mkdtemp()
+    connection.settings_dict['TEST']['NAME'] = os.path.join(pasta, 'benchmark.sqlite3')
+    nome_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+
+    try:
+        from frequencia.agenda import ANTECEDENCIA_ENTRADA, TOLERANCIA_SAIDA, AgendaTurmas
+
+        criar_turmas(args.turmas)
+        inicio = time.perf_counter()
+        agenda = AgendaTurmas.montar()
+        print(f"{args.turmas} turmas; montagem da agenda: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+        # Lista do dia, como no índice anterior
+        por_dia = [[] for _ in range(7)]
+        for dia in range(7):
+            for trecho in agenda.trechos[dia]:
+                por_dia[dia].extend(turma for turma in trecho if turma not in por_dia[dia])
+
+        def lista_do_dia(dia, minuto):
+            return [
+                turma for turma in por_dia[dia]
+                if turma.inicio - ANTECEDENCIA_ENTRADA <= minuto <= turma.fim + TOLERANCIA_SAIDA
+            ]
+
+        aleatorio = random.Random(7)
+        consultas = [(aleatorio.randrange(7), aleatorio.randrange(24 * 60)) for _ in range(args.consultas)]
+        medir('Banco', pelo_banco, consultas[:max(1, args.consultas // 100)])
+        medir('Lista do dia', lista_do_dia, consultas)
+        medir('Agenda', agenda.abertas, consultas)
+    finally:
+        connection.creation.destroy_test_db(nome_original, verbosity=0)
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
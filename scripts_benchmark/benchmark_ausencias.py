@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""
+Benchmark: lançamento das faltas das aulas encerradas
+
+Monta em um banco temporário uma turma com N atletas matriculados e D dias
+de aulas já encerradas, com parte dos atletas presente em cada aula, e
+compara duas formas de lançar "ausente" para os demais:
+
+  - por atleta: para cada aula e matrícula, exists() na Frequencia e um
+    INSERT por falta (como seria lançar à mão, registro a registro);
+  - em lote: frequencia.calendario.registrar_ausencias (uma consulta com as
+    faltas de todas as aulas e bulk_create).
+
+Mostra faltas/s e consultas SQL de cada forma.
+
+Execute: python scripts_benchmark/benchmark_ausencias.py --atletas 300 --dias 7 --presenca 0.6
+"""
+import argparse
+import datetime
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+# Adicionar o diretório do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configurar Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cadastro_pessoas.settings')
+import django
+django.setup()
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from benchmark_checkin import criar_cenario
+
+
+def criar_aulas(turma, codigos, dias, presenca):
+    """Aulas dos últimos ``dias`` dias e as presenças sorteadas"""
+    from frequencia.calendario import gerar_aulas
+    from frequencia.models import Aula, Frequencia
+    from usuarios.models import Atleta
+
+    hoje = timezone.localdate()
+    gerar_aulas(semanas=1, hoje=hoje - datetime.timedelta(days=dias))
+    aulas = list(Aula.objects.filter(turma=turma, data__lt=hoje))
+    atletas = dict(Atleta.objects.filter(codigo_alfanumerico__in=codigos).values_list('codigo_alfanumerico', 'id'))
+    aleatorio = random.Random(42)
+    Frequencia.objects.bulk_create([
+        Frequencia(
+            atleta_id=atletas[codigo], turma_id=turma.id, aula_id=aula.id, professor_id=aula.professor_id,
+            data_aula=aula.data, qr_code_utilizado=codigo,
+            data_entrada=timezone.make_aware(datetime.datetime.combine(aula.data, aula.horario_inicio)),
+        )
+        for aula in aulas for codigo in codigos if aleatorio.random() < presenca
+    ], batch_size=500)
+    return aulas
+
+
+def por_atleta(aulas):
+    """Uma verificação e um INSERT por falta"""
+    from frequencia.elegibilidade import matriculas_elegiveis
+    from frequencia.models import Aula, Frequencia
+
+    faltas = 0
+    for aula in aulas:
+        matriculas = matriculas_elegiveis().filter(modalidade_id=aula.turma.modalidade_id).select_related('atleta')
+        for matricula in matriculas:
+            if not Frequencia.objects.filter(atleta_id=matricula.atleta_id, turma_id=aula.turma_id, data_aula=aula.data).exists():
+                Frequencia.objects.create(
+                    atleta_id=matricula.atleta_id, turma_id=aula.turma_id, aula_id=aula.id,
+                    professor_id=aula.professor_id, data_aula=aula.data, status='ausente',
+                    qr_code_utilizado=matricula.atleta.codigo_alfanumerico,
+                    data_entrada=timezone.make_aware(datetime.datetime.combine(aula.data, aula.horario_inicio)),
+                )
+                faltas += 1
+        Aula.objects.filter(id=aula.id).update(ausencias_registradas=True)
+    return faltas
+
+
+def em_lote(_aulas):
+    from frequencia.calendario import registrar_ausencias
+
+    return registrar_ausencias()[1]
+
+
+def medir(nome, lancar, aulas):
+    from frequencia.models import Aula, Frequencia
+
+    # Volta ao estado sem faltas lançadas
+    Frequencia.objects.filter(status='ausente').delete()
+    Aula.objects.update(ausencias_registradas=False)
+    with CaptureQueriesContext(connection) as consultas:
+        inicio = time.perf_counter()
+        faltas = lancar(aulas)
+        duracao = time.perf_counter() - inicio
+    print(f"{nome:<12} {faltas:6d} faltas  {duracao:7.2f} s  {faltas / duracao:9.0f} faltas/s  "
+          f"{len(consultas):6d} consultas")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--atletas', type=int, default=300)
+    parser.add_argument('--dias', type=int, default=7, help='dias de aulas encerradas')
+    parser.add_argument('--presenca', type=float, default=0.6, help='fração de atletas presentes por aula')
+    args = parser.parse_args()
+
+    # Banco temporário
+    pasta = tempfile.mkdtemp()
+    connection.settings_dict['TEST']['NAME'] = os.path.join(pasta, 'benchmark.sqlite3')
+    nome_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+
+    try:
+        turma, codigos = criar_cenario(args.atletas)
+        aulas = criar_aulas(turma, codigos, args.dias, args.presenca)
+        print(f"{args.atletas} atletas, {len(aulas)} aulas encerradas, presença {args.presenca:.0%}")
+        medir('Por atleta', por_atleta, aulas)
+        medir('Em lote', em_lote, aulas)
+    finally:
+        connection.creation.destroy_test_db(nome_original, verbosity=0)
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+"""
+Benchmark: buscar_cep_ajax (WSGI, síncrono) x buscar_cep_ajax_async (ASGI)
+
+Sobe um ViaCEP falso local com latência configurável e dispara o mesmo
+número de consultas (todas com CEPs diferentes, para sempre passar pelo
+"ViaCEP") contra as duas views, chamando os handlers WSGI e ASGI do Django
+dentro do próprio processo:
+
+- síncrono: N workers (threads) atendendo a fila de requisições, como um
+  gunicorn com workers síncronos;
+- assíncrono: um único event loop com C clientes simultâneos, como um worker
+  uvicorn.
+
+Usa um banco temporário, então não altera o db.sqlite3.
+
+Execute: python scripts_benchmark/benchmark_cep_async.py --requisicoes 400 --latencia 0.2
+"""
+import argparse
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Adicionar o diretório do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configurar Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cadastro_pessoas.settings')
+import django
+django.setup()
+
+from django.conf import settings
+from django.db import connection
+
+
+class ViaCepFalso(BaseHTTPRequestHandler):
+    """
+    Responde como o ViaCEP após ``latencia`` segundos.
+    Fica em HTTP/1.0 (uma conexão por consulta): com keep-alive, o servidor de
+    threads da stdlib vira o gargalo e mascara a diferença entre os clientes.
+    """
+    latencia = 0.1
+
+    def do_GET(self):
+        time.sleep(self.latencia)
+        cep = self.path.split('/')[2]
+        corpo = (
+            '{"cep": "%s-%s", "logradouro": "Rua Teste", "complemento": "", '
+            '"bairro": "Centro", "localidade": "Cuiabá", "uf": "MT"}' % (cep[:5], cep[5:])
+        ).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def servir_viacep_falso(latencia, porta):
+    """Roda em outro processo, para as threads do servidor não disputarem o GIL com o Django"""
+    ViaCepFalso.latencia = latencia
+    ThreadingHTTPServer.request_queue_size = 1024
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), ViaCepFalso)
+    servidor.daemon_threads = True
+    porta.put(servidor.server_port)
+    servidor.serve_forever()
+
+
+def resumo(nome, latencias, duracao):
+    latencias = sorted(latencias)
+    p = lambda q: latencias[min(len(latencias) - 1, int(q * len(latencias)))] * 1000
+    print(f"{nome:<10} {len(latencias) / duracao:>10.1f} req/s   "
+          f"p50 {p(0.50):>7.1f} ms   p95 {p(0.95):>7.1f} ms   p99 {p(0.99):>7.1f} ms   "
+          f"total {duracao:.2f}s")
+
+
+def benchmark_sync(ceps, workers):
+    from django.core.handlers.wsgi import WSGIHandler
+    handler = WSGIHandler()
+
+    def chamar(cep):
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': '/buscar-cep/', 'QUERY_STRING': f'cep={cep}',
+            'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+            'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+        }
+        status = []
+        corpo = b''.join(handler(environ, lambda s, h: status.append(s)))
+        assert status[0].startswith('200'), (status, corpo)
+        return time.monotonic()
+
+    inicio = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # A latência inclui o tempo na fila esperando um worker livre
+        futuros = [(time.monotonic(), executor.submit(chamar, cep)) for cep in ceps]
+        latencias = [futuro.result() - enviado for enviado, futuro in futuros]
+    return latencias, time.monotonic() - inicio
+
+
+async def benchmark_async(ceps, clientes):
+    from django.core.handlers.asgi import ASGIHandler
+    handler = ASGIHandler()
+    limite = asyncio.Semaphore(clientes)
+    nunca = asyncio.Event()
+
+    async def chamar(cep):
+        async with limite:
+            inicio = time.monotonic()
+            mensagens = []
+            entregue = False
+
+            async def receive():
+                nonlocal entregue
+                if not entregue:
+                    entregue = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await nunca.wait()
+
+            async def send(mensagem):
+                mensagens.append(mensagem)
+
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+                'method': 'GET', 'scheme': 'http', 'path': '/buscar-cep/async/',
+                'raw_path': b'/buscar-cep/async/', 'query_string': f'cep={cep}'.encode(),
+                'root_path': '', 'headers': [(b'host', b'localhost')],
+                'server': ('localhost', 80), 'client': ('127.0.0.1', 50000),
+            }
+            await handler(scope, receive, send)
+            assert mensagens[0]['status'] == 200, mensagens
+            return time.monotonic() - inicio
+
+    inicio = time.monotonic()
+    latencias = await asyncio.gather(*(chamar(cep) for cep in ceps))
+    return latencias, time.monotonic() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requisicoes', type=int, default=400)
+    parser.add_argument('--latencia', type=float, default=0.1, help='Latência do ViaCEP falso (s)')
+    parser.add_argument('--workers-sync', type=int, default=8, help='Workers síncronos (threads)')
+    parser.add_argument('--clientes', type=int, default=200, help='Clientes simultâneos no teste ASGI')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    porta = multiprocessing.Queue()
+    servidor = multiprocessing.Process(target=servir_viacep_falso, args=(args.latencia, porta), daemon=True)
+    servidor.start()
+
+    settings.VIACEP_URL = f'http://127.0.0.1:{porta.get()}/ws/{{cep}}/json/'
+    settings.VIACEP_POOL_TAMANHO = args.workers_sync
+    settings.VIACEP_POOL_ASYNC_TAMANHO = args.clientes
+    settings.ALLOWED_HOSTS = ['*']
+    settings.DEBUG = False
+
+    # Banco temporário em arquivo (compartilhado entre as threads)
+    pasta = tempfile.mkdtemp()
+    connection.settings_dict['TEST']['NAME'] = os.path.join(pasta, 'benchmark.sqlite3')
+    nome_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+
+    try:
+        print(f"ViaCEP falso com latência de {args.latencia * 1000:.0f} ms, "
+              f"{args.requisicoes} requisições com CEPs distintos")
+        ceps_sync = [f'{10000000 + i:08d}' for i in range(args.requisicoes)]
+        ceps_async = [f'{20000000 + i:08d}' for i in range(args.requisicoes)]
+
+        latencias, duracao = benchmark_sync(ceps_sync, args.workers_sync)
+        resumo(f'WSGI x{args.workers_sync}', latencias, duracao)
+
+        latencias, duracao = asyncio.run(benchmark_async(ceps_async, args.clientes))
+        resumo(f'ASGI c{args.clientes}', latencias, duracao)
+    finally:
+        connection.creation.destroy_test_db(nome_original, verbosity=0)
+        servidor.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+"""
+Benchmark: check-in por QR Code na portaria (/frequencia/checkin/)
+
+Monta em um banco temporário uma turma em andamento com N atletas
+matriculados e simula o pico de entrada: cada atleta passa o cartão uma
+vez (entrada) e depois de novo (leitura repetida), pela pilha completa do
+Django (middlewares, autenticação por token e view). Mostra latência
+p50/p95/p99 e o número de consultas SQL por leitura.
+
+Execute: python scripts_benchmark/benchmark_checkin.py --atletas 60 --leitores 2
+"""
+import argparse
+import datetime
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Adicionar o diretório do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configurar Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cadastro_pessoas.settings')
+import django
+django.setup()
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+TOKEN = 'benchmark'
+
+
+def criar_cenario(quantidade):
+    """
+    Modalidade, professor, uma turma que funciona todos os dias o dia todo e
+    ``quantidade`` atletas com matrícula ativa. Devolve (turma, codigos).
+    """
+    from frequencia.models import Professor, Turma
+    from usuarios.codigos import criar_atletas_em_lote
+    from usuarios.models import Usuario, Atleta, Modalidade, TipoMatricula, StatusMatricula, Matricula
+
+    modalidade = Modalidade.objects.create(nome='Judô')
+    usuario_professor = Usuario.objects.create_user(
+        email='professor@exemplo.com', username='professor', first_name='Sensei', last_name='Benchmark',
+        password=None, tipo_conta='PROFESSOR',
+    )
+    professor = Professor.objects.create(usuario=usuario_professor, graduacao='preta')
+    professor.modalidades.add(modalidade)
+    turma = Turma.objects.create(
+        nome='Turma Benchmark', modalidade=modalidade, professor=professor,
+        dias_semana=['segunda', 'terca', 'quarta', 'quinta', 'sexta', 'sabado', 'domingo'],
+        horario_inicio=datetime.time(0, 0), horario_fim=datetime.time(23, 59), capacidade_maxima=quantidade,
+    )
+
+    responsavel = Usuario.objects.create_user(
+        email='responsavel@exemplo.com', username='responsavel', first_name='Responsável', last_name='Benchmark',
+        password=None,
+    )
+    atletas = criar_atletas_em_lote([
+        Atleta(
+            usuario=responsavel, nome=f'Atleta {i}', data_nascimento=datetime.date(2012, 1, 1),
+            cpf=f'{i:011d}', sexo='M', parentesco='filho',
+            cep='78000000', endereco='Rua', numero='1', bairro='Centro', cidade='Cuiabá', estado='MT',
+            escolaridade='medio', escola='Escola', turno='matutino',
+        )
+        for i in range(quantidade)
+    ])
+    tipo = TipoMatricula.objects.create(nome='Mensal')
+    status = StatusMatricula.objects.create(nome='Ativa')
+    Matricula.objects.bulk_create([
+        Matricula(atleta=atleta, tipo_matricula=tipo, modalidade=modalidade, status_matricula=status)
+        for atleta in atletas
+    ])
+    return turma, [atleta.codigo_alfanumerico for atleta in atletas]
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def rodada(nome, codigos, leitores):
+    cliente = Client(HTTP_AUTHORIZATION=f'Bearer {TOKEN}')
+
+    def ler(codigo):
+        inicio = time.perf_counter()
+        resposta = cliente.post('/frequencia/checkin/', {'codigo': codigo}, content_type='application/json')
+        return time.perf_counter() - inicio, resposta.json()['status']
+
+    with CaptureQueriesContext(connection) as consultas:
+        if leitores == 1:
+            resultados = [ler(codigo) for codigo in codigos]
+        else:
+            with ThreadPoolExecutor(max_workers=leitores) as executor:
+                resultados = list(executor.map(ler, codigos))
+    latencias = [duracao * 1000 for duracao, _ in resultados]
+    situacoes = {}
+    for _, status in resultados:
+        situacoes[status] = situacoes.get(status, 0) + 1
+    # Com mais de um leitor, as consultas das outras threads não entram na contagem
+    por_leitura = f"{len(consultas) / len(codigos):.1f}" if leitores == 1 else '-'
+    print(f"{nome:<18} p50 {percentil(latencias, 50):6.1f} ms  p95 {percentil(latencias, 95):6.1f} ms  "
+          f"p99 {percentil(latencias, 99):6.1f} ms  máx {max(latencias):6.1f} ms  "
+          f"média {statistics.mean(latencias):5.1f} ms  consultas/leitura {por_leitura}  {situacoes}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--atletas', type=int, default=60)
+    parser.add_argument('--leitores', type=int, default=1, help='leituras simultâneas')
+    args = parser.parse_args()
+
+    settings.FREQUENCIA_LEITOR_TOKEN = TOKEN
+    settings.ALLOWED_HOSTS = ['*']
+
+    # Banco temporário
+    pasta = tempfile.mkdtemp()
+    connection.settings_dict['TEST']['NAME'] = os.path.join(pasta, 'benchmark.sqlite3')
+    nome_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+
+    try:
+        from frequencia.agenda import agenda_turmas
+        from frequencia.elegibilidade import elegibilidade
+        from frequencia.indice import indice_checkin
+        _, codigos = criar_cenario(args.atletas)
+        print(f"{args.atletas} atletas, {args.leitores} leitor(es) simultâneo(s)")
+        # No horário de pico os índices já estão montados; a montagem é medida à parte
+        inicio = time.perf_counter()
+        indice_checkin()
+        agenda_turmas()
+        elegibilidade(codigos[0])
+        print(f"Montagem dos índices: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+        # Primeira requisição carrega URLs e middlewares
+        Client().get('/')
+        rodada('Entrada', codigos, args.leitores)
+        rodada('Leitura repetida', codigos, args.leitores)
+        rodada('Código inválido', ['X' * 10] * len(codigos), args.leitores)
+    finally:
+        connection.creation.destroy_test_db(nome_original, verbosity=0)
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
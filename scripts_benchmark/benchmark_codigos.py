@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+"""
+Benchmark: alocação de codigo_alfanumerico na criação de atletas
+
+Compara, em um banco temporário, a verificação antiga (exists() antes de
+cada INSERT) com a alocação de usuarios.codigos, em dois cenários:
+  - criação um a um via Atleta.save()
+  - importação em lote via bulk_create
+mostrando atletas por segundo e consultas SQL por atleta.
+
+Execute: python scripts_benchmark/benchmark_codigos.py --atletas 2000
+"""
+import argparse
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Adicionar o diretório do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configurar Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cadastro_pessoas.settings')
+import django
+django.setup()
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from usuarios.codigos import criar_atletas_em_lote
+from usuarios.models import Usuario, Atleta
+from utils.get_alphanumeric import get_alphanumeric
+
+# Sem QR Code gravado em arquivo: mede só a gravação do atleta
+settings.QR_CODE_SALVAR_ARQUIVO = False
+
+
+def novos_atletas(usuario, quantidade, inicio):
+    """Atletas ainda não salvos, com endereço preenchido (Atleta.save() não consulta o CEP)"""
+    return [
+        Atleta(
+            usuario=usuario, nome=f'Atleta {i}', data_nascimento=datetime.date(2012, 1, 1),
+            cpf=f'{i:011d}', sexo='M', parentesco='filho',
+            cep='78000000', endereco='Rua', numero='1', bairro='Centro', cidade='Cuiabá', estado='MT',
+            escolaridade='medio', escola='Escola', turno='matutino',
+        )
+        for i in range(inicio, inicio + quantidade)
+    ]
+
+
+def codigo_verificado():
+    """Como Atleta.save() fazia antes: sorteia e consulta até achar um código livre"""
+    while True:
+        codigo = get_alphanumeric()
+        if not Atleta.objects.filter(codigo_alfanumerico=codigo).exists():
+            return codigo
+
+
+def salvar_antigo(atletas):
+    for atleta in atletas:
+        atleta.codigo_alfanumerico = codigo_verificado()
+        atleta.save()
+
+
+def salvar_novo(atletas):
+    for atleta in atletas:
+        atleta.save()
+
+
+def lote_antigo(atletas):
+    for atleta in atletas:
+        atleta.codigo_alfanumerico = codigo_verificado()
+    Atleta.objects.bulk_create(atletas, batch_size=500)
+
+
+def lote_novo(atletas):
+    criar_atletas_em_lote(atletas)
+
+
+def medir(nome, funcao, atletas):
+    with CaptureQueriesContext(connection) as consultas:
+        inicio = time.monotonic()
+        funcao(atletas)
+        duracao = time.monotonic() - inicio
+    total = len(atletas)
+    print(f"{nome:<28} {duracao:6.2f}s  {total / duracao:8.0f} atletas/s  "
+          f"{len(consultas) / total:5.2f} consultas/atleta")
+    return duracao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--atletas', type=int, default=2000)
+    args = parser.parse_args()
+    n = args.atletas
+
+    # Banco temporário
+    pasta = tempfile.mkdtemp()
+    connection.settings_dict['TEST']['NAME'] = os.path.join(pasta, 'benchmark.sqlite3')
+    nome_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+
+    try:
+        usuario = Usuario.objects.create_user(
+            email='benchmark@exemplo.com', username='benchmark',
+            first_name='Benchmark', last_name='Codigos', password=None,
+        )
+        print(f"{n} atletas por cenário")
+        print("Um a um (Atleta.save):")
+        antes = medir('  exists() + INSERT', salvar_antigo, novos_atletas(usuario, n, 0))
+        depois = medir('  INSERT com repetição', salvar_novo, novos_atletas(usuario, n, n))
+        print(f"  Ganho: {antes / depois:.2f}x")
+        print("Em lote (bulk_create):")
+        antes = medir('  exists() por atleta', lote_antigo, novos_atletas(usuario, n, 2 * n))
+        depois = medir('  alocar_codigos + bulk', lote_novo, novos_atletas(usuario, n, 3 * n))
+        print(f"  Ganho: {antes / depois:.2f}x")
+    finally:
+        connection.creation.destroy_test_db(nome_original, verbosity=0)
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
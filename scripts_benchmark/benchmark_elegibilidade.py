@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+Benchmark: validação de Frequencia (Frequencia.clean) com o índice de elegibilidade
+
+Monta em um banco temporário uma turma com N atletas matriculados e valida
+uma Frequencia por atleta, como o admin faz ao salvar um registro. Compara
+a validação anterior (busca do atleta e exists() em Matricula por registro)
+com a atual (frequencia.elegibilidade), e mede quanto custa manter o índice
+em dia quando uma matrícula muda.
+
+Execute: python scripts_benchmark/benchmark_elegibilidade.py --atletas 500
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Adicionar o diretório do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configurar Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cadastro_pessoas.settings')
+import django
+django.setup()
+
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from benchmark_checkin import criar_cenario
+
+
+def clean_anterior(frequencia):
+    """Frequencia.clean() antes do índice de elegibilidade"""
+    from usuarios.models import Matricula
+
+    if frequencia.qr_code_utilizado != frequencia.atleta.codigo_alfanumerico:
+        raise ValidationError('QR Code não corresponde ao atleta')
+    if frequencia.data_saida and frequencia.data_saida <= frequencia.data_entrada:
+        raise ValidationError('A data de saída deve ser posterior à data de entrada')
+    if not Matricula.objects.filter(
+        atleta=frequencia.atleta,
+        modalidade=frequencia.turma.modalidade,
+        ativa=True
+    ).exists():
+        raise ValidationError('O atleta não está matriculado nesta modalidade')
+
+
+def medir(nome, validar, frequencias):
+    with CaptureQueriesContext(connection) as consultas:
+        inicio = time.perf_counter()
+        for frequencia in frequencias:
+            validar(frequencia)
+        duracao = time.perf_counter() - inicio
+    print(f"{nome:<22} {len(frequencias) / duracao:10.0f} registros/s  "
+          f"consultas/registro {len(consultas) / len(frequencias):.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--atletas', type=int, default=500)
+    args = parser.parse_args()
+
+    # Banco temporário
+    pasta = tempfile.mkdtemp()
+    connection.settings_dict['TEST']['NAME'] = os.path.join(pasta, 'benchmark.sqlite3')
+    nome_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+
+    try:
+        from frequencia.elegibilidade import atualizar_elegibilidade, elegibilidade
+        from frequencia.models import Frequencia
+        from usuarios.models import Atleta, Matricula
+
+        turma, codigos = criar_cenario(args.atletas)
+        ids = dict(Atleta.objects.values_list('codigo_alfanumerico', 'id'))
+        agora = timezone.now()
+        print(f"{args.atletas} atletas")
+
+        def frequencias():
+            # Instâncias novas a cada rodada, como em um formulário do admin (turma já carregada)
+            return [
+                Frequencia(
+                    atleta_id=ids[codigo], turma=turma, professor_id=turma.professor_id,
+                    data_aula=agora.date(), data_entrada=agora, qr_code_utilizado=codigo,
+                )
+                for codigo in codigos
+            ]
+
+        medir('Antes (exists)', clean_anterior, frequencias())
+        # Montagem medida à parte: em produção o índice já está carregado
+        inicio = time.perf_counter()
+        elegibilidade(codigos[0])
+        print(f"Montagem do índice: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+        medir('Índice', Frequencia.clean, frequencias())
+
+        # Manutenção: uma matrícula alterada recalcula só a entrada do atleta
+        matricula = Matricula.objects.order_by().first()
+        with CaptureQueriesContext(connection) as consultas:
+            inicio = time.perf_counter()
+            atualizar_elegibilidade(matricula.atleta_id)
+            duracao = time.perf_counter() - inicio
+        print(f"Matrícula alterada: {duracao * 1000:.2f} ms, {len(consultas)} consultas")
+    finally:
+        connection.creation.destroy_test_db(nome_original, verbosity=0)
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""
+Benchmark: gravação em grupo do check-in (frequencia.gravacao) no SQLite
+
+Monta em um banco SQLite temporário (em arquivo, como em produção) uma
+turma com N atletas e faz todos passarem o cartão com M leituras
+simultâneas, em dois modos:
+
+  - uma transação por leitura (checkin.registrar_leitura);
+  - gravação em grupo: a leitura é confirmada após o fsync do diário e uma
+    thread grava as pendentes em uma transação por ciclo.
+
+Para cada modo mostra a latência da confirmação (p50/p99), as inserções por
+segundo até a última Frequencia estar no banco e as leituras que falharam
+(ex.: "database is locked").
+
+Execute: python scripts_benchmark/benchmark_gravacao_grupo.py --atletas 500 --simultaneas 50
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Adicionar o diretório do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configurar Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cadastro_pessoas.settings')
+import django
+django.setup()
+
+from django.db import OperationalError, connection, connections
+
+from benchmark_checkin import criar_cenario, percentil
+
+
+def rodada(nome, registrar, codigos, simultaneas, gravados):
+    """Dispara as leituras e espera até ``gravados()`` chegar ao total"""
+    falhas = {}
+
+    def ler(codigo):
+        inicio = time.perf_counter()
+        try:
+            status = registrar(codigo)['status']
+        except OperationalError as erro:
+            status = str(erro)
+        return time.perf_counter() - inicio, status
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=simultaneas) as executor:
+        resultados = list(executor.map(ler, codigos))
+    confirmadas = [status for _, status in resultados if status == 'entrada']
+    for _, status in resultados:
+        if status != 'entrada':
+            falhas[status] = falhas.get(status, 0) + 1
+    while gravados() < len(confirmadas):
+        time.sleep(0.01)
+    duracao = time.perf_counter() - inicio
+
+    latencias = [segundos * 1000 for segundos, _ in resultados]
+    print(f"{nome:<24} confirmação p50 {percentil(latencias, 50):7.1f} ms  p99 {percentil(latencias, 99):7.1f} ms  "
+          f"{len(confirmadas) / duracao:7.0f} inserções/s  falhas {falhas or 0}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--atletas', type=int, default=500)
+    parser.add_argument('--simultaneas', type=int, default=50, help='leituras ao mesmo tempo')
+    parser.add_argument('--intervalo', type=float, default=0.25, help='segundos entre gravações em grupo')
+    parser.add_argument('--maximo', type=int, default=100, help='leituras que antecipam a gravação')
+    args = parser.parse_args()
+
+    # Banco temporário em arquivo
+    pasta = tempfile.mkdtemp()
+    connection.settings_dict['TEST']['NAME'] = os.path.join(pasta, 'benchmark.sqlite3')
+    nome_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+
+    try:
+        from frequencia.checkin import registrar_leitura
+        from frequencia.agenda import agenda_turmas
+        from frequencia.elegibilidade import elegibilidade
+        from frequencia.gravacao import GravacaoEmGrupo
+        from frequencia.indice import indice_checkin
+        from frequencia.models import Frequencia
+
+        _, codigos = criar_cenario(args.atletas)
+        indice_checkin()
+        agenda_turmas()
+        elegibilidade(codigos[0])
+        print(f"{args.atletas} atletas, {args.simultaneas} leituras simultâneas")
+
+        def gravados():
+            return Frequencia.objects.count()
+
+        rodada('Transação por leitura', registrar_leitura, codigos, args.simultaneas, gravados)
+        Frequencia.objects.all().delete()
+
+        gravacao = GravacaoEmGrupo(os.path.join(pasta, 'fila'), args.intervalo, args.maximo)
+        rodada('Gravação em grupo', gravacao.registrar, codigos, args.simultaneas, gravados)
+        gravacao.encerrar()
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(nome_original, verbosity=0)
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+Benchmark: geração de QR Codes em lote, em série x pool de processos
+
+Cria N atletas em um banco temporário e grava os QR Codes com
+usuarios.qr.gerar_qr_codes_lote, primeiro com 1 processo e depois com o
+pool de processos, mostrando atletas por segundo em cada caso.
+
+Execute: python scripts_benchmark/benchmark_qr_lote.py --atletas 500 --processos 4
+"""
+import argparse
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Adicionar o diretório do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configurar Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cadastro_pessoas.settings')
+import django
+django.setup()
+
+from django.conf import settings
+from django.db import connection
+
+
+def criar_atletas(quantidade):
+    """Cria atletas direto no banco (sem Atleta.save(), que consultaria o CEP)"""
+    from usuarios.models import Usuario, Atleta
+    from utils.get_alphanumeric import get_alphanumeric
+
+    usuario = Usuario.objects.create_user(
+        email='benchmark@exemplo.com', username='benchmark',
+        first_name='Benchmark', last_name='QR', password=None,
+    )
+    atletas = [
+        Atleta(
+            usuario=usuario, codigo_alfanumerico=get_alphanumeric(), nome=f'Atleta {i}',
+            data_nascimento=datetime.date(2012, 1, 1), cpf=f'{i:011d}', sexo='M', parentesco='filho',
+            cep='78000000', endereco='Rua', numero='1', bairro='Centro', cidade='Cuiabá', estado='MT',
+            escolaridade='medio', escola='Escola', turno='matutino',
+        )
+        for i in range(quantidade)
+    ]
+    return [str(atleta.id) for atleta in Atleta.objects.bulk_create(atletas)]
+
+
+def medir(nome, ids, processos):
+    from usuarios.qr import gerar_qr_codes_lote
+
+    inicio = time.monotonic()
+    total = gerar_qr_codes_lote(ids, processos=processos)
+    duracao = time.monotonic() - inicio
+    print(f"{nome:<22} {total} atletas em {duracao:6.2f}s  ({total / duracao:7.1f} atletas/s)")
+    return duracao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--atletas', type=int, default=500)
+    parser.add_argument('--processos', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    # Banco e MEDIA_ROOT temporários
+    pasta = tempfile.mkdtemp()
+    settings.MEDIA_ROOT = os.path.join(pasta, 'media')
+    connection.settings_dict['TEST']['NAME'] = os.path.join(pasta, 'benchmark.sqlite3')
+    nome_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+
+    try:
+        ids = criar_atletas(args.atletas)
+        print(f"{args.atletas} atletas, {os.cpu_count()} CPU(s)")
+        serie = medir('Em série', ids, 1)
+        paralelo = medir(f'Pool de {args.processos} processos', ids, args.processos)
+        print(f"Ganho: {serie / paralelo:.2f}x")
+    finally:
+        connection.creation.destroy_test_db(nome_original, verbosity=0)
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
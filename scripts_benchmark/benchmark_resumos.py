@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""
+Benchmark: leitura de taxas de presença pelos resumos de frequência
+
+Monta em um banco temporário N atletas com M meses de histórico de
+Frequencia em uma turma diária e compara duas leituras de painel:
+
+  - presença do mês por atleta: agregando Frequencia x lendo ResumoAtletaMes;
+  - presença da turma dia a dia no mês: agregando Frequencia x lendo
+    ResumoTurmaDia.
+
+Mostra também o tempo de reconstruir_resumos sobre todo o histórico. O custo
+da agregação cresce com o histórico; o dos resumos, só com as linhas
+exibidas.
+
+Execute: python scripts_benchmark/benchmark_resumos.py --atletas 200 --meses 12
+"""
+import argparse
+import datetime
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+# Adicionar o diretório do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configurar Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cadastro_pessoas.settings')
+import django
+django.setup()
+
+from django.db import connection
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from benchmark_checkin import criar_cenario
+
+
+def criar_historico(turma, codigos, meses):
+    """Um registro por atleta e dia nos últimos ``meses`` meses, com status sorteado"""
+    from frequencia.models import Frequencia
+    from usuarios.models import Atleta
+
+    atletas = list(Atleta.objects.filter(codigo_alfanumerico__in=codigos).values_list('id', 'codigo_alfanumerico'))
+    aleatorio = random.Random(42)
+    hoje = timezone.localdate()
+    data = hoje - datetime.timedelta(days=30 * meses)
+    registros = 0
+    while data < hoje:
+        entrada = timezone.make_aware(datetime.datetime.combine(data, datetime.time(18, 0)))
+        lote = [
+            Frequencia(
+                atleta_id=atleta_id, turma_id=turma.id, professor_id=turma.professor_id, data_aula=data,
+                qr_code_utilizado=codigo, data_entrada=entrada,
+                data_saida=entrada + datetime.timedelta(minutes=aleatorio.randint(30, 90)),
+                status=aleatorio.choices(['presente', 'atrasado', 'ausente', 'justificado'], [70, 10, 15, 5])[0],
+            )
+            for atleta_id, codigo in atletas
+        ]
+        # bulk_create não dispara os sinais: os resumos saem de reconstruir_resumos
+        Frequencia.objects.bulk_create(lote, batch_size=500)
+        registros += len(lote)
+        data += datetime.timedelta(days=1)
+    return registros
+
+
+def medir(nome, ler, repeticoes=20):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        linhas = ler()
+    duracao = (time.perf_counter() - inicio) / repeticoes
+    print(f"{nome:<34} {duracao * 1000:8.1f} ms  ({len(linhas)} linhas)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--atletas', type=int, default=200)
+    parser.add_argument('--meses', type=int, default=12, help='meses de histórico')
+    args = parser.parse_args()
+
+    # Banco temporário
+    pasta = tempfile.mkdtemp()
+    connection.settings_dict['TEST']['NAME'] = os.path.join(pasta, 'benchmark.sqlite3')
+    nome_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+
+    try:
+        from frequencia.models import Frequencia, ResumoAtletaMes, ResumoTurmaDia
+        from frequencia.resumos import mes_de, reconstruir_resumos
+
+        turma, codigos = criar_cenario(args.atletas)
+        registros = criar_historico(turma, codigos, args.meses)
+        inicio = time.perf_counter()
+        dias, meses = reconstruir_resumos()
+        print(f"{registros} registros; reconstruir_resumos: {dias} diários e {meses} mensais "
+              f"em {time.perf_counter() - inicio:.2f} s")
+
+        mes = mes_de(timezone.localdate() - datetime.timedelta(days=15))
+        proximo = (mes + datetime.timedelta(days=32)).replace(day=1)
+        contagens = {
+            'presentes': Count('id', filter=Q(status__in=['presente', 'atrasado'])),
+            'total': Count('id'),
+        }
+        medir('Mês por atleta: agregação', lambda: list(
+            Frequencia.objects.filter(data_aula__gte=mes, data_aula__lt=proximo).order_by()
+            .values('atleta_id').annotate(**contagens)
+        ))
+        medir('Mês por atleta: resumo', lambda: list(
+            ResumoAtletaMes.objects.filter(mes=mes).values('atleta_id', 'presentes', 'atrasados', 'ausentes', 'justificados')
+        ))
+        medir('Turma dia a dia: agregação', lambda: list(
+            Frequencia.objects.filter(turma=turma, data_aula__gte=mes, data_aula__lt=proximo).order_by()
+            .values('data_aula').annotate(**contagens)
+        ))
+        medir('Turma dia a dia: resumo', lambda: list(
+            ResumoTurmaDia.objects.filter(turma=turma, data__gte=mes, data__lt=proximo)
+            .values('data', 'presentes', 'atrasados', 'ausentes', 'justificados')
+        ))
+        medir('Histórico do atleta: agregação', lambda: list(
+            Frequencia.objects.filter(atleta__codigo_alfanumerico=codigos[0]).order_by()
+            .values('data_aula__year', 'data_aula__month').annotate(**contagens)
+        ))
+        medir('Histórico do atleta: resumo', lambda: list(
+            ResumoAtletaMes.objects.filter(atleta__codigo_alfanumerico=codigos[0])
+            .values('mes', 'presentes', 'atrasados', 'ausentes', 'justificados')
+        ))
+    finally:
+        connection.creation.destroy_test_db(nome_original, verbosity=0)
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
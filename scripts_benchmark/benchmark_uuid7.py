@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+"""
+Benchmark: geração de UUIDv7 (chave primária de todos os modelos)
+
+Mede o custo por UUID de uuid.uuid4, da implementação anterior de
+utils.uuid7 (estado global sem lock, random.getrandbits), de uuid7() e de
+uuid7_batch(n), e confere em várias threads se os UUIDs gerados são
+únicos e crescentes em cada thread.
+
+Execute: python scripts_benchmark/benchmark_uuid7.py --repeticoes 200000 --threads 8
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import timeit
+import uuid
+
+# Adicionar o diretório do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.uuid7 import uuid7, uuid7_batch
+
+_last_v7_timestamp = -1
+_last_v7_random = -1
+
+
+def uuid7_antigo() -> uuid.UUID:
+    """Implementação anterior de utils.uuid7, para comparação"""
+    global _last_v7_timestamp, _last_v7_random
+    timestamp_ms = int(time.time() * 1000)
+
+    if timestamp_ms <= _last_v7_timestamp:
+        timestamp_ms = _last_v7_timestamp
+        random_bits = _last_v7_random + 1
+        if random_bits >= (1 << 74):
+            while timestamp_ms <= _last_v7_timestamp:
+                timestamp_ms = int(time.time() * 1000)
+            random_bits = random.getrandbits(74)
+    else:
+        random_bits = random.getrandbits(74)
+
+    _last_v7_timestamp = timestamp_ms
+    _last_v7_random = random_bits
+
+    uuid_int = timestamp_ms << 80
+    uuid_int |= 7 << 76
+    uuid_int |= (random_bits >> 62) << 64
+    uuid_int |= 2 << 62
+    uuid_int |= random_bits & ((1 << 62) - 1)
+    return uuid.UUID(int=uuid_int)
+
+
+def medir_custo(repeticoes, lote):
+    casos = [
+        ('uuid.uuid4()', lambda: uuid.uuid4(), 1),
+        ('uuid7 anterior', uuid7_antigo, 1),
+        ('uuid7()', uuid7, 1),
+        (f'uuid7_batch({lote})', lambda: uuid7_batch(lote), lote),
+    ]
+    print(f"{'Gerador':<20} {'ns/UUID':>10}")
+    for nome, funcao, por_chamada in casos:
+        chamadas = max(1, repeticoes // por_chamada)
+        # Melhor de 3, para reduzir o ruído da máquina
+        duracao = min(timeit.repeat(funcao, number=chamadas, repeat=3))
+        print(f"{nome:<20} {duracao / (chamadas * por_chamada) * 1e9:10.0f}")
+
+
+def conferir_threads(nome, funcao, threads, por_thread):
+    resultados = [None] * threads
+    barreira = threading.Barrier(threads)
+
+    def trabalhar(indice):
+        barreira.wait()
+        resultados[indice] = [funcao() for _ in range(por_thread)]
+
+    # Troca de thread bem mais frequente que o padrão, para expor condições de corrida
+    intervalo = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        trabalhadores = [threading.Thread(target=trabalhar, args=(i,)) for i in range(threads)]
+        for trabalhador in trabalhadores:
+            trabalhador.start()
+        for trabalhador in trabalhadores:
+            trabalhador.join()
+    finally:
+        sys.setswitchinterval(intervalo)
+
+    todos = [valor for lista in resultados for valor in lista]
+    duplicados = len(todos) - len(set(todos))
+    fora_de_ordem = sum(
+        1 for lista in resultados for anterior, atual in zip(lista, lista[1:]) if atual <= anterior
+    )
+    print(f"{nome:<20} {len(todos)} UUIDs em {threads} threads: "
+          f"{duplicados} duplicados, {fora_de_ordem} fora de ordem")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeticoes', type=int, default=200000)
+    parser.add_argument('--lote', type=int, default=1000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--por-thread', type=int, default=50000)
+    args = parser.parse_args()
+
+    medir_custo(args.repeticoes, args.lote)
+    print()
+    conferir_threads('uuid7 anterior', uuid7_antigo, args.threads, args.por_thread)
+    conferir_threads('uuid7()', uuid7, args.threads, args.por_thread)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python
+"""
+Leitor offline da portaria - Dojô Uemura
+
+Roda no computador da recepção, ao lado do leitor de QR Code (leitores USB
+funcionam como teclado: cada cartão lido chega como uma linha na entrada
+padrão). Cada leitura é validada localmente e gravada em uma fila SQLite,
+então a portaria continua liberando a entrada mesmo sem rede ou com o
+servidor fora do ar. Uma thread em segundo plano:
+  - envia as leituras pendentes em lotes para /frequencia/portaria/sincronizar/
+    (o servidor ignora reenvios, então um lote pode ser repetido sem risco);
+  - baixa as alterações do cadastro em /frequencia/portaria/roster/?desde=<cursor>,
+    e o cadastro completo ao iniciar e a cada ROSTER_COMPLETO_INTERVALO. Os
+    deltas não trazem o que foi excluído (atletas, matrículas, turmas) nem
+    alterações feitas com QuerySet.update(); o completo substitui a cópia
+    local e os elimina.
+
+A validação local usa a mesma regra do servidor: verificador do código
+(usuarios.codigos), atleta no cadastro baixado, turma da modalidade em
+andamento e intervalo mínimo entre entrada e saída. Os horários das turmas
+são os do servidor; o relógio do computador da portaria deve estar no
+mesmo fuso.
+
+Depende só da biblioteca padrão e de ``requests`` (já em requirements.txt).
+
+Uso:
+    python scripts_portaria/leitor_offline.py --servidor https://dojo.exemplo.com --token <FREQUENCIA_LEITOR_TOKEN>
+"""
+import argparse
+import contextlib
+import json
+import logging
+import sqlite3
+import string
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import requests
+
+logger = logging.getLogger('leitor_offline')
+
+# Mesmas regras de frequencia.indice / frequencia.checkin
+DIAS_SEMANA = ['segunda', 'terca', 'quarta', 'quinta', 'sexta', 'sabado', 'domingo']
+ANTECEDENCIA_ENTRADA = 30
+TOLERANCIA_SAIDA = 30
+INTERVALO_MINIMO_SAIDA = timedelta(minutes=10)
+
+# Sincronização
+INTERVALO_SINCRONIZACAO = 10
+ESPERA_MAXIMA = 300
+TAMANHO_LOTE = 500
+TIMEOUT_HTTP = 10
+# Segundos entre downloads do cadastro completo (exclusões só chegam por ele)
+ROSTER_COMPLETO_INTERVALO = 60 * 60
+
+ALFABETO = string.ascii_uppercase + string.digits
+_VALORES = {caractere: valor for valor, caractere in enumerate(ALFABETO)}
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS leituras (
+    id TEXT PRIMARY KEY,
+    codigo TEXT NOT NULL,
+    turma TEXT NOT NULL,
+    data_aula TEXT NOT NULL,
+    momento TEXT NOT NULL,
+    sentido TEXT NOT NULL,
+    enviada INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS leituras_pendentes ON leituras (enviada, momento);
+CREATE INDEX IF NOT EXISTS leituras_aula ON leituras (codigo, turma, data_aula);
+CREATE TABLE IF NOT EXISTS atletas (
+    codigo TEXT PRIMARY KEY,
+    nome TEXT NOT NULL,
+    modalidades TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS turmas (
+    id TEXT PRIMARY KEY,
+    nome TEXT NOT NULL,
+    modalidade TEXT NOT NULL,
+    dias TEXT NOT NULL,
+    inicio INTEGER NOT NULL,
+    fim INTEGER NOT NULL,
+    ativa INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS estado (
+    chave TEXT PRIMARY KEY,
+    valor TEXT
+);
+"""
+
+
+def codigo_valido(codigo):
+    """Verificador Luhn mod 36 dos códigos de 10 caracteres (ver usuarios.codigos); os de 9 são aceitos"""
+    if len(codigo) not in (9, 10) or any(caractere not in _VALORES for caractere in codigo):
+        return False
+    if len(codigo) == 9:
+        return True
+    soma, fator = 0, 2
+    for caractere in reversed(codigo[:-1]):
+        parcela = fator * _VALORES[caractere]
+        soma += parcela // 36 + parcela % 36
+        fator = 3 - fator
+    return ALFABETO[-soma % 36] == codigo[-1]
+
+
+def _minutos(horario):
+    horas, minutos = horario.split(':')
+    return int(horas) * 60 + int(minutos)
+
+
+class FilaPortaria:
+    """Fila de leituras e cópia do cadastro em um arquivo SQLite local"""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        with self._conectar() as conexao:
+            conexao.executescript(ESQUEMA)
+
+    @contextlib.contextmanager
+    def _conectar(self):
+        """
+        Uma conexão por operação (a thread de sincronização e a de leitura não
+        compartilham conexão), com commit no fim; synchronous=FULL para a
+        leitura confirmada ao atleta sobreviver a uma queda de energia.
+        """
+        conexao = sqlite3.connect(self.caminho, timeout=30)
+        try:
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.execute('PRAGMA synchronous=FULL')
+            with conexao:
+                yield conexao
+        finally:
+            conexao.close()
+
+    # Leituras
+
+    def registrar(self, codigo, momento=None):
+        """Valida a leitura contra o cadastro local e a enfileira; devolve {'status', 'message', ...}"""
+        codigo = (codigo or '').strip().upper()
+        if not codigo_valido(codigo):
+            return {'status': 'codigo_invalido', 'message': 'Código não reconhecido'}
+
+        momento = momento or datetime.now().astimezone()
+        with self._conectar() as conexao:
+            atleta = conexao.execute('SELECT nome, modalidades FROM atletas WHERE codigo = ?', (codigo,)).fetchone()
+            if atleta is None:
+                return {'status': 'atleta_nao_encontrado', 'message': 'Atleta não encontrado'}
+            nome, modalidades = atleta[0], set(json.loads(atleta[1]))
+
+            turma = self._turma_atual(conexao, modalidades, momento)
+            if turma is None:
+                return {'status': 'sem_turma', 'message': 'Nenhuma turma do atleta neste horário', 'atleta': nome}
+            turma_id, turma_nome = turma
+
+            data_aula = momento.date().isoformat()
+            anteriores = conexao.execute(
+                'SELECT sentido, momento FROM leituras WHERE codigo = ? AND turma = ? AND data_aula = ? ORDER BY momento',
+                (codigo, turma_id, data_aula),
+            ).fetchall()
+            resultado = {'atleta': nome, 'turma': turma_nome}
+            if not anteriores:
+                sentido = 'entrada'
+            elif any(sentido == 'saida' for sentido, _ in anteriores):
+                return {'status': 'ja_registrado', 'message': 'Leitura já registrada', **resultado}
+            elif momento - datetime.fromisoformat(anteriores[0][1]) < INTERVALO_MINIMO_SAIDA:
+                return {'status': 'ja_registrado', 'message': 'Leitura já registrada', **resultado}
+            else:
+                sentido = 'saida'
+
+            conexao.execute(
+                'INSERT INTO leituras (id, codigo, turma, data_aula, momento, sentido) VALUES (?, ?, ?, ?, ?, ?)',
+                (str(uuid.uuid4()), codigo, turma_id, data_aula, momento.isoformat(), sentido),
+            )
+        mensagem = 'Entrada registrada' if sentido == 'entrada' else 'Saída registrada'
+        return {'status': sentido, 'message': mensagem, **resultado}
+
+    def _turma_atual(self, conexao, modalidades, momento):
+        minuto = momento.hour * 60 + momento.minute
+        dia = DIAS_SEMANA[momento.weekday()]
+        candidatas = []
+        for turma_id, nome, modalidade, dias, inicio, fim in conexao.execute(
+            'SELECT id, nome, modalidade, dias, inicio, fim FROM turmas WHERE ativa = 1'
+        ):
+            if modalidade in modalidades and dia in json.loads(dias) \
+                    and inicio - ANTECEDENCIA_ENTRADA <= minuto <= fim + TOLERANCIA_SAIDA:
+                candidatas.append((abs(minuto - inicio), turma_id, nome))
+        if not candidatas:
+            return None
+        _, turma_id, nome = min(candidatas)
+        return turma_id, nome
+
+    def pendentes(self, limite=TAMANHO_LOTE):
+        with self._conectar() as conexao:
+            linhas = conexao.execute(
+                'SELECT id, codigo, momento, sentido FROM leituras WHERE enviada = 0 ORDER BY momento LIMIT ?',
+                (limite,),
+            ).fetchall()
+        return [{'id': identificador, 'codigo': codigo, 'momento': momento, 'sentido': sentido}
+                for identificador, codigo, momento, sentido in linhas]
+
+    def confirmar(self, ids):
+        """Marca as leituras como enviadas (continuam na fila para decidir entrada/saída no dia)"""
+        with self._conectar() as conexao:
+            conexao.executemany('UPDATE leituras SET enviada = 1 WHERE id = ?', [(identificador,) for identificador in ids])
+
+    def limpar_antigas(self, dias=7):
+        limite = (datetime.now().date() - timedelta(days=dias)).isoformat()
+        with self._conectar() as conexao:
+            conexao.execute('DELETE FROM leituras WHERE enviada = 1 AND data_aula < ?', (limite,))
+
+    # Cadastro
+
+    def cursor(self):
+        with self._conectar() as conexao:
+            linha = conexao.execute("SELECT valor FROM estado WHERE chave = 'cursor'").fetchone()
+        return linha[0] if linha else None
+
+    def aplicar_roster(self, dados):
+        """Aplica o roster do servidor (completo ou delta) e guarda o novo cursor"""
+        with self._conectar() as conexao:
+            if dados['completo']:
+                conexao.execute('DELETE FROM atletas')
+                conexao.execute('DELETE FROM turmas')
+            conexao.executemany(
+                'INSERT OR REPLACE INTO atletas (codigo, nome, modalidades) VALUES (?, ?, ?)',
+                [(atleta['codigo'], atleta['nome'], json.dumps(atleta['modalidades'])) for atleta in dados['atletas']],
+            )
+            conexao.executemany(
+                'INSERT OR REPLACE INTO turmas (id, nome, modalidade, dias, inicio, fim, ativa) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (turma['id'], turma['nome'], turma['modalidade'], json.dumps(turma['dias']),
+                     _minutos(turma['inicio']), _minutos(turma['fim']), int(turma['ativa']))
+                    for turma in dados['turmas']
+                ],
+            )
+            conexao.execute("INSERT OR REPLACE INTO estado (chave, valor) VALUES ('cursor', ?)", (dados['cursor'],))
+
+
+class Sincronizador(threading.Thread):
+    """Envia a fila e atualiza o cadastro periodicamente, esperando mais a cada falha"""
+
+    def __init__(self, fila, servidor, token):
+        super().__init__(daemon=True)
+        self.fila = fila
+        self.servidor = servidor.rstrip('/')
+        self.sessao = requests.Session()
+        self.sessao.headers['Authorization'] = f'Bearer {token}'
+        self.parar = threading.Event()
+        # Momento (time.monotonic) do último cadastro completo; None: pede o completo
+        self.ultimo_completo = None
+
+    def sincronizar(self):
+        """Uma rodada completa: envia todos os lotes pendentes e baixa o roster"""
+        while True:
+            lote = self.fila.pendentes()
+            if not lote:
+                break
+            resposta = self.sessao.post(
+                f'{self.servidor}/frequencia/portaria/sincronizar/', json={'leituras': lote}, timeout=TIMEOUT_HTTP
+            )
+            resposta.raise_for_status()
+            resultados = resposta.json()['resultados']
+            for resultado in resultados:
+                if resultado['status'] == 'rejeitada':
+                    logger.warning(f"Leitura {resultado['id']} rejeitada pelo servidor: {resultado.get('motivo')}")
+            # Registradas e rejeitadas saem da fila de envio: reenviar não mudaria o resultado
+            self.fila.confirmar([resultado['id'] for resultado in resultados])
+            logger.info(f"[OK] {len(resultados)} leituras enviadas")
+
+        parametros = {}
+        if self.ultimo_completo is not None and time.monotonic() - self.ultimo_completo < ROSTER_COMPLETO_INTERVALO:
+            parametros = {'desde': self.fila.cursor()} if self.fila.cursor() else {}
+        resposta = self.sessao.get(f'{self.servidor}/frequencia/portaria/roster/', params=parametros, timeout=TIMEOUT_HTTP)
+        resposta.raise_for_status()
+        dados = resposta.json()
+        self.fila.aplicar_roster(dados)
+        if dados['completo']:
+            self.ultimo_completo = time.monotonic()
+        logger.info(f"[OK] Cadastro {'completo' if dados['completo'] else 'atualizado'}: "
+                    f"{len(dados['atletas'])} atletas, {len(dados['turmas'])} turmas")
+
+    def run(self):
+        espera = INTERVALO_SINCRONIZACAO
+        while not self.parar.is_set():
+            try:
+                self.sincronizar()
+                self.fila.limpar_antigas()
+                espera = INTERVALO_SINCRONIZACAO
+            except (requests.RequestException, ValueError, KeyError) as e:
+                espera = min(espera * 2, ESPERA_MAXIMA)
+                logger.warning(f"[ERRO] Sincronização falhou ({e}); nova tentativa em {espera}s")
+            self.parar.wait(espera)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Leitor offline da portaria')
+    parser.add_argument('--servidor', required=True, help='URL do sistema, ex.: https://dojo.exemplo.com')
+    parser.add_argument('--token', required=True, help='FREQUENCIA_LEITOR_TOKEN configurado no servidor')
+    parser.add_argument('--banco', default='portaria.sqlite3', help='arquivo SQLite local da fila')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    fila = FilaPortaria(args.banco)
+    sincronizador = Sincronizador(fila, args.servidor, args.token)
+    sincronizador.start()
+
+    icones = {'entrada': '✅', 'saida': '👋', 'ja_registrado': 'ℹ️'}
+    print('Aguardando leituras (Ctrl+C para sair)...')
+    try:
+        for linha in sys.stdin:
+            if not linha.strip():
+                continue
+            resultado = fila.registrar(linha)
+            nome = f" - {resultado['atleta']}" if 'atleta' in resultado else ''
+            print(f"{icones.get(resultado['status'], '❌')} {resultado['message']}{nome}", flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sincronizador.parar.set()
+        # Última tentativa de envio antes de sair
+        try:
+            sincronizador.sincronizar()
+        except (requests.RequestException, ValueError, KeyError) as e:
+            logger.warning(f"Leituras continuam na fila para o próximo envio: {e}")
+
+
+if __name__ == '__main__':
+    main()
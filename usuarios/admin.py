@@ -3,8 +3,11 @@ from django.contrib.auth.admin import UserAdmin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
+from django.db.models import Count
 from django.shortcuts import render
 from .models import Usuario, Atleta, Modalidade, TipoMatricula, StatusMatricula, Matricula
+from .imagens import html_imagem
+from utils.filtros_admin import FiltroDataCriacaoUUID7
 
 
 @admin.register(Usuario)
@@ -85,18 +88,19 @@ class UsuarioAdmin(UserAdmin):
 	get_nome_completo.admin_order_field = 'first_name'
 	
 	def atletas_count(self, obj):
-		"""Conta quantos atletas o usuário possui"""
-		count = obj.atletas.count()
+		"""Conta quantos atletas o usuário possui (anotado em get_queryset)"""
+		count = obj.total_atletas
 		if count > 0:
 			url = reverse('admin:usuarios_atleta_changelist') + f'?usuario__id__exact={obj.id}'
 			return format_html('<a href="{}">{} atleta(s)</a>', url, count)
 		return '0 atletas'
 	atletas_count.short_description = 'Atletas'
+	atletas_count.admin_order_field = 'total_atletas'
 	
 	def get_queryset(self, request):
-		"""Otimiza consultas com prefetch_related"""
+		"""Contagem de atletas anotada: uma consulta para a página inteira"""
 		queryset = super().get_queryset(request)
-		return queryset.prefetch_related('atletas')
+		return queryset.annotate(total_atletas=Count('atletas'))
 
 
 @admin.register(Atleta)
@@ -107,7 +111,7 @@ class AtletaAdmin(admin.ModelAdmin):
 	list_display = [
 		'nome', 'usuario_link', 'idade_display', 
 		'parentesco', 'escola', 'cidade_uf', 'foto_thumbnail', 'qr_code_preview',
-		'termos_aceitos', 'data_cadastro'
+		'matriculas_count', 'termos_aceitos', 'data_cadastro'
 	]
 	
 	# Campos para busca
@@ -120,7 +124,7 @@ class AtletaAdmin(admin.ModelAdmin):
 	list_filter = [
 		'parentesco', 'sexo', 'estado_civil', 'escolaridade', 'turno', 'estado', 
 		'tipo_sanguineo', 'termo_responsabilidade', 'termo_uso_imagem',
-		'data_cadastro', 'usuario__email_verificado'
+		('data_cadastro', FiltroDataCriacaoUUID7), 'usuario__email_verificado'
 	]
 	
 	# Campos editáveis na listagem
@@ -202,21 +206,24 @@ class AtletaAdmin(admin.ModelAdmin):
 	cidade_uf.admin_order_field = 'cidade'
 	
 	def matriculas_count(self, obj):
-		"""Conta quantas matrículas o atleta possui"""
-		count = obj.matriculas.count()
+		"""Conta quantas matrículas o atleta possui (anotado em get_queryset)"""
+		count = obj.total_matriculas
 		if count > 0:
 			url = reverse('admin:usuarios_matricula_changelist') + f'?atleta__id__exact={obj.id}'
 			return format_html('<a href="{}">{} matrícula(s)</a>', url, count)
 		return '0 matrículas'
 	matriculas_count.short_description = 'Matrículas'
+	matriculas_count.admin_order_field = 'total_matriculas'
+	
+	def get_queryset(self, request):
+		"""Responsável e contagem de matrículas na mesma consulta da listagem"""
+		queryset = super().get_queryset(request)
+		return queryset.select_related('usuario').annotate(total_matriculas=Count('matriculas'))
 	
 	def foto_thumbnail(self, obj):
 		"""Exibe miniatura da foto"""
 		if obj.foto:
-			return format_html(
-				'<img src="{}" style="width: 40px; height: 40px; border-radius: 50%; object-fit: cover;" />',
-				obj.foto.url
-			)
+			return html_imagem(obj, 'foto', 40, style='width: 40px; height: 40px; border-radius: 50%; object-fit: cover;')
 		# Placeholder
 		nome = obj.nome_completo if hasattr(obj, 'nome_completo') else f"{obj.usuario.first_name} {obj.usuario.last_name}".strip()
 		primeira_letra = nome[0].upper() if nome else '?'
@@ -226,10 +233,7 @@ class AtletaAdmin(admin.ModelAdmin):
 	def foto_preview(self, obj):
 		"""Preview da foto no formulário"""
 		if obj.foto:
-			return format_html(
-				'<img src="{}" style="max-width: 200px; max-height: 200px; border-radius: 8px;" />',
-				obj.foto.url
-			)
+			return html_imagem(obj, 'foto', 200, style='max-width: 200px; max-height: 200px; border-radius: 8px;')
 		return "Nenhuma foto enviada"
 	foto_preview.short_description = 'Preview da Foto'
 
@@ -245,8 +249,9 @@ class AtletaAdmin(admin.ModelAdmin):
 	
 	def qr_code_preview(self, obj):
 		"""Mostra preview do QR Code"""
-		if obj.qr_code_imagem:
-			return format_html('<img src="{}" style="width: 80px; height: 80px; object-fit: contain; background: #fff; padding: 4px; border: 1px solid #eee; border-radius: 4px;" />', obj.qr_code_imagem.url)
+		if obj.codigo_alfanumerico:
+			from .qr import url_qr_code
+			return format_html('<img src="{}" style="width: 80px; height: 80px; object-fit: contain; background: #fff; padding: 4px; border: 1px solid #eee; border-radius: 4px;" />', url_qr_code(obj))
 		return '-'
 	qr_code_preview.short_description = 'QR Code'
 
@@ -257,25 +262,21 @@ class AtletaAdmin(admin.ModelAdmin):
 	gerar_cartao_link.short_description = 'Cartão do Atleta'
 	
 	def gerar_qr_codes(self, request, queryset):
-		"""Ação para gerar/forçar regeneração de QR Codes para atletas selecionados"""
-		count = 0
-		for atleta in queryset:
-			if atleta.gerar_qr_code(force=True):
-				atleta.save(update_fields=['qr_code_imagem'])
-				count += 1
-		self.message_user(request, f'QR Code gerado/atualizado para {count} atleta(s).')
+		"""Ação para gerar/forçar regeneração de QR Codes dos atletas selecionados, em lote e em segundo plano"""
+		from django.http import HttpResponseRedirect
+		from .qr import criar_lote, enfileirar_lote
+		ids = [str(pk) for pk in queryset.values_list('id', flat=True)]
+		lote = criar_lote(len(ids))
+		enfileirar_lote(ids, str(lote.id))
+		return HttpResponseRedirect(reverse('admin:usuarios_atleta_progresso_qr', args=[lote.id]))
 	gerar_qr_codes.short_description = 'Gerar/Atualizar QR Codes selecionados'
 	
 	def gerar_cartoes_lote(self, request, queryset):
-		"""Gera QR Codes (se necessário) e redireciona para uma página de impressão em lote."""
-		ids = []
-		for atleta in queryset:
-			if not atleta.qr_code_imagem:
-				atleta.gerar_qr_code(force=True)
-				atleta.save(update_fields=['qr_code_imagem'])
-			ids.append(str(atleta.id))
+		"""Guarda a seleção na sessão e redireciona para o PDF dos cartões (A4, em fluxo)."""
 		from django.http import HttpResponseRedirect
-		url = reverse('admin:usuarios_atleta_imprimir_cartoes') + (f"?ids={','.join(ids)}" if ids else '')
+		from .cartoes import guardar_selecao
+		token = guardar_selecao(request, queryset.values_list('id', flat=True))
+		url = reverse('admin:usuarios_atleta_imprimir_cartoes_pdf') + f"?selecao={token}"
 		return HttpResponseRedirect(url)
 	gerar_cartoes_lote.short_description = 'Gerar Cartões (lote) para impressão'
 	
@@ -284,24 +285,49 @@ class AtletaAdmin(admin.ModelAdmin):
 		urls = super().get_urls()
 		custom_urls = [
 			path('imprimir-cartoes/', self.admin_site.admin_view(self.imprimir_cartoes_view), name='usuarios_atleta_imprimir_cartoes'),
+			path('imprimir-cartoes/pdf/', self.admin_site.admin_view(self.imprimir_cartoes_pdf_view), name='usuarios_atleta_imprimir_cartoes_pdf'),
+			path('qr-codes/<uuid:lote_id>/', self.admin_site.admin_view(self.progresso_qr_view), name='usuarios_atleta_progresso_qr'),
 		]
 		return custom_urls + urls
 	
+	def _atletas_selecionados(self, request):
+		"""Atletas da seleção guardada na sessão (?selecao=<token>) ou, para links antigos, de ?ids=."""
+		from .cartoes import obter_selecao
+		token = request.GET.get('selecao')
+		if token:
+			ids = obter_selecao(request, token) or []
+		else:
+			ids = [i for i in request.GET.get('ids', '').split(',') if i]
+		return self.get_queryset(request).filter(id__in=ids).select_related('usuario').order_by('nome')
+	
 	def imprimir_cartoes_view(self, request):
 		"""Página de impressão em lote dos cartões de atletas selecionados via ação."""
-		ids_param = request.GET.get('ids', '')
-		ids = [i for i in ids_param.split(',') if i]
-		queryset = self.get_queryset(request).filter(id__in=ids)
-		# Garantir QR para todos
-		for atleta in queryset:
-			if not atleta.qr_code_imagem:
-				atleta.gerar_qr_code(force=True)
-				atleta.save(update_fields=['qr_code_imagem'])
 		context = {
-			'atletas': queryset,
+			'atletas': self._atletas_selecionados(request),
+			'selecao': request.GET.get('selecao', ''),
 			'title': 'Impressão de Cartões de Atleta',
 		}
 		return render(request, 'admin/usuarios/atleta/cartoes_impressao.html', context)
+	
+	def imprimir_cartoes_pdf_view(self, request):
+		"""PDF A4 com os cartões selecionados, gerado e enviado página a página."""
+		from django.http import StreamingHttpResponse
+		from .cartoes import gerar_pdf_cartoes
+		atletas = self._atletas_selecionados(request).iterator(chunk_size=200)
+		response = StreamingHttpResponse(gerar_pdf_cartoes(atletas), content_type='application/pdf')
+		response['Content-Disposition'] = 'inline; filename="cartoes_atletas.pdf"'
+		return response
+	
+	def progresso_qr_view(self, request, lote_id):
+		"""Acompanha um lote de QR Codes enviado pela ação gerar_qr_codes."""
+		from .qr import progresso_lote
+		context = {
+			**self.admin_site.each_context(request),
+			'situacao': progresso_lote(lote_id),
+			'title': 'Geração de QR Codes',
+			'opts': self.model._meta,
+		}
+		return render(request, 'admin/usuarios/atleta/progresso_qr.html', context)
 
 
 @admin.register(Modalidade)
@@ -323,10 +349,7 @@ class ModalidadeAdmin(admin.ModelAdmin):
 	def imagem_preview(self, obj):
 		"""Exibe preview da imagem da modalidade"""
 		if obj.imagem:
-			return format_html(
-				'<img src="{}" style="width: 50px; height: 50px; object-fit: cover; border-radius: 5px;" />',
-				obj.imagem.url
-			)
+			return html_imagem(obj, 'imagem', 50, style='width: 50px; height: 50px; object-fit: cover; border-radius: 5px;')
 		return '-'
 	imagem_preview.short_description = 'Imagem'
 	
@@ -428,6 +451,13 @@ class MatriculaAdmin(admin.ModelAdmin):
 		return queryset.select_related(
 			'atleta', 'atleta__usuario', 'modalidade', 'tipo_matricula', 'status_matricula'
 		)
+	
+	def formfield_for_foreignkey(self, db_field, request, **kwargs):
+		field = super().formfield_for_foreignkey(db_field, request, **kwargs)
+		if db_field.name == 'status_matricula':
+			# Editável na listagem: as opções são lidas uma vez, não uma vez por linha
+			field.choices = list(field.choices)
+		return field
 
 # Configurações globais do admin
 admin.site.site_header = "Administração - Cadastro de Pessoas"
@@ -0,0 +1,237 @@
+"""
+Folhas de cartões de atleta para impressão (PDF A4).
+
+Cada cartão é desenhado como bitmap (foto, QR Code e dados) e guardado em
+cache com uma chave que inclui nome, foto e código do atleta, então muda
+sozinha quando algum deles muda. As páginas são montadas com N cartões e
+enviadas uma a uma como imagens JPEG de um PDF mínimo, em fluxo: a memória
+usada não depende do número de atletas selecionados.
+"""
+import hashlib
+import secrets
+import zlib
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Resolução de impressão e medidas em milímetros (cartão no padrão CR80)
+DPI = 200
+A4_MM = (210, 297)
+CARTAO_MM = (85.6, 54)
+COLUNAS, LINHAS = 2, 5
+CARTOES_POR_PAGINA = COLUNAS * LINHAS
+
+QUALIDADE_JPEG = 90
+CARTAO_CACHE_TTL = 60 * 60 * 24
+VERSAO_CARTAO = 1
+
+
+def _px(mm):
+    return round(mm / 25.4 * DPI)
+
+
+def _pt(mm):
+    return mm / 25.4 * 72
+
+
+@lru_cache(maxsize=8)
+def _fonte(tamanho):
+    """Fonte TrueType de CARTAO_FONTE; sem ela, a fonte embutida do Pillow (sem acentos)"""
+    from PIL import ImageFont
+    try:
+        return ImageFont.truetype(settings.CARTAO_FONTE, tamanho)
+    except OSError:
+        return ImageFont.load_default(size=tamanho)
+
+
+# Seleções de atletas ficam na sessão do usuário, referenciadas por um token
+CHAVE_SELECAO = 'cartoes_selecao'
+MAXIMO_SELECOES = 5
+
+
+def guardar_selecao(request, ids):
+    """Guarda a lista de IDs na sessão e devolve o token que a referencia"""
+    selecoes = request.session.get(CHAVE_SELECAO, {})
+    # Mantém só as seleções mais recentes para a sessão não crescer sem limite
+    while len(selecoes) >= MAXIMO_SELECOES:
+        selecoes.pop(next(iter(selecoes)))
+    token = secrets.token_urlsafe(12)
+    selecoes[token] = [str(pk) for pk in ids]
+    request.session[CHAVE_SELECAO] = selecoes
+    return token
+
+
+def obter_selecao(request, token):
+    """IDs guardados sob o token (None se não existir nesta sessão)"""
+    return request.session.get(CHAVE_SELECAO, {}).get(token)
+
+
+def chave_cartao(atleta):
+    """Chave de cache do bitmap do cartão; muda quando nome, foto ou código mudam"""
+    responsavel = f"{atleta.usuario.first_name} {atleta.usuario.last_name}".strip()
+    assinatura = '|'.join([
+        str(VERSAO_CARTAO), atleta.nome, atleta.foto.name if atleta.foto else '',
+        (atleta.foto_versoes or {}).get('origem', ''),
+        atleta.codigo_alfanumerico, responsavel,
+    ])
+    return f'usuarios:cartao:{atleta.pk}:{hashlib.sha1(assinatura.encode()).hexdigest()[:16]}'
+
+
+def renderizar_cartao(atleta):
+    """Desenha o cartão do atleta e devolve os bytes JPEG"""
+    from PIL import Image, ImageDraw, ImageOps
+    from .imagens import escolher_versao
+    from .qr import qr_renderizado
+
+    largura, altura = _px(CARTAO_MM[0]), _px(CARTAO_MM[1])
+    margem = _px(4)
+    lado = altura - 2 * margem - _px(14)
+
+    cartao = Image.new('RGB', (largura, altura), 'white')
+    desenho = ImageDraw.Draw(cartao)
+    desenho.rectangle([0, 0, largura - 1, altura - 1], outline='#cccccc', width=2)
+
+    # Foto (recortada em quadrado) à esquerda
+    foto = None
+    if atleta.foto:
+        # A versão "card" já vem reduzida e sem rotação pendente; sem ela, usa o original
+        versao = escolher_versao(atleta.foto_versoes, atleta.foto.name, lado / 2)
+        try:
+            with atleta.foto.storage.open(versao['jpeg'] if versao else atleta.foto.name, 'rb') as arquivo:
+                foto = ImageOps.fit(ImageOps.exif_transpose(Image.open(arquivo)).convert('RGB'), (lado, lado))
+        except (OSError, ValueError):
+            foto = None
+    if foto is None:
+        foto = Image.new('RGB', (lado, lado), '#f0f0f0')
+        ImageDraw.Draw(foto).text((lado // 2, lado // 2), 'Sem foto', fill='#888888',
+                                  font=_fonte(_px(3)), anchor='mm')
+    cartao.paste(foto, (margem, margem))
+
+    # QR Code à direita
+    qr = Image.open(BytesIO(qr_renderizado(atleta.codigo_alfanumerico, 'png'))).convert('RGB')
+    cartao.paste(qr.resize((lado, lado), Image.NEAREST), (largura - margem - lado, margem))
+
+    # Dados na faixa inferior
+    responsavel = f"{atleta.usuario.first_name} {atleta.usuario.last_name}".strip()
+    y = margem + lado + _px(1.5)
+    desenho.text((margem, y), atleta.nome[:40], fill='black', font=_fonte(_px(3.6)))
+    desenho.text((margem, y + _px(5)), f'Código: {atleta.codigo_alfanumerico}   Responsável: {responsavel[:30]}',
+                 fill='#333333', font=_fonte(_px(2.6)))
+
+    buffer = BytesIO()
+    cartao.save(buffer, format='JPEG', quality=QUALIDADE_JPEG)
+    return buffer.getvalue()
+
+
+def cartoes_em_cache(atletas):
+    """Bitmaps dos cartões (na ordem dos atletas), renderizando só os que não estão em cache"""
+    chaves = [chave_cartao(atleta) for atleta in atletas]
+    encontrados = cache.get_many(chaves)
+    novos = {}
+    for atleta, chave in zip(atletas, chaves):
+        if chave not in encontrados:
+            novos[chave] = renderizar_cartao(atleta)
+    if novos:
+        cache.set_many(novos, CARTAO_CACHE_TTL)
+    return [encontrados.get(chave) or novos[chave] for chave in chaves]
+
+
+def montar_pagina(cartoes):
+    """Monta uma página A4 com até CARTOES_POR_PAGINA cartões; devolve (jpeg, largura, altura)"""
+    from PIL import Image
+
+    largura, altura = _px(A4_MM[0]), _px(A4_MM[1])
+    cartao_l, cartao_a = _px(CARTAO_MM[0]), _px(CARTAO_MM[1])
+    espaco_x = (largura - COLUNAS * cartao_l) // (COLUNAS + 1)
+    espaco_y = (altura - LINHAS * cartao_a) // (LINHAS + 1)
+
+    pagina = Image.new('RGB', (largura, altura), 'white')
+    for indice, jpeg in enumerate(cartoes):
+        linha, coluna = divmod(indice, COLUNAS)
+        x = espaco_x + coluna * (cartao_l + espaco_x)
+        y = espaco_y + linha * (cartao_a + espaco_y)
+        pagina.paste(Image.open(BytesIO(jpeg)), (x, y))
+
+    buffer = BytesIO()
+    pagina.save(buffer, format='JPEG', quality=QUALIDADE_JPEG, dpi=(DPI, DPI))
+    return buffer.getvalue(), largura, altura
+
+
+class EscritorPDF:
+    """
+    Gera um PDF de páginas-imagem em fluxo: cada método devolve os bytes a
+    enviar e a tabela xref é montada com os deslocamentos acumulados.
+    Objetos 1 (Catalog) e 2 (Pages) são fixos; a árvore de páginas é
+    escrita no final, quando todas as páginas são conhecidas.
+    """
+
+    def __init__(self):
+        self.deslocamentos = {}
+        self.posicao = 0
+        self.proximo = 3
+        self.paginas = []
+
+    def _objeto(self, numero, corpo, fluxo=None):
+        dados = f'{numero} 0 obj\n'.encode() + corpo
+        if fluxo is not None:
+            dados += b'\nstream\n' + fluxo + b'\nendstream'
+        dados += b'\nendobj\n'
+        self.deslocamentos[numero] = self.posicao
+        self.posicao += len(dados)
+        return dados
+
+    def _reservar(self):
+        numero = self.proximo
+        self.proximo += 1
+        return numero
+
+    def inicio(self):
+        cabecalho = b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n'
+        self.posicao = len(cabecalho)
+        return cabecalho + self._objeto(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+
+    def pagina(self, jpeg, largura_px, altura_px):
+        imagem, conteudo, pagina = self._reservar(), self._reservar(), self._reservar()
+        largura, altura = _pt(A4_MM[0]), _pt(A4_MM[1])
+        desenho = zlib.compress(f'q {largura:.2f} 0 0 {altura:.2f} 0 0 cm /Im0 Do Q'.encode())
+        self.paginas.append(pagina)
+        return b''.join([
+            self._objeto(imagem, (
+                f'<< /Type /XObject /Subtype /Image /Width {largura_px} /Height {altura_px} '
+                f'/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /DCTDecode /Length {len(jpeg)} >>'
+            ).encode(), jpeg),
+            self._objeto(conteudo, f'<< /Filter /FlateDecode /Length {len(desenho)} >>'.encode(), desenho),
+            self._objeto(pagina, (
+                f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {largura:.2f} {altura:.2f}] '
+                f'/Resources << /XObject << /Im0 {imagem} 0 R >> >> /Contents {conteudo} 0 R >>'
+            ).encode()),
+        ])
+
+    def fim(self):
+        filhos = ' '.join(f'{numero} 0 R' for numero in self.paginas)
+        dados = self._objeto(2, f'<< /Type /Pages /Kids [{filhos}] /Count {len(self.paginas)} >>'.encode())
+        inicio_xref = self.posicao
+        linhas = [f'xref\n0 {self.proximo}\n', '0000000000 65535 f \n']
+        linhas += [f'{self.deslocamentos[numero]:010d} 00000 n \n' for numero in range(1, self.proximo)]
+        linhas.append(f'trailer\n<< /Size {self.proximo} /Root 1 0 R >>\nstartxref\n{inicio_xref}\n%%EOF\n')
+        return dados + ''.join(linhas).encode()
+
+
+def gerar_pdf_cartoes(atletas):
+    """
+    Gerador dos bytes do PDF com os cartões dos atletas (iterável, de preferência
+    um ``QuerySet.iterator()`` com ``select_related('usuario')``).
+    """
+    escritor = EscritorPDF()
+    yield escritor.inicio()
+    pagina = []
+    for atleta in atletas:
+        pagina.append(atleta)
+        if len(pagina) == CARTOES_POR_PAGINA:
+            yield escritor.pagina(*montar_pagina(cartoes_em_cache(pagina)))
+            pagina = []
+    if pagina or not escritor.paginas:
+        yield escritor.pagina(*montar_pagina(cartoes_em_cache(pagina)))
+    yield escritor.fim()
@@ -0,0 +1,179 @@
+"""
+Alocação de ``Atleta.codigo_alfanumerico``.
+
+O código é sorteado e gravado direto: quem garante a unicidade é o índice
+único do banco. Antes, cada save fazia um ``exists()`` antes do INSERT, o que
+custava uma consulta a mais e ainda assim deixava dois saves simultâneos
+sortearem o mesmo código entre a verificação e a gravação.
+
+Com 36^9 combinações, uma colisão é raríssima; quando acontece, o INSERT
+falha com IntegrityError, um novo código é sorteado e o INSERT é repetido
+(dentro de um savepoint, se houver transação aberta).
+
+Para importações, ``alocar_codigos(n)`` devolve N códigos livres com uma
+consulta a cada 900 códigos e ``criar_atletas_em_lote`` faz o bulk_create com o mesmo
+esquema de repetição.
+
+Formato: 9 caracteres sorteados de A-Z0-9 mais um caractere verificador
+(Luhn mod 36), 10 no total. ``codigo_valido`` confere o verificador sem
+consultar banco nem cache, então leituras erradas e QR Codes de outra origem
+são recusados na hora. Os códigos antigos, de 9 caracteres e sem verificador,
+continuam aceitos enquanto ``ATLETA_ACEITAR_CODIGOS_LEGADOS`` for True
+(só o formato deles pode ser conferido).
+"""
+import logging
+import re
+import string
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connections, router, transaction
+
+from utils.get_alphanumeric import get_alphanumeric
+
+logger = logging.getLogger(__name__)
+
+# Tentativas de INSERT antes de desistir (cada colisão tem chance ~1/36^9)
+MAXIMO_TENTATIVAS = 5
+
+# Códigos por consulta ao verificar um lote
+TAMANHO_CONSULTA = 900
+
+ALFABETO = string.ascii_uppercase + string.digits
+_VALORES = {caractere: valor for valor, caractere in enumerate(ALFABETO)}
+TAMANHO_CORPO = 9
+TAMANHO_CODIGO = TAMANHO_CORPO + 1
+TAMANHO_LEGADO = 9
+_FORMATO = re.compile(r'[A-Z0-9]{9,10}')
+
+
+def caractere_verificador(corpo):
+    """
+    Caractere verificador Luhn mod 36 do corpo do código. Detecta qualquer
+    caractere trocado e quase todas as trocas de dois caracteres vizinhos
+    (escapa só a troca entre "A" e "9").
+    """
+    base = len(ALFABETO)
+    soma = 0
+    fator = 2
+    for caractere in reversed(corpo):
+        parcela = fator * _VALORES[caractere]
+        soma += parcela // base + parcela % base
+        fator = 3 - fator
+    return ALFABETO[-soma % base]
+
+
+def gerar_codigo():
+    """Novo código: corpo sorteado + caractere verificador"""
+    corpo = get_alphanumeric(TAMANHO_CORPO)
+    return corpo + caractere_verificador(corpo)
+
+
+def codigo_valido(codigo):
+    """
+    True se ``codigo`` tem o formato de um código de atleta e, nos de 10
+    caracteres, o verificador confere. Não consulta banco nem cache: serve
+    para descartar leituras inválidas antes de procurar o atleta.
+    """
+    if not isinstance(codigo, str) or not _FORMATO.fullmatch(codigo):
+        return False
+    if len(codigo) == TAMANHO_CODIGO:
+        return caractere_verificador(codigo[:-1]) == codigo[-1]
+    return settings.ATLETA_ACEITAR_CODIGOS_LEGADOS
+
+
+def validar_codigo_atleta(codigo):
+    """Validador do campo codigo_alfanumerico"""
+    if not codigo_valido(codigo):
+        raise ValidationError('Código de atleta inválido')
+
+
+def _atleta():
+    from .models import Atleta
+    return Atleta
+
+
+def codigo_em_uso(codigo):
+    """True se já existe atleta com o código (usado só depois de uma falha de INSERT)"""
+    return _atleta().objects.filter(codigo_alfanumerico=codigo).exists()
+
+
+def _tentativa(using):
+    """
+    Contexto de uma tentativa de gravação: savepoint dentro de transação (para
+    que a falha não invalide a transação externa); fora dela, o próprio
+    INSERT em autocommit já é atômico.
+    """
+    if connections[using].in_atomic_block:
+        return transaction.atomic(using=using)
+    return nullcontext()
+
+
+def salvar_com_codigo(instancia, salvar, using=None):
+    """
+    Sorteia o código da instância e chama ``salvar()`` (o save do modelo),
+    sorteando outro e repetindo se o INSERT colidir no índice único.
+    Outros erros de integridade são propagados.
+    """
+    using = using or router.db_for_write(type(instancia), instance=instancia)
+    for tentativa in range(1, MAXIMO_TENTATIVAS + 1):
+        instancia.codigo_alfanumerico = gerar_codigo()
+        try:
+            with _tentativa(using):
+                return salvar()
+        except IntegrityError:
+            if not codigo_em_uso(instancia.codigo_alfanumerico):
+                raise
+            logger.warning(f"Código {instancia.codigo_alfanumerico} já em uso (tentativa {tentativa}); sorteando outro")
+    raise IntegrityError(f'Não foi possível alocar um código livre em {MAXIMO_TENTATIVAS} tentativas')
+
+
+def alocar_codigos(quantidade):
+    """
+    Devolve ``quantidade`` códigos distintos que não estão em uso, com uma
+    consulta a cada TAMANHO_CONSULTA códigos (repetida só se houver colisão). Os códigos não ficam reservados:
+    quem os grava deve tratar IntegrityError, como ``criar_atletas_em_lote``.
+    """
+    Atleta = _atleta()
+    codigos = set()
+    while len(codigos) < quantidade:
+        candidatos = set()
+        while len(candidatos) < quantidade - len(codigos):
+            codigo = gerar_codigo()
+            if codigo not in codigos:
+                candidatos.add(codigo)
+        em_uso = set()
+        lista = list(candidatos)
+        # IN em fatias, para não passar do limite de parâmetros do SQLite em importações grandes
+        for inicio in range(0, len(lista), TAMANHO_CONSULTA):
+            em_uso.update(Atleta.objects.filter(
+                codigo_alfanumerico__in=lista[inicio:inicio + TAMANHO_CONSULTA]
+            ).values_list('codigo_alfanumerico', flat=True))
+        codigos |= candidatos - em_uso
+    return list(codigos)
+
+
+def criar_atletas_em_lote(atletas, batch_size=500):
+    """
+    ``bulk_create`` de atletas atribuindo códigos com ``alocar_codigos`` aos
+    que não têm. Se um código for gravado por outro processo entre a
+    alocação e o INSERT, o lote é desfeito e repetido com códigos novos.
+    Não passa por ``Atleta.save()`` (sem busca de CEP nem tarefas de QR/foto).
+    """
+    Atleta = _atleta()
+    sem_codigo = [atleta for atleta in atletas if not atleta.codigo_alfanumerico]
+    for tentativa in range(1, MAXIMO_TENTATIVAS + 1):
+        for atleta, codigo in zip(sem_codigo, alocar_codigos(len(sem_codigo))):
+            atleta.codigo_alfanumerico = codigo
+        try:
+            with transaction.atomic():
+                return Atleta.objects.bulk_create(atletas, batch_size=batch_size)
+        except IntegrityError:
+            colisoes = Atleta.objects.filter(
+                codigo_alfanumerico__in=[atleta.codigo_alfanumerico for atleta in sem_codigo]
+            ).count()
+            if not colisoes:
+                raise
+            logger.warning(f"{colisoes} código(s) alocado(s) já em uso (tentativa {tentativa}); realocando")
+    raise IntegrityError(f'Não foi possível alocar códigos livres em {MAXIMO_TENTATIVAS} tentativas')
@@ -0,0 +1,159 @@
+"""
+Versões redimensionadas (renditions) das imagens enviadas pelos usuários.
+
+Fotos de celular chegam com vários MB e eram exibidas no tamanho original,
+reduzidas só por CSS. Para cada upload de ``Atleta.foto`` e
+``Modalidade.imagem`` são geradas, em segundo plano, versões "thumb", "card" e
+"full" em WebP e JPEG, sem EXIF (a orientação é aplicada antes). Imagens com
+transparência (logos em PNG) mantêm o canal alfa no WebP; no JPEG, que não tem
+alfa, ficam sobre fundo branco. Os nomes dos arquivos levam um hash do
+conteúdo, então podem ser servidos com cache longo.
+
+As versões ficam em um JSONField do próprio modelo (``foto_versoes`` /
+``imagem_versoes``)::
+
+    {"origem": "atletas/fotos/x.jpg",
+     "thumb": {"largura": 160, "altura": 120, "webp": "...", "jpeg": "..."}, ...}
+
+Enquanto não existem, ou se ``origem`` não é o arquivo atual (imagem trocada,
+versões ainda não refeitas), os templates usam o arquivo original.
+"""
+import hashlib
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+# Maior lado, em pixels, de cada versão (da menor para a maior)
+VERSOES = {
+    'thumb': 160,
+    'card': 480,
+    'full': 1280,
+}
+
+FORMATOS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+
+def campo_versoes(campo):
+    """Nome do JSONField que guarda as versões do campo de imagem"""
+    return f'{campo}_versoes'
+
+
+def precisa_versoes(instancia, campo):
+    """True se a imagem atual ainda não tem versões geradas"""
+    arquivo = getattr(instancia, campo)
+    versoes = getattr(instancia, campo_versoes(campo)) or {}
+    return bool(arquivo) and versoes.get('origem') != arquivo.name
+
+
+def _sobre_fundo_branco(imagem):
+    """Imagem RGB para o JPEG: a transparência vira fundo branco"""
+    from PIL import Image
+
+    if imagem.mode != 'RGBA':
+        return imagem
+    fundo = Image.new('RGB', imagem.size, 'white')
+    fundo.paste(imagem, mask=imagem.getchannel('A'))
+    return fundo
+
+
+def gerar_versoes(arquivo):
+    """
+    Gera e grava as versões de um arquivo de imagem (FieldFile).
+    Retorna o dicionário a guardar no JSONField.
+    """
+    from PIL import Image, ImageOps
+
+    with arquivo.open('rb') as origem:
+        imagem = Image.open(origem)
+        # Para JPEG, decodifica direto em resolução reduzida (bem mais rápido em fotos grandes)
+        imagem.draft('RGB', (VERSOES['full'], VERSOES['full']))
+        imagem = ImageOps.exif_transpose(imagem)
+        transparente = imagem.mode in ('RGBA', 'LA', 'PA') or 'transparency' in imagem.info
+        imagem = imagem.convert('RGBA' if transparente else 'RGB')
+
+    storage = arquivo.storage
+    pasta, nome = os.path.split(arquivo.name)
+    base = os.path.splitext(nome)[0]
+    versoes = {'origem': arquivo.name}
+    for tamanho, lado in VERSOES.items():
+        reduzida = imagem.copy()
+        reduzida.thumbnail((lado, lado), Image.LANCZOS)
+        versao = {'largura': reduzida.width, 'altura': reduzida.height}
+        for formato, opcoes in FORMATOS.items():
+            buffer = BytesIO()
+            # Sem o parâmetro exif, o Pillow não grava metadados na saída
+            (reduzida if formato == 'webp' else _sobre_fundo_branco(reduzida)).save(buffer, **opcoes)
+            conteudo = buffer.getvalue()
+            digest = hashlib.sha256(conteudo).hexdigest()[:12]
+            destino = f'{pasta}/versoes/{base}.{tamanho}.{digest}.{formato}'
+            # Mesmo conteúdo, mesmo nome: não grava de novo
+            if not storage.exists(destino):
+                destino = storage.save(destino, ContentFile(conteudo))
+            versao[formato] = destino
+        versoes[tamanho] = versao
+        # Se a imagem original for menor que esta versão, as maiores seriam iguais
+        if max(imagem.size) <= lado:
+            break
+    return versoes
+
+
+def arquivos_versoes(versoes):
+    """Nomes de todos os arquivos referenciados por um dicionário de versões"""
+    return {
+        versao[formato]
+        for tamanho, versao in (versoes or {}).items() if tamanho in VERSOES
+        for formato in FORMATOS if formato in versao
+    }
+
+
+def enfileirar_versoes(instancia, campo):
+    """Agenda a geração das versões da imagem para depois do commit da transação atual"""
+    from .tasks import gerar_versoes_imagem_task
+
+    modelo = f'{instancia._meta.app_label}.{instancia._meta.model_name}'
+    pk, nome = str(instancia.pk), getattr(instancia, campo).name
+    transaction.on_commit(lambda: gerar_versoes_imagem_task.delay(modelo, pk, campo, nome))
+
+
+def escolher_versao(versoes, origem, largura):
+    """
+    Menor versão que cobre ``largura`` pixels CSS em telas de alta densidade (2x).
+    Retorna o dicionário da versão, ou None se não houver versões do arquivo
+    ``origem`` (nome do arquivo atual; versões de uma imagem anterior não valem).
+    """
+    if not versoes or versoes.get('origem') != origem:
+        return None
+    disponiveis = [(tamanho, versoes.get(tamanho)) for tamanho in VERSOES]
+    disponiveis = [versao for tamanho, versao in disponiveis if versao]
+    if not disponiveis:
+        return None
+    for versao in disponiveis:
+        if max(versao['largura'], versao['altura']) >= largura * 2:
+            return versao
+    return disponiveis[-1]
+
+
+def html_imagem(instancia, campo, largura, **atributos):
+    """
+    <picture> com a menor versão que cabe em ``largura`` pixels (WebP e JPEG
+    de reserva), ou <img> com o arquivo original se ainda não há versões
+    do arquivo atual.
+    """
+    from django.utils.html import format_html, format_html_join
+
+    arquivo = getattr(instancia, campo)
+    extras = format_html_join('', ' {}="{}"', ((nome.replace('_', '-'), valor) for nome, valor in atributos.items()))
+    versao = escolher_versao(getattr(instancia, campo_versoes(campo)), arquivo.name, largura)
+    if versao is None:
+        return format_html('<img src="{}"{} loading="lazy">', arquivo.url, extras)
+    storage = arquivo.storage
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}">'
+        '<img src="{}"{} loading="lazy"></picture>',
+        storage.url(versao['webp']), storage.url(versao['jpeg']), extras,
+    )
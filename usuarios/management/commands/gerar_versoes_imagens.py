@@ -0,0 +1,54 @@
+"""
+Gera as versões redimensionadas (thumb/card/full, WebP e JPEG) das fotos de
+atletas e imagens de modalidades que ainda não as têm, por exemplo as
+enviadas antes da existência de usuarios.imagens.
+
+Uso:
+    python manage.py gerar_versoes_imagens
+    python manage.py gerar_versoes_imagens --fila   # enfileira no Celery
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from usuarios.imagens import precisa_versoes, enfileirar_versoes
+from usuarios.models import Atleta, Modalidade
+from usuarios.tasks import gerar_versoes_imagem_task
+
+MODELOS = [(Atleta, 'foto'), (Modalidade, 'imagem')]
+
+
+class Command(BaseCommand):
+    help = 'Gera versões redimensionadas das imagens enviadas que ainda não as têm'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fila', action='store_true',
+            help='Enfileira as tarefas no Celery em vez de processar aqui'
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.monotonic()
+        total = 0
+        for modelo, campo in MODELOS:
+            queryset = modelo.objects.exclude(**{campo: ''}).exclude(**{campo: None})
+            for instancia in queryset.only('pk', campo, f'{campo}_versoes').iterator(chunk_size=500):
+                if not precisa_versoes(instancia, campo):
+                    continue
+                if options['fila']:
+                    enfileirar_versoes(instancia, campo)
+                else:
+                    rotulo = f'{modelo._meta.app_label}.{modelo._meta.model_name}'
+                    resultado = gerar_versoes_imagem_task.apply(
+                        args=[rotulo, str(instancia.pk), campo, getattr(instancia, campo).name]
+                    ).result
+                    if resultado['status'] == 'error':
+                        self.stderr.write(f"{rotulo} {instancia.pk}: {resultado['message']}")
+                        continue
+                total += 1
+
+        duracao = time.monotonic() - inicio
+        acao = 'enfileiradas' if options['fila'] else 'geradas'
+        self.stdout.write(self.style.SUCCESS(
+            f'Versões {acao} para {total} imagens em {duracao:.1f}s'
+        ))
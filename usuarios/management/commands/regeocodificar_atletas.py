@@ -0,0 +1,147 @@
+"""
+Preenche o endereço (logradouro, bairro, cidade, estado) de atletas que têm
+CEP mas ficaram com esses campos vazios.
+
+Cada CEP distinto é resolvido uma única vez (base local, cache e, se preciso,
+ViaCEP), com um número limitado de consultas simultâneas. Os atletas são
+atualizados com ``bulk_update`` em lotes, sem passar por ``Atleta.save()``
+(que geraria código e QR Code novamente).
+
+O comando pode ser interrompido e executado de novo: atletas já preenchidos
+deixam de ser selecionados, e ``--a-partir-de`` retoma do último ID informado
+no progresso.
+
+Uso:
+    python manage.py regeocodificar_atletas
+    python manage.py regeocodificar_atletas --concorrencia 8 --lote 500
+"""
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+
+from usuarios.models import Atleta
+
+CAMPOS_ENDERECO = ['endereco', 'bairro', 'cidade', 'estado']
+
+
+class Command(BaseCommand):
+    help = 'Preenche endereços vazios de atletas a partir do CEP, em lote'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500, help='Atletas por lote (padrão: 500)')
+        parser.add_argument(
+            '--concorrencia', type=int, default=4,
+            help='Consultas de CEP simultâneas (padrão: 4)'
+        )
+        parser.add_argument('--a-partir-de', default=None, help='Retoma a partir deste ID de atleta')
+        parser.add_argument(
+            '--simular', action='store_true',
+            help='Apenas mostra quantos atletas seriam atualizados, sem gravar'
+        )
+
+    def handle(self, *args, **options):
+        tamanho_lote = options['lote']
+        concorrencia = options['concorrencia']
+        if tamanho_lote <= 0 or concorrencia <= 0:
+            raise CommandError('--lote e --concorrencia devem ser maiores que zero')
+
+        pendentes = Atleta.objects.exclude(cep='').filter(
+            Q(endereco='') | Q(bairro='') | Q(cidade='') | Q(estado='')
+        ).only('id', 'cep', *CAMPOS_ENDERECO).order_by('id')
+        if options['a_partir_de']:
+            pendentes = pendentes.filter(id__gt=options['a_partir_de'])
+
+        self.stdout.write(f'{pendentes.count()} atletas com endereço incompleto')
+
+        # Resultados por CEP valem para toda a execução (o mesmo CEP aparece em vários lotes)
+        resolvidos = {}
+        inicio = time.monotonic()
+        atualizados = sem_dados = falhas = 0
+        ultimo_id = options['a_partir_de']
+
+        with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+            while True:
+                consulta = pendentes if ultimo_id is None else pendentes.filter(id__gt=ultimo_id)
+                lote = list(consulta[:tamanho_lote])
+                if not lote:
+                    break
+
+                ceps = {_limpar(atleta.cep) for atleta in lote} - resolvidos.keys()
+                for cep, resultado in zip(ceps, executor.map(_consultar, ceps)):
+                    resolvidos[cep] = resultado
+
+                alterados = []
+                for atleta in lote:
+                    resultado = resolvidos.get(_limpar(atleta.cep))
+                    if resultado is _FALHA:
+                        falhas += 1
+                    elif not resultado:
+                        sem_dados += 1
+                    elif _preencher(atleta, resultado):
+                        alterados.append(atleta)
+
+                if alterados and not options['simular']:
+                    with transaction.atomic():
+                        Atleta.objects.bulk_update(alterados, CAMPOS_ENDERECO)
+                atualizados += len(alterados)
+                ultimo_id = lote[-1].id
+                self._progresso(atualizados, len(resolvidos), inicio, ultimo_id)
+
+        duracao = time.monotonic() - inicio
+        acao = 'seriam atualizados' if options['simular'] else 'atualizados'
+        self.stdout.write(self.style.SUCCESS(
+            f'{atualizados} atletas {acao} em {duracao:.1f}s '
+            f'({atualizados / duracao if duracao else atualizados:.0f}/s), '
+            f'{len(resolvidos)} CEPs distintos consultados'
+        ))
+        if sem_dados:
+            self.stdout.write(f'{sem_dados} atletas com CEP inexistente ou inválido')
+        if falhas:
+            self.stdout.write(self.style.WARNING(
+                f'{falhas} atletas não atualizados por indisponibilidade do ViaCEP; '
+                f'execute o comando novamente mais tarde'
+            ))
+
+    def _progresso(self, atualizados, ceps, inicio, ultimo_id):
+        duracao = time.monotonic() - inicio
+        taxa = atualizados / duracao if duracao else atualizados
+        self.stdout.write(f'  {atualizados} atualizados, {ceps} CEPs ({taxa:.0f}/s) - último ID {ultimo_id}')
+
+
+# Marca de CEP que não pôde ser consultado nesta execução (diferente de CEP inexistente)
+_FALHA = object()
+
+
+def _limpar(cep):
+    return re.sub(r'[^0-9]', '', cep)
+
+
+def _consultar(cep_limpo):
+    """Resolve um CEP em uma thread do pool (None se inválido ou inexistente)"""
+    if len(cep_limpo) != 8:
+        return None
+    # Import local: enderecos depende do Django já configurado
+    from enderecos.cache import resolver_cep
+    from enderecos.viacep import ViaCepIndisponivel
+
+    try:
+        return resolver_cep(cep_limpo)
+    except ViaCepIndisponivel:
+        return _FALHA
+    finally:
+        # Cada thread do pool abre a própria conexão com o banco
+        connection.close()
+
+
+def _preencher(atleta, dados):
+    """Aplica os dados do CEP ao atleta; retorna True se algum campo mudou"""
+    antes = [getattr(atleta, campo) for campo in CAMPOS_ENDERECO]
+    atleta.preencher_endereco(dados)
+    for campo in CAMPOS_ENDERECO:
+        limite = Atleta._meta.get_field(campo).max_length
+        setattr(atleta, campo, (getattr(atleta, campo) or '')[:limite])
+    return [getattr(atleta, campo) for campo in CAMPOS_ENDERECO] != antes
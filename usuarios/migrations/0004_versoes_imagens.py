@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0003_atleta_qr_code_imagem_alter_usuario_tipo_conta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='atleta',
+            name='foto_versoes',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Versões redimensionadas da foto, geradas automaticamente', verbose_name='Versões da Foto'),
+        ),
+        migrations.AddField(
+            model_name='modalidade',
+            name='imagem_versoes',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Versões redimensionadas da imagem, geradas automaticamente', verbose_name='Versões da Imagem'),
+        ),
+    ]
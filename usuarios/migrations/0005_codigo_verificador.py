@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:06
+
+import usuarios.codigos
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0004_versoes_imagens'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='atleta',
+            name='codigo_alfanumerico',
+            field=models.CharField(editable=False, max_length=10, unique=True, validators=[usuarios.codigos.validar_codigo_atleta]),
+        ),
+    ]
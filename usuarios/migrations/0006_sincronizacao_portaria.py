@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0005_codigo_verificador'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='matricula',
+            name='data_atualizacao',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Última Atualização'),
+        ),
+        migrations.AlterField(
+            model_name='atleta',
+            name='data_atualizacao',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Última Atualização'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:56
+
+import utils.uuid7
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0006_sincronizacao_portaria'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoteQrCode',
+            fields=[
+                ('id', models.UUIDField(default=utils.uuid7.uuid7, editable=False, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('na_fila', 'Na fila'), ('processando', 'Processando'), ('concluido', 'Concluído'), ('erro', 'Erro')], default='na_fila', max_length=20, verbose_name='Status')),
+                ('feitos', models.PositiveIntegerField(default=0, verbose_name='QR Codes Gerados')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Total de Atletas')),
+                ('duracao', models.FloatField(blank=True, null=True, verbose_name='Duração (s)')),
+                ('erro', models.TextField(blank=True, verbose_name='Erro')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+                ('data_atualizacao', models.DateTimeField(auto_now=True, verbose_name='Última Atualização')),
+            ],
+            options={
+                'verbose_name': 'Lote de QR Codes',
+                'verbose_name_plural': 'Lotes de QR Codes',
+            },
+        ),
+    ]
@@ -2,11 +2,14 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator
 from django.core.exceptions import ValidationError
+from django.conf import settings
 from datetime import date, timedelta
-from utils.get_alphanumeric import get_alphanumeric
 
 from utils.validacoes import validar_cpf, validar_idade_usuario, validar_idade_atleta,buscar_cep,validar_cep
 from utils.uuid7 import uuid7
+from utils.intervalos import IntervaloUUID7QuerySet
+
+from .codigos import validar_codigo_atleta
 
 
 class Usuario(AbstractUser):
@@ -133,7 +136,12 @@ class Atleta(models.Model):
         related_name='atletas',
         verbose_name='Usuário Responsável'
     )
-    codigo_alfanumerico = models.CharField(max_length=9, unique=True, editable=False)
+    codigo_alfanumerico = models.CharField(
+        max_length=10,
+        unique=True,
+        editable=False,
+        validators=[validar_codigo_atleta]
+    )
 
     # Dados pessoais
     nome = models.CharField(
@@ -186,6 +194,13 @@ class Atleta(models.Model):
         null=True,
         blank=True
     )
+    foto_versoes = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Versões da Foto',
+        help_text='Versões redimensionadas da foto, geradas automaticamente'
+    )
     # QR Code
     qr_code_imagem = models.ImageField(
         upload_to='atletas/qrcodes/',
@@ -304,9 +319,12 @@ class Atleta(models.Model):
 
     data_atualizacao = models.DateTimeField(
         auto_now=True,
+        db_index=True,
         verbose_name='Última Atualização'
         )
     
+    objects = IntervaloUUID7QuerySet.as_manager()
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -351,62 +369,58 @@ class Atleta(models.Model):
         return endereco
     
     def save(self, *args, **kwargs):
-        """Gera um código alfanumérico único e busca dados do CEP antes de salvar.
-        Após salvar, garante que a imagem do QR Code exista.
+        """Busca dados do CEP e grava o atleta, gerando o código alfanumérico se não existir.
+        Após salvar, agenda a gravação da imagem do QR Code, se configurado.
         """
-        # Gerar código alfanumérico se não existir
-        if not self.codigo_alfanumerico:
-            # Loop para garantir que o código gerado seja único
-            while True:
-                codigo = get_alphanumeric()
-                # Verifica se já existe um atleta com este código
-                if not Atleta.objects.filter(codigo_alfanumerico=codigo).exists():
-                    self.codigo_alfanumerico = codigo
-                    break
-        
         # Buscar dados do CEP se foi fornecido e os campos de endereço estão vazios
+        # (dentro de uma requisição o resultado já resolvido pelo formulário é reaproveitado)
         if self.cep and (not self.endereco or not self.bairro or not self.cidade or not self.estado):
             try:
-                from utils.validacoes import buscar_cep
-                cep_data = buscar_cep(self.cep.replace('-', ''))
+                cep_data = buscar_cep(self.cep)
                 if cep_data:
-                    self.endereco = cep_data.get('logradouro', self.endereco)
-                    self.bairro = cep_data.get('bairro', self.bairro)
-                    self.cidade = cep_data.get('localidade', self.cidade)
-                    self.estado = cep_data.get('uf', self.estado)
+                    self.preencher_endereco(cep_data)
             except Exception as e:
                 # Se houver erro na busca do CEP, continuar sem preencher automaticamente
                 pass
-        # Verificar se precisamos gerar o QR Code após salvar (requer ID para path estável)
-        precisa_qr = not self.qr_code_imagem
 
-        super().save(*args, **kwargs)
+        if self.codigo_alfanumerico:
+            super().save(*args, **kwargs)
+        else:
+            # Código sorteado e gravado direto; o índice único resolve colisões (ver usuarios.codigos)
+            from .codigos import salvar_com_codigo
+            salvar_com_codigo(self, lambda: super(Atleta, self).save(*args, **kwargs), using=kwargs.get('using'))
 
-        if precisa_qr:
-            try:
-                self.gerar_qr_code()
-                # Salvar somente o campo do QR para evitar loop
-                super().save(update_fields=['qr_code_imagem'])
-            except Exception:
-                # Em caso de erro ao gerar o QR, não impedir o save do restante
-                pass
+        # O QR Code é renderizado sob demanda; gravar o arquivo é opcional (ver usuarios.qr)
+        if settings.QR_CODE_SALVAR_ARQUIVO and not self.qr_code_imagem:
+            from .qr import enfileirar_qr_code
+            enfileirar_qr_code(self)
+
+        # Foto nova: versões redimensionadas em segundo plano (ver usuarios.imagens)
+        from .imagens import precisa_versoes, enfileirar_versoes
+        if precisa_versoes(self, 'foto'):
+            enfileirar_versoes(self, 'foto')
     
     def buscar_cep_automatico(self):
         """Busca dados do CEP e preenche os campos de endereço automaticamente"""
         if self.cep:
             try:
-                from utils.validacoes import buscar_cep
-                cep_data = buscar_cep(self.cep.replace('-', ''))
+                cep_data = buscar_cep(self.cep)
                 if cep_data:
-                    self.endereco = cep_data.get('logradouro', '')
-                    self.bairro = cep_data.get('bairro', '')
-                    self.cidade = cep_data.get('localidade', '')
-                    self.estado = cep_data.get('uf', '')
+                    self.preencher_endereco(cep_data)
                     return True
             except Exception as e:
                 return False
         return False
 
+    def preencher_endereco(self, cep_data):
+        """Preenche os campos de endereço com o resultado de buscar_cep.
+        Campos que o ViaCEP devolve vazios mantêm o valor informado pelo usuário.
+        """
+        self.endereco = cep_data.get('logradouro') or self.endereco
+        self.bairro = cep_data.get('bairro') or self.bairro
+        self.cidade = cep_data.get('cidade') or self.cidade
+        self.estado = cep_data.get('uf') or self.estado
+
     def gerar_qr_code(self, force: bool = False) -> bool:
         """Gera a imagem do QR Code a partir do codigo_alfanumerico.
 
@@ -420,31 +434,14 @@ class Atleta(models.Model):
         bool
             True se gerou/salvou, False caso contrário.
         """
-        from io import BytesIO
         from django.core.files.base import ContentFile
+        from .qr import renderizar_qr_png
         try:
             if self.qr_code_imagem and not force:
                 return False
-            # Import local para evitar dependência em import global
-            import qrcode
-            from qrcode.constants import ERROR_CORRECT_M
-
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=ERROR_CORRECT_M,
-                box_size=10,
-                border=2,
-            )
-            qr.add_data(self.codigo_alfanumerico)
-            qr.make(fit=True)
-            img = qr.make_image(fill_color="black", back_color="white")
-
-            buffer = BytesIO()
-            img.save(buffer, format='PNG')
-            buffer.seek(0)
 
             filename = f"{self.codigo_alfanumerico}.png"
-            self.qr_code_imagem.save(filename, ContentFile(buffer.getvalue()), save=False)
+            self.qr_code_imagem.save(filename, ContentFile(renderizar_qr_png(self.codigo_alfanumerico)), save=False)
             return True
         except Exception:
             return False
@@ -473,6 +470,13 @@ class Modalidade(models.Model):
         verbose_name='Imagem da Modalidade',
         help_text='Imagem representativa da modalidade (recomendado: 300x300px)'
     )
+    imagem_versoes = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Versões da Imagem',
+        help_text='Versões redimensionadas da imagem, geradas automaticamente'
+    )
     ativa = models.BooleanField(default=True, verbose_name='Modalidade Ativa')
     ordem = models.PositiveIntegerField(default=0, verbose_name='Ordem de Exibição')
     
@@ -481,6 +485,13 @@ class Modalidade(models.Model):
         verbose_name_plural = 'Modalidades'
         ordering = ['ordem', 'nome']
     
+    def save(self, *args, **kwargs):
+        """Após salvar, agenda as versões redimensionadas de uma imagem nova"""
+        super().save(*args, **kwargs)
+        from .imagens import precisa_versoes, enfileirar_versoes
+        if precisa_versoes(self, 'imagem'):
+            enfileirar_versoes(self, 'imagem')
+    
     def __str__(self):
         return self.nome
 
@@ -593,6 +604,11 @@ class Matricula(models.Model):
         default=True,
         verbose_name='Matrícula Ativa'
     )
+    data_atualizacao = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name='Última Atualização'
+    )
     
     class Meta:
         verbose_name = 'Matrícula'
@@ -614,4 +630,43 @@ class Matricula(models.Model):
     @property
     def status_color(self):
         """Retorna a cor do status da matrícula"""
-        return self.status_matricula.cor if self.status_matricula else '#007bff'
\ No newline at end of file
+        return self.status_matricula.cor if self.status_matricula else '#007bff'
+
+
+class LoteQrCode(models.Model):
+    """
+    Situação de um lote de QR Codes gerado pela ação do admin. Fica no banco
+    para a página de progresso (processo web) ver o que o worker Celery
+    (outro processo) grava.
+    """
+    STATUS_CHOICES = [
+        ('na_fila', 'Na fila'),
+        ('processando', 'Processando'),
+        ('concluido', 'Concluído'),
+        ('erro', 'Erro'),
+    ]
+
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid7,
+        editable=False,
+        verbose_name='ID'
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='na_fila', verbose_name='Status')
+    feitos = models.PositiveIntegerField(default=0, verbose_name='QR Codes Gerados')
+    total = models.PositiveIntegerField(default=0, verbose_name='Total de Atletas')
+    duracao = models.FloatField(null=True, blank=True, verbose_name='Duração (s)')
+    erro = models.TextField(blank=True, verbose_name='Erro')
+    data_criacao = models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')
+    data_atualizacao = models.DateTimeField(auto_now=True, verbose_name='Última Atualização')
+
+    class Meta:
+        verbose_name = 'Lote de QR Codes'
+        verbose_name_plural = 'Lotes de QR Codes'
+
+    def __str__(self):
+        return f"Lote {self.id} ({self.get_status_display()})"
+
+    @property
+    def percentual(self):
+        return int(100 * self.feitos / self.total) if self.total else 100
@@ -0,0 +1,203 @@
+"""
+Geração do QR Code dos atletas.
+
+O QR Code é função apenas do ``codigo_alfanumerico``: a view ``qr_code``
+renderiza SVG/PNG sob demanda, com ETag forte e cache imutável no navegador,
+e mantém em memória (LRU) os bytes renderizados recentemente. As páginas de
+cartão apontam para essa view, então gravar a imagem em ``Atleta.qr_code_imagem``
+é opcional (QR_CODE_SALVAR_ARQUIVO ou ações do admin, via ``gerar_qr_code_task``).
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Muda quando a aparência do QR mudar, invalidando ETags e caches dos navegadores
+VERSAO_RENDERIZACAO = 1
+
+# Lotes de QR Codes (LoteQrCode) mais antigos que isto são apagados ao criar um novo
+LOTE_VALIDADE = timedelta(days=1)
+
+FORMATOS = {
+    'svg': 'image/svg+xml',
+    'png': 'image/png',
+}
+
+
+def _criar_qr(codigo, **kwargs):
+    # Import local para evitar dependência em import global
+    import qrcode
+    from qrcode.constants import ERROR_CORRECT_M
+
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=ERROR_CORRECT_M,
+        box_size=10,
+        border=2,
+        **kwargs
+    )
+    qr.add_data(codigo)
+    qr.make(fit=True)
+    return qr
+
+
+def renderizar_qr_png(codigo):
+    """Gera o PNG do QR Code para o código informado"""
+    img = _criar_qr(codigo).make_image(fill_color="black", back_color="white")
+    buffer = BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def renderizar_qr_svg(codigo):
+    """Gera o SVG (vetorial, nítido na impressão) do QR Code para o código informado"""
+    from qrcode.image.svg import SvgPathImage
+    return _criar_qr(codigo, image_factory=SvgPathImage).make_image().to_string()
+
+
+@lru_cache(maxsize=1024)
+def qr_renderizado(codigo, formato):
+    """Bytes do QR Code no formato pedido, guardados em um LRU por processo"""
+    if formato == 'svg':
+        return renderizar_qr_svg(codigo)
+    return renderizar_qr_png(codigo)
+
+
+def etag_qr(codigo, formato):
+    """ETag forte: a saída é determinística para (código, formato, versão)"""
+    return f'"qr{VERSAO_RENDERIZACAO}-{codigo}.{formato}"'
+
+
+def enfileirar_qr_code(atleta, forcar=False):
+    """Agenda a gravação da imagem do QR Code para depois do commit da transação atual"""
+    from .tasks import gerar_qr_code_task
+
+    atleta_id, codigo = str(atleta.pk), atleta.codigo_alfanumerico
+    transaction.on_commit(lambda: gerar_qr_code_task.delay(atleta_id, codigo, forcar))
+
+
+def url_qr_code(atleta, formato='svg'):
+    """Endereço do QR Code do atleta para usar em <img src>"""
+    return reverse('usuarios:qr_code', args=[atleta.codigo_alfanumerico, formato])
+
+
+def gerar_qr_codes_lote(atleta_ids, processos=None, progresso=None, tamanho_lote=200):
+    """
+    Grava a imagem do QR Code de vários atletas de uma vez.
+
+    A renderização é distribuída em um pool de processos (``processos=1`` faz
+    tudo em série); os arquivos são gravados pelo processo atual e o banco é
+    atualizado com um único ``bulk_update`` no final. ``progresso(feitos, total)``
+    é chamado a cada ``tamanho_lote`` atletas. Retorna quantos foram gravados.
+    """
+    from .models import Atleta
+
+    atletas = list(
+        Atleta.objects.filter(id__in=atleta_ids).only('id', 'codigo_alfanumerico', 'qr_code_imagem')
+    )
+    total = len(atletas)
+    if progresso:
+        progresso(0, total)
+    if not total:
+        return 0
+
+    processos = processos or os.cpu_count() or 1
+    if processos > 1 and multiprocessing.current_process().daemon:
+        # Workers prefork do Celery não podem criar processos filhos (use --pool solo/threads)
+        logger.warning("Processo atual é daemon; QR Codes serão renderizados em série")
+        processos = 1
+
+    campo = Atleta._meta.get_field('qr_code_imagem')
+    storage = campo.storage
+    codigos = [atleta.codigo_alfanumerico for atleta in atletas]
+    antigos = []
+
+    executor = ProcessPoolExecutor(max_workers=processos) if processos > 1 else None
+    try:
+        if executor:
+            pedacos = max(1, min(tamanho_lote, total // (processos * 4)))
+            imagens = executor.map(renderizar_qr_png, codigos, chunksize=pedacos)
+        else:
+            imagens = map(renderizar_qr_png, codigos)
+
+        from django.core.files.base import ContentFile
+        for feitos, (atleta, png) in enumerate(zip(atletas, imagens), start=1):
+            if atleta.qr_code_imagem:
+                antigos.append(atleta.qr_code_imagem.name)
+            atleta.qr_code_imagem = storage.save(
+                campo.generate_filename(atleta, f"{atleta.codigo_alfanumerico}.png"), ContentFile(png)
+            )
+            if progresso and feitos % tamanho_lote == 0:
+                progresso(feitos, total)
+    finally:
+        if executor:
+            executor.shutdown()
+
+    with transaction.atomic():
+        Atleta.objects.bulk_update(atletas, ['qr_code_imagem'], batch_size=500)
+    for nome in antigos:
+        storage.delete(nome)
+
+    if progresso:
+        progresso(total, total)
+    return total
+
+
+def criar_lote(total):
+    """Novo LoteQrCode na fila; os lotes antigos saem (só interessam enquanto alguém acompanha o progresso)"""
+    from .models import LoteQrCode
+
+    LoteQrCode.objects.filter(data_criacao__lt=timezone.now() - LOTE_VALIDADE).delete()
+    return LoteQrCode.objects.create(total=total)
+
+
+def enfileirar_lote(atleta_ids, lote_id):
+    """
+    Agenda gerar_qr_codes_lote_task para depois do commit. Com
+    CELERY_TASK_ALWAYS_EAGER (sem worker), a tarefa roda em uma thread do
+    processo: .delay() faria o lote inteiro dentro da requisição, e a
+    página de progresso só abriria no fim.
+    """
+    from .tasks import gerar_qr_codes_lote_task
+
+    def enfileirar():
+        if settings.CELERY_TASK_ALWAYS_EAGER:
+            threading.Thread(target=_executar_lote, args=(atleta_ids, lote_id), daemon=True).start()
+        else:
+            gerar_qr_codes_lote_task.delay(atleta_ids, lote_id)
+    transaction.on_commit(enfileirar)
+
+
+def _executar_lote(atleta_ids, lote_id):
+    from django.db import connection
+    from .tasks import gerar_qr_codes_lote_task
+
+    try:
+        gerar_qr_codes_lote_task.apply(args=(atleta_ids, lote_id))
+    finally:
+        connection.close()
+
+
+def progresso_lote(lote_id):
+    """LoteQrCode do lote (None se desconhecido ou já apagado)"""
+    from .models import LoteQrCode
+
+    return LoteQrCode.objects.filter(id=lote_id).first()
+
+
+def registrar_progresso_lote(lote_id, **situacao):
+    """Atualiza status, feitos, total, duracao ou erro do lote"""
+    from .models import LoteQrCode
+
+    LoteQrCode.objects.filter(id=lote_id).update(data_atualizacao=timezone.now(), **situacao)
@@ -256,3 +256,143 @@ def enviar_email_recuperacao_senha_task(self, usuario_id, reset_url):
             'message': f'Erro: {str(e)}',
             'usuario_id': usuario_id
         }
+
+@shared_task(bind=True, queue='default')
+def gerar_qr_code_task(self, atleta_id, codigo, forcar=False):
+    """
+    Tarefa Celery para gerar e gravar a imagem do QR Code de um atleta.
+    Idempotente: não faz nada se a imagem do código atual já existe ou se o
+    código do atleta mudou desde o enfileiramento.
+    """
+    logger.info(f"Iniciando geração de QR Code para atleta {atleta_id}")
+    
+    try:
+        from .models import Atleta
+        from .qr import renderizar_qr_png
+        from django.core.files.base import ContentFile
+        import os
+        
+        atleta = Atleta.objects.only('id', 'codigo_alfanumerico', 'qr_code_imagem').get(id=atleta_id)
+        if atleta.codigo_alfanumerico != codigo:
+            logger.info(f"Código do atleta {atleta_id} mudou, QR Code de {codigo} descartado")
+            return {'status': 'ignorado', 'atleta_id': atleta_id}
+        
+        atual = atleta.qr_code_imagem.name if atleta.qr_code_imagem else ''
+        if atual and os.path.basename(atual).startswith(codigo) and not forcar:
+            return {'status': 'ignorado', 'atleta_id': atleta_id}
+        
+        storage = atleta.qr_code_imagem.storage
+        nome = storage.save(
+            atleta.qr_code_imagem.field.generate_filename(atleta, f"{codigo}.png"),
+            ContentFile(renderizar_qr_png(codigo)),
+        )
+        # UPDATE direto, condicionado ao código: não dispara Atleta.save() novamente
+        atualizados = Atleta.objects.filter(id=atleta_id, codigo_alfanumerico=codigo).update(qr_code_imagem=nome)
+        if not atualizados:
+            storage.delete(nome)
+            return {'status': 'ignorado', 'atleta_id': atleta_id}
+        if atual and atual != nome:
+            storage.delete(atual)
+        
+        logger.info(f"[OK] QR Code gerado para atleta {atleta_id}: {nome}")
+        return {
+            'status': 'success',
+            'message': f'QR Code gravado em {nome}',
+            'atleta_id': atleta_id
+        }
+    
+    except Atleta.DoesNotExist:
+        logger.error(f"[ERRO] Atleta com ID {atleta_id} não encontrado")
+        return {
+            'status': 'error',
+            'message': 'Atleta não encontrado',
+            'atleta_id': atleta_id
+        }
+    except Exception as e:
+        logger.error(f"[ERRO] Erro inesperado ao gerar QR Code do atleta {atleta_id}: {e}", exc_info=True)
+        return {
+            'status': 'error',
+            'message': f'Erro: {str(e)}',
+            'atleta_id': atleta_id
+        }
+
+
+# Lotes grandes passam dos limites globais pensados para emails
+@shared_task(bind=True, queue='default', soft_time_limit=600, time_limit=660)
+def gerar_qr_codes_lote_task(self, atleta_ids, lote_id):
+    """
+    Tarefa Celery para gravar os QR Codes de vários atletas (ação do admin).
+    O progresso fica no LoteQrCode ``lote_id`` (usuarios.qr.progresso_lote).
+    """
+    from .qr import gerar_qr_codes_lote, registrar_progresso_lote
+    import time
+    
+    logger.info(f"Iniciando lote {lote_id} de QR Codes ({len(atleta_ids)} atletas)")
+    inicio = time.monotonic()
+    
+    def progresso(feitos, total):
+        registrar_progresso_lote(lote_id, status='processando', feitos=feitos, total=total)
+    
+    try:
+        total = gerar_qr_codes_lote(atleta_ids, progresso=progresso)
+        duracao = time.monotonic() - inicio
+        registrar_progresso_lote(lote_id, status='concluido', feitos=total, total=total, duracao=round(duracao, 1))
+        logger.info(f"[OK] Lote {lote_id}: {total} QR Codes em {duracao:.1f}s")
+        return {
+            'status': 'success',
+            'message': f'{total} QR Codes gerados',
+            'lote_id': lote_id
+        }
+    except Exception as e:
+        logger.error(f"[ERRO] Erro inesperado no lote {lote_id} de QR Codes: {e}", exc_info=True)
+        registrar_progresso_lote(lote_id, status='erro', feitos=0, total=len(atleta_ids), erro=str(e))
+        return {
+            'status': 'error',
+            'message': f'Erro: {str(e)}',
+            'lote_id': lote_id
+        }
+
+@shared_task(bind=True, queue='default')
+def gerar_versoes_imagem_task(self, modelo, pk, campo, nome_origem):
+    """
+    Tarefa Celery para gerar as versões redimensionadas de uma imagem enviada
+    (usuarios.imagens). Idempotente: ignora se a imagem mudou desde o
+    enfileiramento ou se as versões dela já existem.
+    """
+    logger.info(f"Iniciando versões de {modelo}.{campo} ({pk})")
+    
+    try:
+        from django.apps import apps
+        from .imagens import campo_versoes, gerar_versoes, arquivos_versoes, precisa_versoes
+        
+        Modelo = apps.get_model(modelo)
+        instancia = Modelo.objects.only('pk', campo, campo_versoes(campo)).get(pk=pk)
+        arquivo = getattr(instancia, campo)
+        if arquivo.name != nome_origem or not precisa_versoes(instancia, campo):
+            return {'status': 'ignorado', 'pk': pk}
+        
+        anteriores = arquivos_versoes(getattr(instancia, campo_versoes(campo)))
+        versoes = gerar_versoes(arquivo)
+        # UPDATE direto e condicionado ao arquivo atual: não dispara save() de novo
+        atualizados = Modelo.objects.filter(pk=pk, **{campo: nome_origem}).update(
+            **{campo_versoes(campo): versoes}
+        )
+        # Remove os arquivos que deixaram de ser usados (ou os novos, se a imagem mudou no meio)
+        obsoletos = anteriores - arquivos_versoes(versoes) if atualizados else arquivos_versoes(versoes) - anteriores
+        for nome in obsoletos:
+            arquivo.storage.delete(nome)
+        
+        logger.info(f"[OK] Versões de {modelo}.{campo} ({pk}) geradas")
+        return {
+            'status': 'success',
+            'message': f'{len(arquivos_versoes(versoes))} arquivos gerados',
+            'pk': pk
+        }
+    
+    except Exception as e:
+        logger.error(f"[ERRO] Erro ao gerar versões de {modelo}.{campo} ({pk}): {e}", exc_info=True)
+        return {
+            'status': 'error',
+            'message': f'Erro: {str(e)}',
+            'pk': pk
+        }
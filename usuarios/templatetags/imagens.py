@@ -0,0 +1,14 @@
+from django import template
+
+from usuarios.imagens import html_imagem
+
+register = template.Library()
+
+
+@register.simple_tag
+def imagem_versao(instancia, campo, largura, **atributos):
+    """
+    Exibe a menor versão da imagem que cabe em ``largura`` pixels.
+    Uso: {% imagem_versao atleta 'foto' 50 alt=atleta.nome class='rounded-circle' %}
+    """
+    return html_imagem(instancia, campo, largura, **atributos)
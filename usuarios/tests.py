@@ -0,0 +1,159 @@
+import shutil
+import tempfile
+from datetime import date
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .codigos import criar_atletas_em_lote
+from .imagens import escolher_versao, gerar_versoes
+from .models import Usuario, Atleta, Modalidade, TipoMatricula, StatusMatricula, Matricula, LoteQrCode
+from .qr import criar_lote, registrar_progresso_lote
+from .tasks import gerar_qr_codes_lote_task
+
+
+class ListagensAdminTests(TestCase):
+	"""
+	As listagens do admin fazem o mesmo número de consultas com 10 ou 500
+	registros: colunas calculadas vêm de anotações e select_related/
+	prefetch_related, nunca de uma consulta por linha.
+	"""
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.admin = Usuario.objects.create_superuser(
+			email='admin@exemplo.com', username='admin', first_name='Admin', last_name='Teste', password='x',
+		)
+		cls.modalidade = Modalidade.objects.create(nome='Judô')
+		cls.tipo = TipoMatricula.objects.create(nome='Mensal')
+		cls.status = StatusMatricula.objects.create(nome='Ativa')
+		StatusMatricula.objects.create(nome='Pendente')
+
+	def setUp(self):
+		self.client.force_login(self.admin)
+
+	def criar_responsaveis(self, quantidade):
+		inicio = Usuario.objects.count()
+		return Usuario.objects.bulk_create([
+			Usuario(
+				email=f'responsavel{i}@exemplo.com', username=f'responsavel{i}',
+				first_name='Responsável', last_name=str(i),
+			)
+			for i in range(inicio, inicio + quantidade)
+		])
+
+	def criar_atletas(self, quantidade):
+		"""Um responsável, um atleta e uma matrícula por registro"""
+		responsaveis = self.criar_responsaveis(quantidade)
+		inicio = Atleta.objects.count()
+		atletas = criar_atletas_em_lote([
+			Atleta(
+				usuario=responsavel, nome=f'Atleta {inicio + i}', data_nascimento=date(2012, 1, 1),
+				cpf=f'{inicio + i:011d}', sexo='M', parentesco='filho',
+				cep='78000000', endereco='Rua', numero='1', bairro='Centro', cidade='Cuiabá', estado='MT',
+				escolaridade='medio', escola='Escola', turno='matutino',
+			)
+			for i, responsavel in enumerate(responsaveis)
+		])
+		Matricula.objects.bulk_create([
+			Matricula(atleta=atleta, tipo_matricula=self.tipo, modalidade=self.modalidade, status_matricula=self.status)
+			for atleta in atletas
+		])
+
+	def assertConsultasFixas(self, modelo, criar, orcamento):
+		url = reverse(f'admin:usuarios_{modelo}_changelist')
+		for total in (10, 500):
+			criar(total - getattr(self, 'criados', 0))
+			self.criados = total
+			with self.assertNumQueries(orcamento):
+				resposta = self.client.get(url)
+			self.assertEqual(resposta.status_code, 200)
+
+	def test_listagem_de_usuarios(self):
+		self.assertConsultasFixas('usuario', self.criar_atletas, 8)
+
+	def test_listagem_de_atletas(self):
+		self.assertConsultasFixas('atleta', self.criar_atletas, 9)
+
+	def test_listagem_de_matriculas(self):
+		self.assertConsultasFixas('matricula', self.criar_atletas, 15)
+
+
+class VersoesImagensTests(TestCase):
+	"""Transparência preservada no WebP e fundo branco no JPEG; versões de outra imagem não valem"""
+
+	def setUp(self):
+		pasta = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, pasta, ignore_errors=True)
+		configuracao = override_settings(MEDIA_ROOT=pasta)
+		configuracao.enable()
+		self.addCleanup(configuracao.disable)
+
+	def test_png_transparente(self):
+		from PIL import Image
+
+		logo = Image.new('RGBA', (400, 200), (0, 0, 0, 0))
+		logo.paste((200, 0, 0, 255), (100, 50, 300, 150))
+		buffer = BytesIO()
+		logo.save(buffer, 'PNG')
+		modalidade = Modalidade(nome='Judô')
+		modalidade.imagem.save('logo.png', ContentFile(buffer.getvalue()), save=False)
+
+		versao = gerar_versoes(modalidade.imagem)['thumb']
+		storage = modalidade.imagem.storage
+		with storage.open(versao['webp']) as arquivo:
+			webp = Image.open(arquivo)
+			webp.load()
+		with storage.open(versao['jpeg']) as arquivo:
+			jpeg = Image.open(arquivo).convert('RGB')
+		self.assertEqual(webp.mode, 'RGBA')
+		self.assertEqual(webp.getpixel((0, 0))[3], 0)
+		self.assertTrue(all(canal > 240 for canal in jpeg.getpixel((0, 0))))
+
+	def test_versoes_de_imagem_anterior(self):
+		versoes = {'origem': 'modalidades/antiga.png', 'thumb': {'largura': 160, 'altura': 80, 'webp': 'a', 'jpeg': 'b'}}
+		self.assertIsNone(escolher_versao(versoes, 'modalidades/nova.png', 40))
+		self.assertEqual(escolher_versao(versoes, 'modalidades/antiga.png', 40)['webp'], 'a')
+
+
+class LoteQrCodeTests(TestCase):
+	"""O progresso do lote fica no banco, visível para a página de progresso em outro processo"""
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.admin = Usuario.objects.create_superuser(
+			email='admin@exemplo.com', username='admin', first_name='Admin', last_name='Teste', password='x',
+		)
+		cls.atleta = criar_atletas_em_lote([Atleta(
+			usuario=cls.admin, nome='Atleta', data_nascimento=date(2012, 1, 1), cpf='00000000001',
+			sexo='M', parentesco='filho', cep='78000000', endereco='Rua', numero='1', bairro='Centro',
+			cidade='Cuiabá', estado='MT', escolaridade='medio', escola='Escola', turno='matutino',
+		)])[0]
+
+	def setUp(self):
+		self.client.force_login(self.admin)
+
+	def test_acao_cria_lote_e_agenda_depois_do_commit(self):
+		with self.captureOnCommitCallbacks() as agendadas:
+			resposta = self.client.post(reverse('admin:usuarios_atleta_changelist'), {
+				'action': 'gerar_qr_codes', '_selected_action': [self.atleta.id],
+			})
+		lote = LoteQrCode.objects.get()
+		self.assertRedirects(resposta, reverse('admin:usuarios_atleta_progresso_qr', args=[lote.id]))
+		self.assertEqual((lote.status, lote.total), ('na_fila', 1))
+		# A tarefa só sai depois do commit: nada rodou dentro da requisição
+		self.assertEqual(len(agendadas), 1)
+
+	def test_pagina_le_o_progresso_do_banco(self):
+		lote = criar_lote(10)
+		registrar_progresso_lote(lote.id, status='processando', feitos=4)
+		resposta = self.client.get(reverse('admin:usuarios_atleta_progresso_qr', args=[lote.id]))
+		self.assertContains(resposta, '4 de 10')
+		self.assertContains(resposta, 'http-equiv="refresh"')
+
+		gerar_qr_codes_lote_task.apply(args=([], str(lote.id)))
+		resposta = self.client.get(reverse('admin:usuarios_atleta_progresso_qr', args=[lote.id]))
+		self.assertNotContains(resposta, 'http-equiv="refresh"')
+		self.assertEqual(LoteQrCode.objects.get(id=lote.id).status, 'concluido')
@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import path, re_path
 from . import views
 
 app_name = 'usuarios'
@@ -19,6 +19,7 @@ urlpatterns = [
     path('editar-atleta/<uuid:atleta_id>/', views.editar_atleta, name='editar_atleta'),
     path('excluir-atleta/<uuid:atleta_id>/', views.excluir_atleta, name='excluir_atleta'),
     path('atleta/<uuid:atleta_id>/cartao/', views.cartao_atleta, name='cartao_atleta'),
+    re_path(r'^atleta/qr/(?P<codigo>[A-Z0-9]{9,10})\.(?P<formato>svg|png)$', views.qr_code, name='qr_code'),
     
     # Matrículas
     path('matricula/projeto-social/', views.matricula_projeto_social, name='matricula_projeto_social'),
@@ -33,6 +34,7 @@ urlpatterns = [
     
     # Utilitários
     path('buscar-cep/', views.buscar_cep_ajax, name='buscar_cep'),
+    path('buscar-cep/async/', views.buscar_cep_ajax_async, name='buscar_cep_async'),
     path('galeria/', views.galeria_completa, name='galeria_completa'),
 ]
 
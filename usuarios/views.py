@@ -5,13 +5,13 @@ from django.contrib import messages
 from django.core.mail import send_mail
 from django.conf import settings
 from django.urls import reverse
-from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
+from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode, parse_etags
 from django.utils.encoding import force_bytes, force_str
 from django.contrib.auth.tokens import default_token_generator
-from django.http import HttpResponse, JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from .models import Usuario, Atleta, TipoMatricula, Modalidade, StatusMatricula
 from .forms import UsuarioRegistroForm, UsuarioLoginForm, AtletaForm
-from utils.validacoes import buscar_cep
+from utils.validacoes import buscar_cep, buscar_cep_async
 import requests
 from datetime import date, datetime
 import logging
@@ -417,12 +417,10 @@ def cadastrar_atleta(request):
                     atleta.escola = escola_outra
             
             # Buscar dados do CEP e mapear para os campos do modelo
-            cep_data = buscar_cep(atleta.cep.replace('-', ''))
+            # (reaproveita a resolução feita na validação do formulário)
+            cep_data = buscar_cep(atleta.cep)
             if cep_data:
-                atleta.endereco = cep_data.get('logradouro', atleta.endereco)
-                atleta.bairro = cep_data.get('bairro', atleta.bairro)
-                atleta.cidade = cep_data.get('localidade', atleta.cidade)
-                atleta.estado = cep_data.get('uf', atleta.estado)
+                atleta.preencher_endereco(cep_data)
             
             atleta.save()
             messages.success(request, 'Atleta cadastrado com sucesso!')
@@ -450,12 +448,10 @@ def editar_atleta(request, atleta_id):
                     atleta.escola = escola_outra
             
             # Buscar dados do CEP se foi alterado
-            cep_data = buscar_cep(atleta.cep.replace('-', ''))
+            # (reaproveita a resolução feita na validação do formulário)
+            cep_data = buscar_cep(atleta.cep)
             if cep_data:
-                atleta.endereco = cep_data.get('logradouro', atleta.endereco)
-                atleta.bairro = cep_data.get('bairro', atleta.bairro)
-                atleta.cidade = cep_data.get('localidade', atleta.cidade)
-                atleta.estado = cep_data.get('uf', atleta.estado)
+                atleta.preencher_endereco(cep_data)
             
             atleta.save()
             messages.success(request, 'Atleta atualizado com sucesso!')
@@ -491,6 +487,20 @@ def buscar_cep_ajax(request):
     return JsonResponse({'erro': 'CEP não encontrado'}, status=404)
 
 
+async def buscar_cep_ajax_async(request):
+    """Busca CEP via AJAX sem bloquear o worker (mesmo contrato JSON de buscar_cep_ajax).
+    Sob ASGI, um único worker atende muitas consultas simultâneas enquanto espera o ViaCEP.
+    """
+    if request.method == 'GET':
+        cep = request.GET.get('cep', '').replace('-', '')
+        if len(cep) == 8:
+            data = await buscar_cep_async(cep)
+            if data:
+                return JsonResponse(data)
+    
+    return JsonResponse({'erro': 'CEP não encontrado'}, status=404)
+
+
 def galeria_completa(request):
     """View para a página completa da galeria"""
     return render(request, 'usuarios/galeria_completa.html')
@@ -505,15 +515,32 @@ def cartao_atleta(request, atleta_id):
         return redirect('usuarios:dashboard')
 
     atleta = get_object_or_404(Atleta, id=atleta_id)
-    # Garante que o QR Code exista
-    if not atleta.qr_code_imagem:
-        atleta.gerar_qr_code(force=True)
-        atleta.save(update_fields=['qr_code_imagem'])
     return render(request, 'usuarios/usuario/cartao_atleta.html', {
         'atleta': atleta
     })
 
 
+def qr_code(request, codigo, formato):
+    """
+    Renderiza o QR Code de um código de atleta (SVG ou PNG).
+    A imagem depende só do código, então não consulta o banco e pode ficar
+    em cache indefinidamente (ETag forte + Cache-Control immutable).
+    """
+    from .codigos import codigo_valido
+    from .qr import FORMATOS, etag_qr, qr_renderizado
+
+    if not codigo_valido(codigo):
+        raise Http404('Código de atleta inválido')
+    etag = etag_qr(codigo, formato)
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponse(status=304)
+    else:
+        response = HttpResponse(qr_renderizado(codigo, formato), content_type=FORMATOS[formato])
+    response['ETag'] = etag
+    response['Cache-Control'] = f'public, max-age={60 * 60 * 24 * 365}, immutable'
+    return response
+
+
 @login_required
 def matricula_projeto_social(request):
     if request.method == 'POST':
@@ -0,0 +1,57 @@
+"""
+Filtros de listagem do admin compartilhados entre os apps.
+"""
+from datetime import datetime, time
+
+from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.utils import build_q_object_from_lookup_parameters
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from utils.uuid7 import uuid7_minimo
+
+
+class FiltroDataCriacaoUUID7(admin.DateFieldListFilter):
+    """
+    Mesmo filtro de datas do admin ("Hoje", "Últimos 7 dias", "Este mês"...),
+    aplicado como intervalo da chave primária UUIDv7 em vez da coluna de
+    data, que não tem índice. Use só em campos ``auto_now_add`` de modelos
+    com ``id`` gerado por ``uuid7`` (ver utils.intervalos).
+
+        list_filter = [('data_cadastro', FiltroDataCriacaoUUID7)]
+    """
+
+    def _momento(self, parametro):
+        valor = self.used_parameters.get(parametro)
+        if not valor:
+            return None
+        valor = valor[-1] if isinstance(valor, list) else valor
+        momento = parse_datetime(valor)
+        if momento is None:
+            data = parse_date(valor)
+            if data is None:
+                raise IncorrectLookupParameters(f'Data inválida: {valor}')
+            momento = datetime.combine(data, time.min)
+        if timezone.is_naive(momento):
+            momento = timezone.make_aware(momento)
+        return momento
+
+    def queryset(self, request, queryset):
+        inicio = self._momento(self.lookup_kwarg_since)
+        fim = self._momento(self.lookup_kwarg_until)
+        filtros = {}
+        if inicio is not None:
+            filtros['pk__gte'] = uuid7_minimo(inicio)
+        if fim is not None:
+            filtros['pk__lt'] = uuid7_minimo(fim)
+        # Demais parâmetros (ex.: __isnull) seguem pela coluna
+        restantes = {
+            chave: valor for chave, valor in self.used_parameters.items()
+            if chave not in (self.lookup_kwarg_since, self.lookup_kwarg_until)
+        }
+        try:
+            return queryset.filter(build_q_object_from_lookup_parameters(restantes), **filtros)
+        except (ValueError, ValidationError) as e:
+            raise IncorrectLookupParameters(e)
@@ -0,0 +1,319 @@
+"""
+Cliente HTTP compartilhado para chamadas a serviços externos.
+
+Cada ``ClienteHTTP`` mantém uma ``requests.Session`` no nível do módulo, com
+pool de conexões keep-alive limitado, timeouts curtos, novas tentativas com
+espera aleatória (jitter) e um disjuntor (circuit breaker) que passa a falhar
+imediatamente quando o serviço começa a dar timeout, para não prender os
+workers do gunicorn. Latência e erros são contados e podem ser exportados no
+formato texto do Prometheus com ``exportar_metricas()``.
+
+``aget`` faz o mesmo com um cliente assíncrono (httpx), compartilhando o
+disjuntor e as métricas com a versão síncrona.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Limites (em segundos) dos buckets do histograma de latência
+BUCKETS_LATENCIA = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_clientes = {}
+_clientes_lock = threading.Lock()
+
+
+class ErroHTTP(Exception):
+    """Falha ao chamar um serviço externo (rede, timeout ou HTTP 5xx)"""
+
+
+class CircuitoAberto(ErroHTTP):
+    """O disjuntor está aberto: a chamada nem chegou a ser feita"""
+
+
+class Disjuntor:
+    """Circuit breaker simples: fechado -> aberto -> meio aberto -> fechado.
+
+    Abre após ``limite_falhas`` falhas seguidas. Enquanto aberto, recusa as
+    chamadas por ``tempo_espera`` segundos; depois deixa passar uma única
+    chamada de teste, que fecha o circuito se der certo.
+    """
+    FECHADO = 'fechado'
+    ABERTO = 'aberto'
+    MEIO_ABERTO = 'meio_aberto'
+
+    def __init__(self, limite_falhas=5, tempo_espera=30.0):
+        self.limite_falhas = limite_falhas
+        self.tempo_espera = tempo_espera
+        self.estado = self.FECHADO
+        self.falhas_seguidas = 0
+        self.aberto_em = 0.0
+        self.aberturas = 0
+        self._teste_em_andamento = False
+        self._lock = threading.Lock()
+
+    def permitir(self):
+        """Indica se a chamada pode ser feita agora"""
+        with self._lock:
+            if self.estado == self.FECHADO:
+                return True
+            if self.estado == self.ABERTO:
+                if time.monotonic() - self.aberto_em < self.tempo_espera:
+                    return False
+                self.estado = self.MEIO_ABERTO
+                self._teste_em_andamento = False
+            # Meio aberto: apenas uma chamada de teste por vez
+            if self._teste_em_andamento:
+                return False
+            self._teste_em_andamento = True
+            return True
+
+    def registrar_sucesso(self):
+        with self._lock:
+            self.estado = self.FECHADO
+            self.falhas_seguidas = 0
+            self._teste_em_andamento = False
+
+    def registrar_falha(self):
+        with self._lock:
+            self.falhas_seguidas += 1
+            self._teste_em_andamento = False
+            if self.estado == self.MEIO_ABERTO or self.falhas_seguidas >= self.limite_falhas:
+                if self.estado != self.ABERTO:
+                    self.aberturas += 1
+                    logger.warning(f"Disjuntor aberto após {self.falhas_seguidas} falha(s) seguida(s)")
+                self.estado = self.ABERTO
+                self.aberto_em = time.monotonic()
+
+
+class MetricasHTTP:
+    """Contadores de chamadas e histograma de latência, seguros entre threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.resultados = {}
+        self.tentativas = 0
+        self.latencia_soma = 0.0
+        self.latencia_total = 0
+        self.latencia_buckets = [0] * len(BUCKETS_LATENCIA)
+
+    def registrar(self, resultado, latencia=None):
+        with self._lock:
+            self.resultados[resultado] = self.resultados.get(resultado, 0) + 1
+            if latencia is not None:
+                self.latencia_soma += latencia
+                self.latencia_total += 1
+                for indice, limite in enumerate(BUCKETS_LATENCIA):
+                    if latencia <= limite:
+                        self.latencia_buckets[indice] += 1
+
+    def registrar_tentativa(self):
+        with self._lock:
+            self.tentativas += 1
+
+    def resumo(self):
+        with self._lock:
+            return {
+                'resultados': dict(self.resultados),
+                'tentativas': self.tentativas,
+                'latencia_soma': self.latencia_soma,
+                'latencia_total': self.latencia_total,
+                'latencia_buckets': list(self.latencia_buckets),
+            }
+
+
+class ClienteHTTP:
+    """Cliente HTTP com pool, timeouts, novas tentativas e disjuntor"""
+
+    def __init__(self, nome, tamanho_pool=10, timeout_conexao=1.0, timeout_leitura=2.0,
+                 tentativas=2, espera_base=0.2, prazo_total=4.0,
+                 limite_falhas=5, tempo_espera=30.0, tamanho_pool_async=100):
+        self.nome = nome
+        self.tamanho_pool_async = tamanho_pool_async
+        self.timeout = (timeout_conexao, timeout_leitura)
+        self.tentativas = max(1, tentativas)
+        self.espera_base = espera_base
+        self.prazo_total = prazo_total
+        self.disjuntor = Disjuntor(limite_falhas, tempo_espera)
+        self.metricas = MetricasHTTP()
+
+        self.session = requests.Session()
+        # Novas tentativas são feitas aqui, com jitter; o adapter não repete nada
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=tamanho_pool, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        # Um cliente httpx por event loop (o AsyncClient fica preso ao loop em que foi criado)
+        self._clientes_async = weakref.WeakKeyDictionary()
+
+    def get(self, url, **kwargs):
+        """
+        Faz um GET (idempotente, portanto pode ser repetido).
+        Retorna a resposta para status < 500; levanta ErroHTTP/CircuitoAberto nos demais casos.
+        """
+        if not self.disjuntor.permitir():
+            self.metricas.registrar('rejeitada')
+            raise CircuitoAberto(f"{self.nome}: circuito aberto")
+
+        inicio = time.monotonic()
+        ultimo_erro = None
+        for tentativa in range(1, self.tentativas + 1):
+            self.metricas.registrar_tentativa()
+            inicio_tentativa = time.monotonic()
+            try:
+                response = self.session.get(url, timeout=self.timeout, **kwargs)
+                if response.status_code < 500:
+                    self.metricas.registrar('sucesso', time.monotonic() - inicio_tentativa)
+                    self.disjuntor.registrar_sucesso()
+                    return response
+                ultimo_erro = ErroHTTP(f"{self.nome}: HTTP {response.status_code}")
+                self.metricas.registrar('erro_http', time.monotonic() - inicio_tentativa)
+            except requests.Timeout as e:
+                ultimo_erro = ErroHTTP(f"{self.nome}: timeout ({e})")
+                self.metricas.registrar('timeout', time.monotonic() - inicio_tentativa)
+            except requests.RequestException as e:
+                ultimo_erro = ErroHTTP(f"{self.nome}: {e}")
+                self.metricas.registrar('erro_rede', time.monotonic() - inicio_tentativa)
+
+            if tentativa == self.tentativas:
+                break
+            # Full jitter: espera aleatória entre 0 e base * 2^(n-1)
+            espera = random.uniform(0, self.espera_base * (2 ** (tentativa - 1)))
+            decorrido = time.monotonic() - inicio
+            if decorrido + espera + sum(self.timeout) > self.prazo_total:
+                # Não há tempo para outra tentativa completa dentro do prazo
+                break
+            time.sleep(espera)
+
+        self.disjuntor.registrar_falha()
+        raise ultimo_erro
+
+    async def aget(self, url, **kwargs):
+        """Versão assíncrona de ``get``, com as mesmas regras de tentativas e disjuntor"""
+        import httpx
+
+        if not self.disjuntor.permitir():
+            self.metricas.registrar('rejeitada')
+            raise CircuitoAberto(f"{self.nome}: circuito aberto")
+
+        cliente = self._cliente_async()
+        inicio = time.monotonic()
+        ultimo_erro = None
+        for tentativa in range(1, self.tentativas + 1):
+            self.metricas.registrar_tentativa()
+            inicio_tentativa = time.monotonic()
+            try:
+                response = await cliente.get(url, **kwargs)
+                if response.status_code < 500:
+                    self.metricas.registrar('sucesso', time.monotonic() - inicio_tentativa)
+                    self.disjuntor.registrar_sucesso()
+                    return response
+                ultimo_erro = ErroHTTP(f"{self.nome}: HTTP {response.status_code}")
+                self.metricas.registrar('erro_http', time.monotonic() - inicio_tentativa)
+            except httpx.TimeoutException as e:
+                ultimo_erro = ErroHTTP(f"{self.nome}: timeout ({e!r})")
+                self.metricas.registrar('timeout', time.monotonic() - inicio_tentativa)
+            except httpx.HTTPError as e:
+                ultimo_erro = ErroHTTP(f"{self.nome}: {e!r}")
+                self.metricas.registrar('erro_rede', time.monotonic() - inicio_tentativa)
+
+            if tentativa == self.tentativas:
+                break
+            espera = random.uniform(0, self.espera_base * (2 ** (tentativa - 1)))
+            decorrido = time.monotonic() - inicio
+            if decorrido + espera + sum(self.timeout) > self.prazo_total:
+                break
+            await asyncio.sleep(espera)
+
+        self.disjuntor.registrar_falha()
+        raise ultimo_erro
+
+    def _cliente_async(self):
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        cliente = self._clientes_async.get(loop)
+        if cliente is None:
+            timeout_conexao, timeout_leitura = self.timeout
+            # Esperar uma conexão livre do pool não é falha do serviço: pode levar até o prazo total
+            cliente = httpx.AsyncClient(
+                timeout=httpx.Timeout(timeout_leitura, connect=timeout_conexao, pool=self.prazo_total),
+                limits=httpx.Limits(
+                    max_connections=self.tamanho_pool_async,
+                    max_keepalive_connections=self.tamanho_pool_async,
+                ),
+            )
+            self._clientes_async[loop] = cliente
+        return cliente
+
+    def amostras(self):
+        """Amostras das métricas deste cliente, agrupadas por família"""
+        resumo = self.metricas.resumo()
+        rotulo = f'cliente="{self.nome}"'
+        requisicoes = [
+            f'http_cliente_requisicoes_total{{{rotulo},resultado="{resultado}"}} {total}'
+            for resultado, total in sorted(resumo['resultados'].items())
+        ]
+        latencia = [
+            f'http_cliente_latencia_segundos_bucket{{{rotulo},le="{limite}"}} {total}'
+            for limite, total in zip(BUCKETS_LATENCIA, resumo['latencia_buckets'])
+        ]
+        latencia += [
+            f'http_cliente_latencia_segundos_bucket{{{rotulo},le="+Inf"}} {resumo["latencia_total"]}',
+            f'http_cliente_latencia_segundos_sum{{{rotulo}}} {resumo["latencia_soma"]:.6f}',
+            f'http_cliente_latencia_segundos_count{{{rotulo}}} {resumo["latencia_total"]}',
+        ]
+        return {
+            'http_cliente_requisicoes_total': requisicoes,
+            'http_cliente_tentativas_total': [
+                f'http_cliente_tentativas_total{{{rotulo}}} {resumo["tentativas"]}'
+            ],
+            'http_cliente_latencia_segundos': latencia,
+            'http_cliente_circuito_aberto': [
+                f'http_cliente_circuito_aberto{{{rotulo}}} {int(self.disjuntor.estado != Disjuntor.FECHADO)}'
+            ],
+            'http_cliente_circuito_aberturas_total': [
+                f'http_cliente_circuito_aberturas_total{{{rotulo}}} {self.disjuntor.aberturas}'
+            ],
+        }
+
+
+# Família -> (tipo, descrição) para o formato texto do Prometheus
+FAMILIAS_METRICAS = {
+    'http_cliente_requisicoes_total': ('counter', 'Chamadas por resultado'),
+    'http_cliente_tentativas_total': ('counter', 'Tentativas feitas (inclui novas tentativas)'),
+    'http_cliente_latencia_segundos': ('histogram', 'Latência de cada tentativa'),
+    'http_cliente_circuito_aberto': ('gauge', '1 se o disjuntor não está fechado'),
+    'http_cliente_circuito_aberturas_total': ('counter', 'Vezes que o disjuntor abriu'),
+}
+
+
+def obter_cliente(nome, **opcoes):
+    """Retorna o cliente do processo para ``nome``, criando-o na primeira chamada"""
+    with _clientes_lock:
+        cliente = _clientes.get(nome)
+        if cliente is None:
+            cliente = ClienteHTTP(nome, **opcoes)
+            _clientes[nome] = cliente
+        return cliente
+
+
+def exportar_metricas():
+    """Métricas de todos os clientes no formato texto do Prometheus"""
+    with _clientes_lock:
+        clientes = list(_clientes.values())
+    amostras = [cliente.amostras() for cliente in clientes]
+
+    linhas = []
+    for familia, (tipo, descricao) in FAMILIAS_METRICAS.items():
+        linhas.append(f'# HELP {familia} {descricao}')
+        linhas.append(f'# TYPE {familia} {tipo}')
+        for amostras_cliente in amostras:
+            linhas.extend(amostras_cliente[familia])
+    return '\n'.join(linhas) + '\n'
@@ -0,0 +1,44 @@
+"""
+Consultas por intervalo de tempo usando a chave primária UUIDv7.
+
+Os modelos usam ``id = UUIDField(default=uuid7)``, e o UUIDv7 começa com o
+timestamp em milissegundos. Por isso "criados entre A e B" pode ser
+``id >= uuid7_minimo(A) AND id < uuid7_minimo(B)``, que usa o índice da
+chave primária, em vez de filtrar ``data_cadastro``/``data_envio``, que
+não têm índice.
+
+O id é sorteado quando a instância é criada em memória e a data
+``auto_now_add`` é gravada no save. A diferença é o tempo entre os dois
+(normalmente milissegundos), irrelevante nos filtros por dia/mês. Só vale
+para modelos cujo id vem de ``uuid7`` e cuja data é a de criação.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import models
+from django.utils import timezone
+
+from utils.uuid7 import uuid7_minimo
+
+
+class IntervaloUUID7QuerySet(models.QuerySet):
+    """QuerySet com filtros de data de criação pela chave primária UUIDv7"""
+
+    def criados_entre(self, inicio=None, fim=None):
+        """Criados em [inicio, fim); qualquer um dos limites pode ser omitido"""
+        filtros = {}
+        if inicio is not None:
+            filtros['pk__gte'] = uuid7_minimo(inicio)
+        if fim is not None:
+            filtros['pk__lt'] = uuid7_minimo(fim)
+        return self.filter(**filtros)
+
+    def criados_desde(self, inicio):
+        return self.criados_entre(inicio=inicio)
+
+    def criados_antes(self, fim):
+        return self.criados_entre(fim=fim)
+
+    def criados_no_dia(self, dia):
+        """Criados na data ``dia`` (no fuso horário atual)"""
+        inicio = timezone.make_aware(datetime.combine(dia, time.min))
+        return self.criados_entre(inicio, inicio + timedelta(days=1))
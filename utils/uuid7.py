@@ -1,50 +1,158 @@
 # backend/libs/uuid7.py
 
+import os
+import threading
 import time
-import random
 import uuid
+from datetime import datetime, timezone
 
+# Estado compartilhado entre threads (gunicorn/celery com threads): protegido por _lock
+_lock = threading.Lock()
 _last_v7_timestamp = -1
 _last_v7_random = -1
 
-def uuid7() -> uuid.UUID:
+# Bits aleatórios vêm de os.urandom em blocos, para não chamar o sistema a cada UUID
+_BYTES_ALEATORIOS = 10  # 80 bits, dos quais usamos 74
+_TAMANHO_BLOCO = 256
+_bloco = []
+
+_MAXIMO_ALEATORIO = 1 << 74
+_MASCARA_74 = _MAXIMO_ALEATORIO - 1
+_MASCARA_62 = (1 << 62) - 1
+_VERSAO_VARIANTE = (7 << 76) | (2 << 62)
+
+
+def _reiniciar_apos_fork():
     """
-    Gera um UUIDv7, conforme descrito no rascunho da RFC.
-    Este é um UUID ordenado por tempo, útil para ordenação em bases de dados.
+    O processo filho (workers em prefork) herda a cópia do estado e do bloco
+    de bytes aleatórios do pai; sem descartá-los, pai e filhos gerariam os
+    mesmos UUIDs.
+    """
+    global _lock, _last_v7_timestamp, _last_v7_random, _bloco
+    _lock = threading.Lock()
+    _last_v7_timestamp = -1
+    _last_v7_random = -1
+    _bloco = []
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reiniciar_apos_fork)
+
+
+def _aleatorio():
+    """74 bits aleatórios do bloco atual (chamar com _lock adquirido)"""
+    global _bloco
+    if not _bloco:
+        dados = os.urandom(_BYTES_ALEATORIOS * _TAMANHO_BLOCO)
+        _bloco = [
+            int.from_bytes(dados[inicio:inicio + _BYTES_ALEATORIOS], 'big') & _MASCARA_74
+            for inicio in range(0, len(dados), _BYTES_ALEATORIOS)
+        ]
+    return _bloco.pop()
+
+
+def _proximos(quantidade):
+    """
+    Reserva ``quantidade`` valores consecutivos de (timestamp, aleatório) e
+    devolve (timestamp_ms, primeiro_aleatorio). Com _lock adquirido.
     """
     global _last_v7_timestamp, _last_v7_random
-    timestamp_ms = int(time.time() * 1000)
+    timestamp_ms = time.time_ns() // 1_000_000
 
     if timestamp_ms <= _last_v7_timestamp:
-        timestamp_ms = _last_v7_timestamp
         # O timestamp é o mesmo ou retrocedeu. Incrementa os bits aleatórios.
+        timestamp_ms = _last_v7_timestamp
         random_bits = _last_v7_random + 1
         # Verifica o overflow
-        if random_bits >= (1 << 74):
+        if random_bits + quantidade > _MAXIMO_ALEATORIO:
             # Os bits aleatórios estouraram. Espera pelo próximo milissegundo.
             while timestamp_ms <= _last_v7_timestamp:
-                timestamp_ms = int(time.time() * 1000)
-            random_bits = random.getrandbits(74)
+                timestamp_ms = time.time_ns() // 1_000_000
+            random_bits = _aleatorio()
     else:
-        random_bits = random.getrandbits(74)
+        random_bits = _aleatorio()
+
+    # Um lote grande começando perto do fim do espaço aleatório: recomeça mais abaixo
+    if random_bits + quantidade > _MAXIMO_ALEATORIO:
+        random_bits = _aleatorio() % (_MAXIMO_ALEATORIO - quantidade)
 
     _last_v7_timestamp = timestamp_ms
-    _last_v7_random = random_bits
+    _last_v7_random = random_bits + quantidade - 1
+    return timestamp_ms, random_bits
+
+
+def _montar(timestamp_ms, random_bits):
+    """
+    Inteiro do UUID: 48 bits do timestamp, 4 da versão (7), os 12 bits
+    superiores dos aleatórios, 2 da variante (10) e os 62 aleatórios restantes.
+    """
+    return (
+        (timestamp_ms << 80)
+        | _VERSAO_VARIANTE
+        | ((random_bits >> 62) << 64)
+        | (random_bits & _MASCARA_62)
+    )
+
+
+def _uuid(valor):
+    """uuid.UUID a partir de um inteiro já válido, sem as verificações de UUID(int=...)"""
+    resultado = object.__new__(uuid.UUID)
+    object.__setattr__(resultado, 'int', valor)
+    object.__setattr__(resultado, 'is_safe', uuid.SafeUUID.unknown)
+    return resultado
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Gera um UUIDv7, conforme descrito no rascunho da RFC.
+    Este é um UUID ordenado por tempo, útil para ordenação em bases de dados.
+    Seguro entre threads: UUIDs gerados no mesmo processo são únicos e crescentes.
+    """
+    with _lock:
+        timestamp_ms, random_bits = _proximos(1)
+    return _uuid(_montar(timestamp_ms, random_bits))
+
+
+def uuid7_batch(n: int) -> list[uuid.UUID]:
+    """
+    Gera ``n`` UUIDv7 crescentes de uma vez (uma leitura do relógio e um
+    sorteio para o lote todo), para caminhos com ``bulk_create``.
+    """
+    if n <= 0:
+        return []
+    with _lock:
+        timestamp_ms, random_bits = _proximos(n)
+    base = _montar(timestamp_ms, 0)
+    # Mesmo que _uuid(), com as funções em variáveis locais (é o laço quente do lote)
+    novo, definir, classe, seguro = object.__new__, object.__setattr__, uuid.UUID, uuid.SafeUUID.unknown
+    resultado = []
+    for aleatorio in range(random_bits, random_bits + n):
+        item = novo(classe)
+        definir(item, 'int', base | ((aleatorio >> 62) << 64) | (aleatorio & _MASCARA_62))
+        definir(item, 'is_safe', seguro)
+        resultado.append(item)
+    return resultado
+
+
+# Intervalos de tempo -> intervalos de UUIDv7 (o timestamp ocupa os 48 bits mais altos)
+
+def _timestamp_ms(momento):
+    """Milissegundos desde a época; datetime sem fuso é tratado como UTC"""
+    if momento.tzinfo is None:
+        momento = momento.replace(tzinfo=timezone.utc)
+    return int(momento.timestamp() * 1000)
+
+
+def uuid7_minimo(momento) -> uuid.UUID:
+    """Menor UUIDv7 possível no milissegundo de ``momento`` (datetime)"""
+    return _uuid(_montar(_timestamp_ms(momento), 0))
 
-    # 48 bits do timestamp
-    uuid_int = timestamp_ms << 80
 
-    # 4 bits da versão (7)
-    uuid_int |= 7 << 76
+def uuid7_maximo(momento) -> uuid.UUID:
+    """Maior UUIDv7 possível no milissegundo de ``momento`` (datetime)"""
+    return _uuid(_montar(_timestamp_ms(momento), _MASCARA_74))
 
-    # 74 bits aleatórios, com a variante (2)
-    # A variante tem 2 bits (10), então precisamos abrir espaço para ela.
-    # Variante nos bits 62 e 63.
-    # Pega os 12 bits superiores dos 74 bits aleatórios
-    uuid_int |= (random_bits >> 62) << 64
-    # Define a variante
-    uuid_int |= 2 << 62
-    # Adiciona os 62 bits inferiores restantes
-    uuid_int |= random_bits & ((1 << 62) - 1)
 
-    return uuid.UUID(int=uuid_int)
+def momento_uuid7(valor: uuid.UUID) -> datetime:
+    """Instante (UTC, precisão de milissegundo) embutido em um UUIDv7"""
+    return datetime.fromtimestamp((valor.int >> 80) / 1000, tz=timezone.utc)
@@ -1,5 +1,4 @@
 import re
-import requests
 from django.core.exceptions import ValidationError
 from datetime import date
 
@@ -50,7 +49,7 @@ def validar_idade_atleta(data_nascimento):
 
 def buscar_cep(cep):
     """
-    Busca informações do CEP usando a API ViaCEP
+    Busca informações do CEP usando a API ViaCEP, com cache em memória e no banco
     Retorna um dicionário com os dados do endereço ou None se não encontrar
     """
     # Limpar CEP (remover caracteres especiais)
@@ -59,38 +58,55 @@ def buscar_cep(cep):
     if len(cep_limpo) != 8:
         return None
     
+    # Import local: enderecos depende do Django já configurado
+    from enderecos.cache import resolver_cep
+    from enderecos.viacep import ViaCepIndisponivel
+    
     try:
-        # Fazer requisição para a API ViaCEP
-        url = f"https://viacep.com.br/ws/{cep_limpo}/json/"
-        response = requests.get(url, timeout=10)
-        
-        if response.status_code == 200:
-            dados = response.json()
-            
-            # Verificar se o CEP foi encontrado
-            if not dados.get('erro'):
-                return {
-                    'cep': dados.get('cep'),
-                    'logradouro': dados.get('logradouro'),
-                    'bairro': dados.get('bairro'),
-                    'cidade': dados.get('localidade'),
-                    'uf': dados.get('uf'),
-                    'complemento': dados.get('complemento')
-                }
-        
-        return None
-        
-    except requests.RequestException:
+        return resolver_cep(cep_limpo)
+    except ViaCepIndisponivel:
         # Em caso de erro na requisição, retornar None
         return None
 
 
+async def buscar_cep_async(cep):
+    """
+    Versão assíncrona de buscar_cep, para views ASGI
+    Retorna um dicionário com os dados do endereço ou None se não encontrar
+    """
+    cep_limpo = re.sub(r'[^0-9]', '', cep)
+    
+    if len(cep_limpo) != 8:
+        return None
+    
+    from enderecos.cache import resolver_cep_async
+    from enderecos.viacep import ViaCepIndisponivel
+    
+    try:
+        return await resolver_cep_async(cep_limpo)
+    except ViaCepIndisponivel:
+        return None
+
+
 def validar_cep(cep):
     """
     Valida se o CEP é válido e existe
     Retorna os dados do endereço se válido
     """
-    dados = buscar_cep(cep)
+    cep_limpo = re.sub(r'[^0-9]', '', cep)
+    if len(cep_limpo) != 8:
+        raise ValidationError('CEP inválido ou não encontrado')
+    
+    from enderecos.cache import resolver_cep
+    from enderecos.viacep import ViaCepIndisponivel
+    
+    try:
+        dados = resolver_cep(cep_limpo)
+    except ViaCepIndisponivel:
+        # CEP fora da base local e ViaCEP fora do ar: não há como confirmar
+        # agora, então aceitamos o formato para não bloquear o cadastro
+        return None
+    
     if dados is None:
         raise ValidationError('CEP inválido ou não encontrado')
-    return dados
\ No newline at end of file
+    return dados